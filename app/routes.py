@@ -10,6 +10,8 @@ from app import app, socketio, logger
 from app.services.validation_service import process_validation_request
 from app.services.pdf_service import create_annotated_pdf
 from app.services.docx_service import convert_docx_to_pdf
+from app.services.catalog_loader import available_catalog_years, CATALOG_LOAD_STATE
+from app.services.journal_catalog import installed_catalog_years, default_catalog_year
 from config import Config
 
 @app.route('/')
@@ -111,6 +113,17 @@ def validate_references_api():
         return jsonify({"error": error_msg}), 500
 
 
+@app.route('/api/catalogs', methods=['GET'])
+def catalogs_api():
+    """Tahun katalog ScimagoJR & Scopus yang bisa dipilih lewat parameter catalog_year."""
+    return jsonify({
+        "default_year": default_catalog_year(),
+        "available_years": available_catalog_years(),
+        "installed_years": installed_catalog_years(),
+        "status": CATALOG_LOAD_STATE['status']
+    })
+
+
 @app.route('/api/download_report', methods=['GET'])
 def download_report_api():
     try:
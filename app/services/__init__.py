@@ -1,8 +1,34 @@
 from app.services.scimago_service import (
     load_scimago_data,
     search_journal_in_scimago,
-    clean_scimago_title,
-    SCIMAGO_DATA
+    clean_scimago_title
+)
+
+# Import dari journal_catalog (katalog gabungan Scimago + Scopus)
+from app.services.journal_catalog import (
+    JournalCatalog,
+    get_catalog,
+    search_journal,
+    search_journals_batch,
+    search_journals_by_issn,
+    scan_reference_titles,
+    choose_scanned_title,
+    parse_issns,
+    clean_journal_title
+)
+
+# Import dari catalog_loader (load katalog di background)
+from app.services.catalog_loader import (
+    start_catalog_loading,
+    wait_for_catalog,
+    is_catalog_ready,
+    available_catalog_years
+)
+
+# Import dari catalog_registry (katalog per tahun, hot reload)
+from app.services.catalog_registry import (
+    CatalogRegistry,
+    CATALOG_REGISTRY
 )
 
 # Import dari ai_service
@@ -34,7 +60,25 @@ __all__ = [
     'load_scimago_data',
     'search_journal_in_scimago',
     'clean_scimago_title',
-    'SCIMAGO_DATA',
+    
+    # Journal catalog
+    'JournalCatalog',
+    'get_catalog',
+    'search_journal',
+    'search_journals_batch',
+    'search_journals_by_issn',
+    'scan_reference_titles',
+    'choose_scanned_title',
+    'parse_issns',
+    'clean_journal_title',
+    
+    # Catalog loader
+    'start_catalog_loading',
+    'wait_for_catalog',
+    'is_catalog_ready',
+    'available_catalog_years',
+    'CatalogRegistry',
+    'CATALOG_REGISTRY',
     
     # AI
     'get_generative_model',
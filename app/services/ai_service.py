@@ -1,9 +1,12 @@
 import logging
 import json
-import re
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import google.generativeai as genai
 from config import Config
+from app.services.analysis_cache import ReferenceAnalysisCache, reference_cache_key, style_detection_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +14,20 @@ logger = logging.getLogger(__name__)
 _MODEL_CACHE = None
 
 
+def _create_analysis_cache():
+    if not Config.AI_CACHE_ENABLED:
+        return None
+    try:
+        cache_path = os.path.join(Config.UPLOAD_FOLDER, '.cache', 'reference_analysis.sqlite3')
+        return ReferenceAnalysisCache(cache_path, max_entries=Config.AI_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.warning(f"⚠️ Reference analysis cache disabled: {e}")
+        return None
+
+
+_ANALYSIS_CACHE = _create_analysis_cache()
+
+
 def get_generative_model():
     global _MODEL_CACHE
     if _MODEL_CACHE:
@@ -108,33 +125,254 @@ JSON Array Output:
         return None, error_msg
 
 
-def analyze_references_with_ai(references_list, style, year_range):
+class ChunkAnalysisError(Exception):
+    """Respons AI untuk satu potongan referensi tidak berisi array JSON yang valid."""
+
+
+class JSONArrayStreamParser:
+    """
+    Parser inkremental untuk array JSON yang datang sepotong-sepotong
+    (streamed generation). feed() mengembalikan object elemen array yang
+    sudah lengkap; teks sebelum '[' pertama (mis. ```json) diabaikan.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.closed = False
+
+    def feed(self, text):
+        objects = []
+        for char in text:
+            if self.closed:
+                break
+            if self._depth == 0:
+                if char == '[':
+                    self._depth = 1
+                continue
+            if self._depth > 1:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 1:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 1:
+                    objects.append(json.loads(''.join(self._buffer)))
+                    self._buffer = []
+                elif self._depth == 0:
+                    self.closed = True
+        return objects
+
+
+def _analyze_chunk(model, references_list, numbers, style, current_year, year_threshold, year_range, on_result):
+    """
+    Analisis satu potongan referensi (nomor global `numbers`, tidak harus
+    berurutan karena referensi yang ada di cache dilewati)
+    dengan streamed generation: setiap object referensi yang sudah lengkap
+    langsung diteruskan ke `on_result`. Respons yang rusak/terpotong diulang
+    hingga Config.AI_ANALYSIS_CHUNK_RETRIES kali; referensi yang sudah
+    diterima di percobaan sebelumnya tidak dikirim ulang.
+    """
+    chunk = [references_list[number - 1] for number in numbers]
+    prompt = _construct_batch_gemini_prompt(chunk, style, current_year, year_threshold, year_range, numbers)
+    label = f"{numbers[0]}-{numbers[-1]}"
+    attempts = 1 + max(0, Config.AI_ANALYSIS_CHUNK_RETRIES)
+    received = set()
+    for attempt in range(1, attempts + 1):
+        parser = JSONArrayStreamParser()
+        position = 0
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config={"temperature": 0.1},
+                stream=True
+            )
+            for part in response:
+                for result in parser.feed(part.text):
+                    if not isinstance(result, dict):
+                        raise ValueError("array element is not an object")
+                    # Object ke-i = referensi ke-i potongan; nomor dari AI diabaikan
+                    # (bisa dinomori ulang dari 1 dan bertabrakan dengan nomor global)
+                    if position >= len(numbers):
+                        raise ValueError("more objects than references in chunk")
+                    result['reference_number'] = numbers[position]
+                    position += 1
+                    if result['reference_number'] not in received:
+                        received.add(result['reference_number'])
+                        on_result(result)
+            if not parser.closed:
+                raise ValueError("JSON array not closed")
+            return
+        except ValueError as e:
+            logger.warning(f"⚠️ Respons AI rusak untuk referensi {label} (percobaan {attempt}/{attempts}): {e}")
+
+    logger.error(f"AI gagal menganalisis referensi {label}: {len(received)}/{len(chunk)} diterima sebelum gagal")
+    raise ChunkAnalysisError(f"references {label}")
+
+
+def _failed_reference_result(number, reference):
+    """Placeholder untuk referensi yang gagal dianalisis AI setelah semua percobaan."""
+    return {
+        "reference_number": number,
+        "raw_reference_text": reference,
+        "full_reference": reference,
+        "reference_type": "other",
+        "is_format_correct": False,
+        "is_complete": False,
+        "is_year_recent": False,
+        "is_scientific_source": False,
+        "missing_elements": [],
+        "analysis_error": True,
+        "feedback": "AI gagal menganalisis referensi ini. Mohon jalankan validasi ulang."
+    }
+
+
+def analyze_references_with_ai(references_list, style, year_range, progress_callback=None, result_callback=None):
+    """
+    Analisis semua referensi. Daftar dipecah per Config.AI_ANALYSIS_CHUNK_SIZE
+    referensi yang dikirim paralel (maks Config.AI_ANALYSIS_MAX_WORKERS)
+    dengan streamed generation, lalu hasilnya digabung urut `reference_number`.
+    Referensi yang hasilnya sudah ada di cache analisis (teks ternormalisasi +
+    gaya + ambang tahun sama) tidak dikirim ke AI; hasil cache disisipkan
+    kembali sesuai posisinya.
+    Callback dipanggil di thread pemanggil: `result_callback(result_json,
+    detected_style)` setiap satu referensi selesai di-parse,
+    `progress_callback(done, total, analyzed_refs)` setiap satu potongan selesai.
+    Potongan yang tetap gagal setelah semua percobaan tidak menggagalkan
+    dokumen: referensinya diganti placeholder `analysis_error`, hasil lain
+    tetap dikembalikan & disimpan ke cache.
+    Return (batch_results_json, detected_style, error).
+    """
     try:
-        model = get_generative_model()
         current_year = datetime.now().year
         year_threshold = current_year - year_range
+        model = None
         
-        # Jika style adalah "Auto", minta AI untuk mendeteksi gaya sitasi
         detected_style = style
         if style.lower() == 'auto':
-            logger.info("Mode Auto-Detect: Meminta AI untuk mendeteksi gaya sitasi...")
-            detected_style = _detect_citation_style(references_list, model)
-            logger.info(f"✅ AI mendeteksi gaya sitasi: {detected_style}")
+            # Hasil deteksi sebelumnya untuk sample yang sama → tidak perlu deteksi ulang
+            detected_style = _cached_detected_style(references_list)
+            if detected_style:
+                logger.info(f"♻️ Gaya sitasi dari cache deteksi: {detected_style}")
+            else:
+                # Jika style adalah "Auto", minta AI untuk mendeteksi gaya sitasi
+                logger.info("Mode Auto-Detect: Meminta AI untuk mendeteksi gaya sitasi...")
+                model = get_generative_model()
+                detected_style = _detect_citation_style(references_list, model)
+                if detected_style:
+                    _store_detected_style(references_list, detected_style)
+                else:
+                    # Fallback ke APA jika deteksi gagal (tidak disimpan ke cache)
+                    detected_style = "APA"
+                logger.info(f"✅ AI mendeteksi gaya sitasi: {detected_style}")
         
-        prompt = _construct_batch_gemini_prompt(references_list, detected_style, current_year, year_threshold, year_range)
+        cache_keys = [
+            reference_cache_key(reference, detected_style, year_threshold) for reference in references_list
+        ]
+        cached = _ANALYSIS_CACHE.get_many(cache_keys) if _ANALYSIS_CACHE else {}
+        cached_results = []
+        missing_numbers = []
+        for number, (reference, key) in enumerate(zip(references_list, cache_keys), start=1):
+            if key in cached:
+                cached_results.append(dict(cached[key], reference_number=number, raw_reference_text=reference))
+            else:
+                missing_numbers.append(number)
         
-        logger.info(f"Memulai analisis BATCH untuk {len(references_list)} referensi (Gaya: {detected_style}).")
-        analysis_response = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.1}
+        if missing_numbers and model is None:
+            model = get_generative_model()
+        chunk_size = max(1, Config.AI_ANALYSIS_CHUNK_SIZE)
+        chunks = [
+            missing_numbers[start:start + chunk_size]
+            for start in range(0, len(missing_numbers), chunk_size)
+        ]
+        
+        if cached_results:
+            logger.info(f"♻️ {len(cached_results)}/{len(references_list)} hasil analisis referensi diambil dari cache")
+        logger.info(
+            f"Memulai analisis BATCH untuk {len(missing_numbers)} referensi (Gaya: {detected_style}) "
+            f"dalam {len(chunks)} potongan."
+        )
+        # Worker hanya mengirim event ke queue; callback & penggabungan di thread ini
+        events = queue.Queue()
+
+        def run_chunk(numbers):
+            try:
+                _analyze_chunk(
+                    model, references_list, numbers, detected_style, current_year, year_threshold, year_range,
+                    on_result=lambda result: events.put(('result', result))
+                )
+                events.put(('done', numbers))
+            except Exception as e:
+                events.put(('failed', (numbers, e)))
+
+        batch_results_json = []
+        for result in cached_results:
+            batch_results_json.append(result)
+            if result_callback:
+                result_callback(result, detected_style)
+        analyzed_refs = len(cached_results)
+        done = 0
+        failed_numbers = []
+        chunk_errors = []
+        workers = max(1, min(Config.AI_ANALYSIS_MAX_WORKERS, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-analysis') as executor:
+            for numbers in chunks:
+                executor.submit(run_chunk, numbers)
+            while done < len(chunks):
+                kind, payload = events.get()
+                if kind == 'result':
+                    batch_results_json.append(payload)
+                    if result_callback:
+                        result_callback(payload, detected_style)
+                    continue
+                if kind == 'failed':
+                    numbers, error = payload
+                    failed_numbers.extend(numbers)
+                    chunk_errors.append(error)
+                else:
+                    numbers = payload
+                done += 1
+                analyzed_refs += len(numbers)
+                if progress_callback:
+                    progress_callback(done, len(chunks), analyzed_refs)
+        
+        # Simpan semua hasil AI yang berhasil, termasuk dari potongan yang gagal di tengah jalan
+        missing = set(missing_numbers)
+        _store_analysis_results(
+            references_list,
+            [result for result in batch_results_json if result['reference_number'] in missing],
+            detected_style, year_threshold
         )
         
-        analysis_json_match = re.search(r'\[.*\]', analysis_response.text, re.DOTALL)
-        if not analysis_json_match:
-            logger.error(f"AI gagal menganalisis referensi. Respons mentah: {analysis_response.text}")
-            return None, detected_style, "Maaf, AI tidak dapat menganalisis referensi dengan format yang sesuai. Mohon coba lagi atau periksa format referensi Anda."
+        if failed_numbers:
+            received = {result['reference_number'] for result in batch_results_json}
+            unanalyzed = [number for number in failed_numbers if number not in received]
+            if len(unanalyzed) == len(references_list):
+                # Tidak ada satu pun referensi yang berhasil → laporkan error seperti sebelumnya
+                if all(isinstance(error, ChunkAnalysisError) for error in chunk_errors):
+                    return None, detected_style, "Maaf, AI tidak dapat menganalisis referensi dengan format yang sesuai. Mohon coba lagi atau periksa format referensi Anda."
+                raise next(error for error in chunk_errors if not isinstance(error, ChunkAnalysisError))
+            logger.warning(f"⚠️ {len(unanalyzed)} referensi gagal dianalisis AI, ditandai error: {unanalyzed}")
+            for number in unanalyzed:
+                result = _failed_reference_result(number, references_list[number - 1])
+                batch_results_json.append(result)
+                if result_callback:
+                    result_callback(result, detected_style)
         
-        batch_results_json = json.loads(analysis_json_match.group(0))
+        batch_results_json.sort(key=lambda result: result['reference_number'])
         return batch_results_json, detected_style, None
         
     except Exception as e:
@@ -156,10 +394,113 @@ def analyze_references_with_ai(references_list, style, year_range):
         return None, style, error_msg
 
 
+def _store_analysis_results(references_list, results, style, year_threshold):
+    # Simpan hasil AI ke cache analisis (tanpa nomor referensi, key dari teks referensi)
+    if not _ANALYSIS_CACHE or not results:
+        return
+    _ANALYSIS_CACHE.put_many({
+        reference_cache_key(references_list[result['reference_number'] - 1], style, year_threshold): {
+            field: value for field, value in result.items() if field != 'reference_number'
+        }
+        for result in results
+    })
+
+
+def _parse_single_pass_response(text):
+    json_text = text.strip()
+    if "```json" in json_text:
+        json_text = json_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in json_text:
+        json_text = json_text.split("```")[1].split("```")[0].strip()
+
+    document = json.loads(json_text)
+    if not isinstance(document, dict) or not isinstance(document.get('references'), list):
+        raise ValueError("response is not an object with a 'references' array")
+    if not document['references']:
+        raise ValueError("no references in response")
+    return document
+
+
+def analyze_references_block_with_ai(references_block, style, year_range):
+    """
+    Mode single-pass: satu panggilan AI untuk memisahkan blok daftar pustaka,
+    mendeteksi gaya sitasi (jika Auto) dan menganalisis setiap referensi.
+    Return (references_list, batch_results_json, detected_style, error);
+    jika error, pemanggil kembali ke alur multi-call (split → deteksi → analisis).
+    """
+    try:
+        model = get_generative_model()
+        current_year = datetime.now().year
+        year_threshold = current_year - year_range
+
+        prompt = _construct_single_pass_prompt(references_block, style, current_year, year_threshold, year_range)
+        logger.info("🔄 Mode single-pass: split + deteksi gaya + analisis dalam satu panggilan AI...")
+        response = model.generate_content(
+            prompt,
+            generation_config={"temperature": 0.1}
+        )
+        document = _parse_single_pass_response(response.text)
+
+        detected_style = style
+        if style.lower() == 'auto':
+            detected_style = _parse_style_name(str(document.get('detected_style', ''))) or "APA"
+            logger.info(f"✅ AI mendeteksi gaya sitasi: {detected_style}")
+
+        references_list = []
+        batch_results_json = []
+        for number, result in enumerate(document['references'], start=1):
+            if not isinstance(result, dict):
+                raise ValueError(f"reference {number} is not an object")
+            reference = result.get('raw_reference_text') or result.get('full_reference')
+            if not isinstance(reference, str) or not reference.strip():
+                raise ValueError(f"reference {number} has no text")
+            result['reference_number'] = number
+            references_list.append(reference)
+            batch_results_json.append(result)
+    except Exception as e:
+        logger.warning(f"⚠️ Mode single-pass gagal, kembali ke alur multi-call: {e}")
+        return None, None, style, str(e)
+
+    logger.info(f"✅ Single-pass: {len(references_list)} referensi dipisahkan & dianalisis")
+    _store_analysis_results(references_list, batch_results_json, detected_style, year_threshold)
+    return references_list, batch_results_json, detected_style, None
+
+
+_DETECTABLE_STYLES = ['APA', 'IEEE', 'MLA', 'HARVARD', 'CHICAGO', 'MIXED']
+# Jumlah referensi pertama yang dikirim ke AI untuk deteksi gaya sitasi
+_STYLE_SAMPLE_SIZE = 5
+
+
+def _parse_style_name(text):
+    # Extract style name dari response (case insensitive); None jika tidak valid
+    detected = text.strip().upper()
+    for style in _DETECTABLE_STYLES:
+        if style in detected:
+            return style.title() if style != 'IEEE' else 'IEEE'
+    return None
+
+
+def _cached_detected_style(references_list):
+    """Gaya hasil deteksi AI sebelumnya untuk sample referensi yang sama, atau None."""
+    if not _ANALYSIS_CACHE or not references_list:
+        return None
+    key = style_detection_cache_key(references_list[:_STYLE_SAMPLE_SIZE])
+    cached = _ANALYSIS_CACHE.get_many([key]).get(key) or {}
+    return _parse_style_name(str(cached.get('detected_style', '')))
+
+
+def _store_detected_style(references_list, style):
+    if not _ANALYSIS_CACHE or not references_list:
+        return
+    key = style_detection_cache_key(references_list[:_STYLE_SAMPLE_SIZE])
+    _ANALYSIS_CACHE.put_many({key: {'detected_style': style}})
+
+
 def _detect_citation_style(references_list, model):
+    """Minta AI mendeteksi gaya sitasi dari sample referensi; None jika deteksi gagal."""
     try:
         # Ambil max 5 referensi pertama sebagai sample
-        sample_references = references_list[:min(5, len(references_list))]
+        sample_references = references_list[:_STYLE_SAMPLE_SIZE]
         formatted_sample = "\n".join([f"{i+1}. {ref}" for i, ref in enumerate(sample_references)])
         
         detection_prompt = f"""
@@ -215,40 +556,32 @@ def _detect_citation_style(references_list, model):
         detected = response.text.strip().upper()
         
         # Validasi output
-        valid_styles = ['APA', 'IEEE', 'MLA', 'HARVARD', 'CHICAGO', 'MIXED']
-        
-        # Extract style name dari response (case insensitive)
-        for style in valid_styles:
-            if style in detected:
-                return style.title() if style != 'IEEE' else 'IEEE'
+        style = _parse_style_name(detected)
+        if style:
+            return style
         
-        # Fallback ke APA jika deteksi gagal
         logger.warning(f"⚠️ AI mengembalikan style tidak valid: '{detected}', fallback ke APA")
-        return "APA"
+        return None
         
     except Exception as e:
         logger.error(f"Error saat deteksi citation style: {e}", exc_info=True)
-        # Fallback ke APA
-        return "APA"
+        return None
 
 
-def _construct_batch_gemini_prompt(references_list, style, year, year_threshold, year_range):
-    formatted_references = "\n".join([
-        f"{i+1}. {ref}" for i, ref in enumerate(references_list)
-    ])
+_STYLE_EXAMPLES = {
+    "APA": "Contoh APA: Smith, J. (2023). Judul artikel. Nama Jurnal, 10(2), 1-10.",
+    "Harvard": "Contoh Harvard: Smith, J. (2023) 'Judul artikel', Nama Jurnal, 10(2), pp. 1-10.",
+    "IEEE": "Contoh IEEE: [1] J. Smith, \"Judul artikel,\" Nama Jurnal, vol. 10, no. 2, pp. 1-10, Jan. 2023.",
+    "MLA": "Contoh MLA: Smith, John. \"Judul Artikel.\" Nama Jurnal, vol. 10, no. 2, 2023, pp. 1-10.",
+    "Chicago": "Contoh Chicago: Smith, John. 2023. \"Judul Artikel.\" Nama Jurnal 10 (2): 1-10.",
+    "Mixed": "Gaya campuran terdeteksi - Validasi berdasarkan struktur umum (penulis, tahun, judul, sumber)."
+}
 
-    style_examples = {
-        "APA": "Contoh APA: Smith, J. (2023). Judul artikel. Nama Jurnal, 10(2), 1-10.",
-        "Harvard": "Contoh Harvard: Smith, J. (2023) 'Judul artikel', Nama Jurnal, 10(2), pp. 1-10.",
-        "IEEE": "Contoh IEEE: [1] J. Smith, \"Judul artikel,\" Nama Jurnal, vol. 10, no. 2, pp. 1-10, Jan. 2023.",
-        "MLA": "Contoh MLA: Smith, John. \"Judul Artikel.\" Nama Jurnal, vol. 10, no. 2, 2023, pp. 1-10.",
-        "Chicago": "Contoh Chicago: Smith, John. 2023. \"Judul Artikel.\" Nama Jurnal 10 (2): 1-10.",
-        "Mixed": "Gaya campuran terdeteksi - Validasi berdasarkan struktur umum (penulis, tahun, judul, sumber)."
-    }
-    
+
+def _style_instruction(style):
     # Tentukan instruksi format berdasarkan style
     if style.upper() == "MIXED":
-        style_instruction = """
+        return """
             **GAYA SITASI: MIXED (Campuran)**
             Karena referensi menggunakan gaya campuran, validasi berdasarkan STRUKTUR UMUM:
             - `is_format_correct` = true jika memiliki urutan logis: Penulis → Tahun → Judul → Sumber
@@ -256,13 +589,15 @@ def _construct_batch_gemini_prompt(references_list, style, year, year_threshold,
             - Fokus pada kelengkapan elemen, bukan konsistensi format
         """
     else:
-        style_instruction = f"""
+        return f"""
             Analisis setiap referensi berdasarkan gaya sitasi: **{style}**.
-            {style_examples.get(style, '')}
+            {_STYLE_EXAMPLES.get(style, '')}
             - `is_format_correct` hanya mengecek URUTAN UTAMA (penulis → tahun → judul).
             - Variasi kecil gaya tanda baca / italic / huruf besar TIDAK mempengaruhi.
         """
-    
+
+
+def _analysis_rules_prompt(style_instruction, style, year, year_threshold, year_range):
     return f"""
         Anda adalah AI ahli analisis daftar pustaka. Jawab SEMUA feedback dalam BAHASA INDONESIA.
         {style_instruction}
@@ -292,15 +627,11 @@ def _construct_batch_gemini_prompt(references_list, style, year, year_threshold,
         - Jika tahun lama → "Tahun publikasi ({year}) lebih dari {year_range} tahun yang lalu."
         - JANGAN gunakan kata "INVALID" atau "TIDAK VALID"
         - JANGAN sertakan contoh format yang benar (sistem akan generate otomatis)
+"""
 
-        DAFTAR REFERENSI:
-        ---
-        {formatted_references}
-        ---
 
-        INSTRUKSI OUTPUT:
-        Kembalikan sebagai ARRAY JSON TUNGGAL dengan struktur berikut:
-        {{
+# Struktur object hasil analisis per referensi (dipakai prompt batch & single-pass)
+_ANALYSIS_RESULT_SCHEMA = """{
             "reference_number": <int>,
             "raw_reference_text": "<TEKS ASLI DENGAN LINE BREAKS SEPERTI DI INPUT, untuk matching PDF>",
             "full_reference": "<TEKS REFERENSI LENGKAP DIBERSIHKAN (tanpa line breaks berlebih)>",
@@ -311,6 +642,8 @@ def _construct_batch_gemini_prompt(references_list, style, year, year_threshold,
             "parsed_volume": "<string atau null jika tidak ada>",
             "parsed_issue": "<string atau null jika tidak ada>",
             "parsed_pages": "<string atau null jika tidak ada>",
+            "parsed_issn": "<ISSN/eISSN yang TERTULIS di referensi (format 1234-5678), atau null>",
+            "parsed_doi": "<DOI tanpa prefix https://doi.org/ (e.g., 10.1000/xyz123), atau null>",
             "reference_type": "journal/book/conference/website/other",
             "is_format_correct": <boolean>,
             "is_complete": <boolean>,
@@ -318,7 +651,7 @@ def _construct_batch_gemini_prompt(references_list, style, year, year_threshold,
             "is_scientific_source": <boolean>,
             "missing_elements": ["elemen_hilang"],
             "feedback": "<Saran perbaikan dalam BAHASA INDONESIA, atau 'OK' jika sempurna>"
-        }}
+        }
 
         PENTING: 
         - `raw_reference_text`: TEKS ASLI dengan line breaks PERSIS seperti di input (untuk matching PDF yang akurat)
@@ -328,8 +661,68 @@ def _construct_batch_gemini_prompt(references_list, style, year, year_threshold,
         - `parsed_volume`: Extract HANYA angka volume (e.g., "5", "156"), null jika tidak ada
         - `parsed_issue`: Extract HANYA angka issue/nomor (e.g., "3", "12"), null jika tidak ada
         - `parsed_pages`: Extract range halaman (e.g., "245-260", "1-15", "e12345"), null jika tidak ada
+        - `parsed_issn` & `parsed_doi`: HANYA jika tertulis di teks referensi, JANGAN menebak; null jika tidak ada
         - Contoh raw_reference_text: "Smith, J. (2020). Artificial Intelligence in\nEducation. Journal of Educational Technology, 15(2), 123-145."
         - Contoh full_reference: "Smith, J. (2020). Artificial Intelligence in Education. Journal of Educational Technology, 15(2), 123-145."
         - Contoh BENAR: "parsed_journal": "International Journal of Electronic Commerce", "parsed_volume": "2", "parsed_issue": "8", "parsed_pages": "8-22"
         - Contoh SALAH: "parsed_journal": "International Journal of Electronic Commerce, Vol. 2(8), 8-22."
-    """
+"""
+
+
+def _construct_batch_gemini_prompt(references_list, style, year, year_threshold, year_range, reference_numbers=None):
+    numbers = reference_numbers or range(1, len(references_list) + 1)
+    formatted_references = "\n".join([
+        f"{i}. {ref}" for i, ref in zip(numbers, references_list)
+    ])
+
+    rules = _analysis_rules_prompt(_style_instruction(style), style, year, year_threshold, year_range)
+    return f"""{rules}
+        DAFTAR REFERENSI:
+        ---
+        {formatted_references}
+        ---
+
+        INSTRUKSI OUTPUT:
+        Kembalikan sebagai ARRAY JSON TUNGGAL berisi tepat satu object per referensi,
+        dengan URUTAN YANG SAMA seperti daftar di atas (jangan melewati atau menggabungkan referensi).
+        Setiap object memiliki struktur berikut:
+        {_ANALYSIS_RESULT_SCHEMA}    """
+
+
+def _construct_single_pass_prompt(references_block, style, year, year_threshold, year_range):
+    if style.lower() == 'auto':
+        examples = "\n            ".join(_STYLE_EXAMPLES[name] for name in ('APA', 'Harvard', 'IEEE', 'MLA', 'Chicago'))
+        style_instruction = f"""
+            **GAYA SITASI: AUTO**
+            Tentukan dulu gaya sitasi yang PALING DOMINAN: APA, IEEE, MLA, Harvard, Chicago, atau Mixed jika campuran/tidak jelas.
+            {examples}
+            Lalu analisis setiap referensi berdasarkan gaya tersebut (jika Mixed, validasi berdasarkan STRUKTUR UMUM Penulis → Tahun → Judul → Sumber).
+            - `is_format_correct` hanya mengecek URUTAN UTAMA (penulis → tahun → judul).
+            - Variasi kecil gaya tanda baca / italic / huruf besar TIDAK mempengaruhi.
+        """
+        style_label = "yang terdeteksi"
+    else:
+        style_instruction = _style_instruction(style)
+        style_label = style
+
+    rules = _analysis_rules_prompt(style_instruction, style_label, year, year_threshold, year_range)
+    return f"""{rules}
+        PEMISAHAN REFERENSI:
+        Teks di bawah adalah hasil ekstraksi dokumen yang berantakan (satu referensi bisa terpotong menjadi beberapa baris).
+        - Gabungkan baris yang termasuk referensi yang sama. Satu referensi = satu object hasil.
+        - Abaikan judul bagian (mis. "Daftar Pustaka", "References"), nomor halaman, dan header/footer.
+        - Nomori referensi berurutan mulai 1 sesuai urutan di teks.
+
+        TEKS DAFTAR PUSTAKA:
+        ---
+        {references_block}
+        ---
+
+        INSTRUKSI OUTPUT:
+        Kembalikan HANYA SATU OBJECT JSON (tanpa teks lain) dengan struktur berikut:
+        {{
+            "detected_style": "<APA, IEEE, MLA, Harvard, Chicago, atau Mixed>",
+            "references": [<object per referensi, urut sesuai teks>]
+        }}
+        Setiap object di "references" memiliki struktur:
+        {_ANALYSIS_RESULT_SCHEMA}    """
@@ -0,0 +1,43 @@
+import hashlib
+import re
+from app.services.sqlite_cache import SQLiteLRUCache
+
+# Naikkan jika prompt analisis berubah → entri lama otomatis tidak terpakai
+ANALYSIS_CACHE_VERSION = 1
+
+
+def normalize_reference_text(text):
+    """Spasi/line break berlebih tidak mengubah isi referensi."""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def reference_cache_key(reference_text, style, year_threshold):
+    """Key konten: hash teks referensi ternormalisasi + gaya sitasi + ambang tahun."""
+    payload = '\x1f'.join([
+        str(ANALYSIS_CACHE_VERSION), style, str(year_threshold), normalize_reference_text(reference_text)
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def style_detection_cache_key(sample_references):
+    """Key hasil deteksi gaya sitasi (mode Auto): hash sample referensi ternormalisasi."""
+    payload = '\x1f'.join([
+        str(ANALYSIS_CACHE_VERSION), 'style-detection', *map(normalize_reference_text, sample_references)
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReferenceAnalysisCache(SQLiteLRUCache):
+    """
+    Cache hasil analisis AI per referensi di SQLite (persisten antar restart).
+    Key = reference_cache_key, value = object hasil AI untuk referensi itu
+    (tanpa nomor referensi). Entri yang paling lama tidak dipakai dibuang
+    jika melebihi `max_entries`.
+    """
+
+    table = 'reference_analysis'
+    key_column = 'cache_key'
+    label = 'Reference analysis'
+
+    def __init__(self, path, max_entries=20000):
+        super().__init__(path, max_entries)
@@ -144,6 +144,12 @@ def generate_bibtex(
                 bibtex_lines.append(f"  pages = {{MISSING}},")
                 is_partial = True
         
+        # Identifier opsional (tidak pernah MISSING)
+        if reference_data.get('parsed_issn') and bibtex_type == 'article':
+            bibtex_lines.append(f"  issn = {{{reference_data['parsed_issn']}}},")
+        if reference_data.get('parsed_doi'):
+            bibtex_lines.append(f"  doi = {{{reference_data['parsed_doi']}}},")
+        
         # Remove trailing comma dari line terakhir
         if bibtex_lines[-1].endswith(','):
             bibtex_lines[-1] = bibtex_lines[-1][:-1]
@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from config import Config
+from app.services.catalog_registry import CATALOG_REGISTRY
+from app.services.journal_catalog import installed_catalog_years
+
+logger = logging.getLogger(__name__)
+
+# Gate kesiapan katalog: di-set setelah Scimago, Scopus dan index matching siap
+CATALOG_READY = threading.Event()
+
+# Status loader untuk monitoring ('idle' → 'loading' → 'ready' / 'failed')
+CATALOG_LOAD_STATE = {
+    'status': 'idle',
+    'error': None,
+    'load_seconds': None
+}
+
+_loader_lock = threading.Lock()
+_loader_thread = None
+
+
+def _load_catalogs():
+    started = time.perf_counter()
+    try:
+        # Katalog tahun default (data + index) dibangun penuh sebelum gate dibuka
+        if CATALOG_REGISTRY.load_default():
+            CATALOG_LOAD_STATE['status'] = 'ready'
+            logger.info(f"✅ Journal catalogs ready in background ({time.perf_counter() - started:.1f}s)")
+        else:
+            CATALOG_LOAD_STATE['status'] = 'failed'
+        # Pantau perubahan CSV; katalog baru di-swap tanpa restart
+        CATALOG_REGISTRY.start_watching()
+    except Exception as e:
+        CATALOG_LOAD_STATE['status'] = 'failed'
+        CATALOG_LOAD_STATE['error'] = str(e)
+        logger.error(f"❌ Background catalog loading failed: {e}", exc_info=True)
+    finally:
+        CATALOG_LOAD_STATE['load_seconds'] = time.perf_counter() - started
+        # Tetap buka gate walau gagal supaya request tidak menunggu sampai timeout
+        CATALOG_READY.set()
+
+
+def start_catalog_loading():
+    """Mulai load katalog di thread background (idempotent)."""
+    global _loader_thread
+    with _loader_lock:
+        if _loader_thread is not None:
+            return _loader_thread
+
+        CATALOG_LOAD_STATE['status'] = 'loading'
+        _loader_thread = threading.Thread(target=_load_catalogs, name='catalog-loader', daemon=True)
+        _loader_thread.start()
+        logger.info("📥 Journal catalogs loading in background...")
+        return _loader_thread
+
+
+def is_catalog_ready(catalog_year=None):
+    if catalog_year is not None:
+        return catalog_year in installed_catalog_years()
+    return CATALOG_READY.is_set()
+
+
+def available_catalog_years():
+    """Tahun katalog yang bisa di-pin (ada file CSV-nya)."""
+    return CATALOG_REGISTRY.available_years()
+
+
+def wait_for_catalog(timeout=None, catalog_year=None):
+    """
+    Tunggu sampai katalog siap (dipanggil hanya saat tahap matching).
+    Jika `catalog_year` di-pin dan belum terpasang, katalog tahun itu dimuat
+    dulu. Return False jika timeout habis sebelum katalog siap.
+    """
+    if timeout is None:
+        timeout = Config.CATALOG_LOAD_TIMEOUT
+    deadline = time.monotonic() + timeout
+
+    if not CATALOG_READY.is_set():
+        # Pemanggil tanpa server (script/CLI) tetap bisa memakai katalog
+        start_catalog_loading()
+        if not CATALOG_READY.wait(timeout):
+            logger.warning(f"⚠️ Journal catalog not ready after {timeout}s")
+            return False
+
+    if catalog_year is None:
+        return True
+    if catalog_year in installed_catalog_years():
+        # Tandai dipakai → tahun yang sering di-pin tidak di-evict duluan
+        return CATALOG_REGISTRY.ensure_year(catalog_year)
+
+    loader = threading.Thread(
+        target=CATALOG_REGISTRY.ensure_year, args=(catalog_year,),
+        name=f'catalog-loader-{catalog_year}', daemon=True
+    )
+    loader.start()
+    loader.join(max(0, deadline - time.monotonic()))
+    ready = catalog_year in installed_catalog_years()
+    if not ready:
+        logger.warning(f"⚠️ Journal catalog {catalog_year} not ready after {timeout}s")
+    return ready
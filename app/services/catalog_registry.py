@@ -0,0 +1,265 @@
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from config import Config
+from app.services.catalog_store import CATALOG_SUFFIX, source_fingerprint
+from app.services.scimago_service import read_scimago_data, set_scimago_data
+from app.services.scopus_service import read_scopus_data, set_scopus_data
+from app.services.journal_catalog import (
+    catalog_version,
+    create_catalog,
+    load_catalog_index,
+    install_catalog,
+    uninstall_catalog,
+    get_catalog,
+    installed_catalog_years,
+    default_catalog_year
+)
+
+logger = logging.getLogger(__name__)
+
+_SCIMAGO_FILE_PATTERN = re.compile(r'^scimagojr (\d{4})\.csv$', re.IGNORECASE)
+_SCOPUS_FILE_PATTERN = re.compile(r'^scopus (\d{4})\.csv$', re.IGNORECASE)
+
+
+def _files_by_year(data_dir, pattern):
+    files = {}
+    for path in Path(data_dir).glob('*.csv'):
+        match = pattern.match(path.name)
+        if match:
+            files[int(match.group(1))] = path
+    return files
+
+
+def discover_datasets(data_dir=None):
+    """
+    Cari dataset per tahun di folder data. Tahun katalog = tahun file Scimago
+    (kuartil SJR berlaku per tahun). Scopus dipasangkan dengan file terbaru
+    yang tahunnya <= tahun Scimago + 1 (source list Scopus terbit setahun
+    lebih maju, mis. scimagojr 2024 + scopus 2025), atau file tertua.
+    Return dict tahun → {'scimago': Path, 'scopus': Path | None}.
+    """
+    data_dir = Path(data_dir or Config.CATALOG_DATA_DIR)
+    scimago_files = _files_by_year(data_dir, _SCIMAGO_FILE_PATTERN)
+    scopus_files = _files_by_year(data_dir, _SCOPUS_FILE_PATTERN)
+
+    # Fallback ke path di Config jika nama file tidak mengikuti pola
+    if not scimago_files and Path(Config.SCIMAGO_FILE_PATH).exists():
+        match = re.search(r'(\d{4})', Path(Config.SCIMAGO_FILE_PATH).name)
+        scimago_files[int(match.group(1)) if match else 0] = Path(Config.SCIMAGO_FILE_PATH)
+    if not scopus_files and Path(Config.SCOPUS_FILE_PATH).exists():
+        match = re.search(r'(\d{4})', Path(Config.SCOPUS_FILE_PATH).name)
+        scopus_files[int(match.group(1)) if match else 0] = Path(Config.SCOPUS_FILE_PATH)
+
+    datasets = {}
+    for year, scimago_file in scimago_files.items():
+        candidates = [scopus_year for scopus_year in scopus_files if scopus_year <= year + 1]
+        if candidates:
+            scopus_file = scopus_files[max(candidates)]
+        else:
+            scopus_file = scopus_files[min(scopus_files)] if scopus_files else None
+        datasets[year] = {'scimago': scimago_file, 'scopus': scopus_file}
+    return datasets
+
+
+class CatalogRegistry:
+    """
+    Registry katalog per tahun. Katalog baru dibangun lengkap (data + index)
+    di thread pemanggil/watcher lalu dipasang dengan install_catalog (swap
+    atomik), jadi lookup yang sedang berjalan tetap memakai versi lama.
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = Path(data_dir or Config.CATALOG_DATA_DIR)
+        self._build_lock = threading.Lock()
+        self._loaded = {}  # tahun → fingerprint file yang sedang terpasang
+        self._loaded_sources = {}  # tahun → sumber yang berhasil dimuat di versi terpasang
+        self._last_used = {}  # tahun → waktu terakhir dipakai (evict LRU tahun yang di-pin)
+        self._stop_event = threading.Event()
+        self._watch_thread = None
+
+    def available_years(self):
+        return sorted(discover_datasets(self.data_dir))
+
+    def _choose_default_year(self, datasets):
+        if Config.CATALOG_DEFAULT_YEAR in datasets:
+            return Config.CATALOG_DEFAULT_YEAR
+        return max(datasets) if datasets else None
+
+    @staticmethod
+    def _fingerprint(dataset):
+        return tuple(
+            source_fingerprint(dataset[source]) if dataset[source] else None
+            for source in ('scimago', 'scopus')
+        )
+
+    def load_year(self, year, make_default=False, datasets=None):
+        """Bangun katalog satu tahun lalu pasang secara atomik. Return True jika terpasang."""
+        datasets = datasets if datasets is not None else discover_datasets(self.data_dir)
+        dataset = datasets.get(year)
+        if dataset is None:
+            logger.error(f"❌ No catalog dataset found for year {year}")
+            return False
+
+        with self._build_lock:
+            fingerprint = self._fingerprint(dataset)
+            if self._loaded.get(year) == fingerprint:
+                if make_default and default_catalog_year() != year:
+                    install_catalog(year, get_catalog(year), make_default=True)
+                return True
+
+            started = time.perf_counter()
+            version = catalog_version({
+                source: source_fp for source, source_fp in zip(('scimago', 'scopus'), fingerprint) if source_fp
+            })
+            # File index lengkap (data + semua index matching) → dibuka dengan mmap
+            # tanpa decode/rebuild, halaman memori dibagi antar worker
+            catalog = load_catalog_index(self._index_path(year, version))
+            if catalog is not None:
+                source_data = catalog.source_data
+            else:
+                built = self._build_catalog(year, dataset, fingerprint)
+                if built is None:
+                    return False
+                catalog, source_data = built
+
+            # CSV yang masih disalin/rusak gagal dibaca → jangan timpa versi terpasang
+            # dengan katalog yang kehilangan sumber; fingerprint tidak dicatat supaya
+            # watcher mencoba lagi di tick berikutnya
+            sources = set(source_data)
+            lost_sources = self._loaded_sources.get(year, set()) - sources
+            if lost_sources:
+                logger.warning(
+                    f"⚠️ Catalog {year} reload skipped: {', '.join(sorted(lost_sources))} failed to load, "
+                    f"keeping installed version"
+                )
+                return False
+
+            # Katalog default juga mengisi SCIMAGO_DATA / SCOPUS_DATA (kompatibilitas)
+            is_default = make_default or default_catalog_year() in (None, year)
+            previous = install_catalog(year, catalog, make_default=make_default)
+            if is_default:
+                if 'scimago' in source_data:
+                    set_scimago_data(source_data['scimago'])
+                if 'scopus' in source_data:
+                    set_scopus_data(source_data['scopus'])
+            self._loaded[year] = fingerprint
+            self._loaded_sources[year] = sources
+            self._last_used[year] = time.monotonic()
+            self._remove_stale_index_files(year, catalog.version)
+            self._evict_pinned_years()
+            action = "reloaded" if previous is not None else "installed"
+            logger.info(f"🔄 Catalog {year} {action} in {time.perf_counter() - started:.1f}s (version {catalog.version})")
+            return True
+
+    def _index_path(self, year, version):
+        # Versi di nama file: file lama yang masih di-mmap worker lain tidak ditimpa
+        return self.data_dir / f"journals {year} {version}{CATALOG_SUFFIX}"
+
+    def _build_catalog(self, year, dataset, fingerprint):
+        """
+        Bangun katalog dari file sumber lalu simpan sebagai file index.
+        Return (katalog, data per sumber) atau None jika tidak ada sumber.
+        """
+        scimago = read_scimago_data(dataset['scimago'])
+        scopus = read_scopus_data(dataset['scopus']) if dataset['scopus'] else None
+        if scimago is None and scopus is None:
+            logger.error(f"❌ Catalog {year} could not be loaded")
+            return None
+
+        catalog = create_catalog()
+        source_data = {}
+        for source, data, source_fp in (('scimago', scimago, fingerprint[0]), ('scopus', scopus, fingerprint[1])):
+            if data is not None:
+                catalog.add_source(source, data['by_cleaned_title'], source_fp, data.get('by_issn'))
+                source_data[source] = data
+        # Index selesai dibangun SEBELUM dipasang → request tidak pernah menunggu build
+        catalog.build_indexes()
+
+        index_path = self._index_path(year, catalog.version)
+        try:
+            catalog.save_index_file(index_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save catalog index file {index_path.name}: {e}")
+            return catalog, source_data
+        # Pakai versi mmap juga untuk build pertama → memori heap hasil build bisa dilepas
+        indexed = load_catalog_index(index_path)
+        if indexed is None:
+            return catalog, source_data
+        return indexed, indexed.source_data
+
+    def _evict_pinned_years(self):
+        """Lepas tahun non-default yang paling lama tidak dipakai jika melebihi Config.CATALOG_MAX_PINNED_YEARS."""
+        default_year = default_catalog_year()
+        pinned = [year for year in installed_catalog_years() if year != default_year]
+        pinned.sort(key=lambda year: self._last_used.get(year, 0))
+        for year in pinned[:max(0, len(pinned) - max(1, Config.CATALOG_MAX_PINNED_YEARS))]:
+            if uninstall_catalog(year) is not None:
+                # Tidak dicatat lagi → watcher tidak me-rebuild; dimuat ulang saat di-pin lagi
+                self._loaded.pop(year, None)
+                self._loaded_sources.pop(year, None)
+                self._last_used.pop(year, None)
+                logger.info(f"♻️ Catalog {year} unloaded (least recently used pinned year)")
+
+    def _remove_stale_index_files(self, year, version):
+        current = self._index_path(year, version).name
+        for path in self.data_dir.glob(f"journals {year} *{CATALOG_SUFFIX}"):
+            if path.name != current:
+                try:
+                    path.unlink()
+                except OSError:
+                    # Windows: file masih di-mmap proses lain → coba lagi di reload berikutnya
+                    pass
+
+    def load_default(self):
+        datasets = discover_datasets(self.data_dir)
+        year = self._choose_default_year(datasets)
+        if year is None:
+            logger.error(f"❌ No Scimago/Scopus CSV found in {self.data_dir}")
+            return False
+        return self.load_year(year, make_default=True, datasets=datasets)
+
+    def ensure_year(self, year):
+        """Pastikan katalog tahun `year` terpasang (untuk request yang mem-pin tahun)."""
+        if year in installed_catalog_years():
+            self._last_used[year] = time.monotonic()
+            return True
+        return self.load_year(year)
+
+    def check_for_updates(self):
+        """Rebuild katalog yang CSV-nya berubah dan pindah default ke tahun terbaru."""
+        datasets = discover_datasets(self.data_dir)
+        for year, fingerprint in list(self._loaded.items()):
+            dataset = datasets.get(year)
+            # CSV dihapus → tetap layani versi yang sudah terpasang
+            if dataset is not None and self._fingerprint(dataset) != fingerprint:
+                logger.info(f"🔄 Catalog {year} changed on disk, rebuilding in background...")
+                self.load_year(year, datasets=datasets)
+
+        default_year = self._choose_default_year(datasets)
+        if default_year is not None and default_year != default_catalog_year():
+            logger.info(f"🔄 New default catalog year {default_year} found")
+            self.load_year(default_year, make_default=True, datasets=datasets)
+
+    def start_watching(self, interval=None):
+        interval = Config.CATALOG_WATCH_INTERVAL if interval is None else interval
+        if interval <= 0 or self._watch_thread is not None:
+            return
+
+        def watch():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    logger.error(f"❌ Catalog update check failed: {e}", exc_info=True)
+
+        self._watch_thread = threading.Thread(target=watch, name='catalog-watcher', daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+
+
+CATALOG_REGISTRY = CatalogRegistry()
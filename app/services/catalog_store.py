@@ -0,0 +1,493 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Format file katalog biner (di-mmap, read-only):
+#   MAGIC | panjang header (uint32) | header JSON | section array (align 8)
+# Section: string table (offset + blob UTF-8), record fixed-width (int64),
+# per tabel key: urutan insert, urutan terurut, CSR key → record; opsional
+# list string (offset + blob + hash table posisi) dan array numpy mentah
+# (mis. index matching yang sudah dibangun).
+CATALOG_MAGIC = b"RVCAT\x00\x01\x00"
+CATALOG_SUFFIX = ".catalog"
+_ALIGN = 8
+
+
+class JournalRecord(Mapping):
+    """
+    Record jurnal ringkas (__slots__, tanpa __dict__ per record). Tetap bisa
+    diakses seperti dict: info['id'], info.get('quartile'), dict(info).
+    """
+
+    __slots__ = ('id', 'title', 'quartile', 'type', 'status', 'publisher')
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __iter__(self):
+        return (field for field in self.__slots__ if hasattr(self, field))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"JournalRecord({dict(self)!r})"
+
+
+def is_catalog_fresh(catalog_file, csv_file):
+    """File katalog valid jika lebih baru dari CSV sumbernya (sama seperti cek pickle lama)."""
+    catalog_file, csv_file = Path(catalog_file), Path(csv_file)
+    if not catalog_file.exists():
+        return False
+    if not csv_file.exists():
+        return True
+    return catalog_file.stat().st_mtime > csv_file.stat().st_mtime
+
+
+def source_fingerprint(csv_file):
+    """Identitas file sumber (nama, ukuran, mtime) untuk versi katalog."""
+    csv_file = Path(csv_file)
+    try:
+        stat = csv_file.stat()
+    except OSError:
+        return None
+    return f"{csv_file.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _string_hash(data):
+    return zlib.crc32(data)
+
+
+def _string_list_sections(name, texts):
+    """Section list string: offset + blob UTF-8 + hash table (linear probing) string → posisi."""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    # Load factor <= 0.5 → rata-rata probe tetap ~1
+    size = 1 << max(3, (2 * len(encoded)).bit_length())
+    mask = size - 1
+    slots = [-1] * size
+    for position, data in enumerate(encoded):
+        slot = _string_hash(data) & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = position
+    return {
+        f"{name}.offsets": offsets,
+        f"{name}.blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        f"{name}.slots": np.asarray(slots, dtype=np.int32)
+    }
+
+
+def write_catalog_file(path, tables, string_lists=None, arrays=None, meta=None):
+    """
+    Tulis `tables` ({nama: {key: info | [info, ...]}}) ke file katalog biner.
+    Record (dict info) yang sama dipakai beberapa tabel hanya disimpan sekali;
+    record dikelompokkan per susunan field (mis. Scimago vs Scopus di file
+    index gabungan), masing-masing dengan skemanya sendiri.
+    `string_lists` ({nama: [str, ...]}), `arrays` ({nama: ndarray}) dan `meta`
+    (dict JSON) ikut disimpan apa adanya untuk dibaca lewat CatalogFile.
+    """
+    strings = {}
+    groups = {}  # susunan field → [info, ...]
+    record_ids = {}
+
+    def string_id(text):
+        return strings.setdefault(text, len(strings))
+
+    def record_id(info):
+        key = id(info)
+        if key not in record_ids:
+            group = groups.setdefault(tuple(info), [])
+            record_ids[key] = (tuple(info), len(group))
+            group.append(info)
+        return record_ids[key]
+
+    table_rows = {}
+    for name, table in tables.items():
+        rows = []
+        for key, value in table.items():
+            infos = value if isinstance(value, list) else [value]
+            rows.append((string_id(key), [record_id(info) for info in infos]))
+        table_rows[name] = rows
+
+    # Id record global: record satu grup berurutan mulai dari `start` grupnya
+    sections = {}
+    schemas = []
+    starts = {}
+    for group_index, (fields, records) in enumerate(groups.items()):
+        starts[fields] = sum(len(group) for group in list(groups.values())[:group_index])
+        # Skema record: field int disimpan langsung, field lain sebagai id string
+        kinds = []
+        for field in fields:
+            values = [info.get(field) for info in records]
+            is_int = all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values)
+            kinds.append("i" if is_int else "s")
+
+        record_array = np.zeros((len(records), len(fields)), dtype=np.int64)
+        for row, info in enumerate(records):
+            for col, (field, kind) in enumerate(zip(fields, kinds)):
+                value = info.get(field)
+                if kind == "i":
+                    record_array[row, col] = int(value)
+                else:
+                    record_array[row, col] = -1 if value is None else string_id(str(value))
+        sections[f"records.{group_index}"] = record_array
+        schemas.append({"fields": list(fields), "kinds": kinds, "start": starts[fields]})
+
+    for name, rows in table_rows.items():
+        key_ids = np.asarray([sid for sid, _ in rows], dtype=np.int64)
+        sizes = np.asarray([len(rids) for _, rids in rows], dtype=np.int64)
+        key_texts = list(strings)
+        sections[f"{name}.keys"] = key_ids
+        sections[f"{name}.sorted"] = np.asarray(
+            sorted(range(len(rows)), key=lambda pos: key_texts[key_ids[pos]]), dtype=np.int32
+        )
+        sections[f"{name}.indptr"] = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        sections[f"{name}.records"] = np.asarray(
+            [starts[fields] + local for _, rids in rows for fields, local in rids], dtype=np.int32
+        )
+
+    encoded = [text.encode("utf-8") for text in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    string_offsets[1:] = np.cumsum([len(b) for b in encoded])
+    sections["strings.offsets"] = string_offsets
+    sections["strings.blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    for name, texts in (string_lists or {}).items():
+        sections.update(_string_list_sections(name, texts))
+    for name, array in (arrays or {}).items():
+        sections[name] = np.ascontiguousarray(array)
+
+    header = {
+        "schemas": schemas,
+        "tables": list(tables),
+        "string_lists": list(string_lists or {}),
+        "meta": meta or {},
+        "sections": {}
+    }
+    # Offset section dihitung relatif terhadap awal area data
+    offset = 0
+    for name, array in sections.items():
+        header["sections"][name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape)
+        }
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix_len = len(CATALOG_MAGIC) + 4 + len(header_bytes)
+    padding = -prefix_len % _ALIGN
+
+    # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(CATALOG_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes) + padding))
+        f.write(header_bytes + b" " * padding)
+        for array in sections.values():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\x00" * (-len(data) % _ALIGN))
+    os.replace(tmp_path, path)
+
+
+class CatalogFile:
+    """File katalog biner yang dibuka dengan mmap; record di-decode saat diakses."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(CATALOG_MAGIC)] != CATALOG_MAGIC:
+            raise ValueError(f"{self.path.name} is not a catalog file")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(CATALOG_MAGIC))
+        header_start = len(CATALOG_MAGIC) + 4
+        header = json.loads(self._mm[header_start:header_start + header_len])
+        data_start = header_start + header_len
+
+        self.meta = header.get("meta", {})
+        self._section_starts = {}
+        self._arrays = {}
+        for name, spec in header["sections"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            self._section_starts[name] = data_start + spec["offset"]
+            self._arrays[name] = np.frombuffer(
+                self._mm, dtype=dtype, count=int(np.prod(shape)), offset=data_start + spec["offset"]
+            ).reshape(shape)
+
+        self._string_offsets = memoryview(self._arrays["strings.offsets"])
+        self._blob_start = self._section_starts["strings.blob"]
+        if "schemas" in header:
+            self._schemas = [
+                (schema["start"], schema["fields"], schema["kinds"], _flat_rows(self._arrays[f"records.{index}"]))
+                for index, schema in enumerate(header["schemas"])
+            ]
+        else:
+            # File versi lama: satu skema untuk semua record
+            self._schemas = [(0, header["fields"], header["kinds"], _flat_rows(self._arrays["records"]))]
+        self._schema_starts = [start for start, _, _, _ in self._schemas]
+        self._record_cache = {}
+        self.tables = {name: CatalogTable(self, name) for name in header["tables"]}
+        self.string_lists = {name: StringList(self, name) for name in header.get("string_lists", [])}
+
+    def string(self, string_id):
+        offsets = self._string_offsets
+        start = self._blob_start + offsets[string_id]
+        end = self._blob_start + offsets[string_id + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def record(self, record_id):
+        # Cache per record agar tabel berbeda berbagi record yang sama (seperti pickle)
+        info = self._record_cache.get(record_id)
+        if info is None:
+            start, schema_fields, kinds, records = self._schemas[bisect_right(self._schema_starts, record_id) - 1]
+            fields = {}
+            row = (record_id - start) * len(schema_fields)
+            for field, kind, value in zip(schema_fields, kinds, records[row:row + len(schema_fields)]):
+                if kind == "i":
+                    fields[field] = value
+                else:
+                    fields[field] = None if value < 0 else self.string(value)
+            info = self._record_cache[record_id] = JournalRecord(**fields)
+        return info
+
+    def array(self, name):
+        return self._arrays[name]
+
+    def has_array(self, name):
+        return name in self._arrays
+
+
+def _flat_rows(array):
+    # memoryview 1-D: slice per baris tanpa membuat array numpy per record
+    return memoryview(array.reshape(-1))
+
+
+class StringList(Sequence):
+    """
+    List string read-only di atas CatalogFile (decode saat diakses).
+    `positions` memetakan string → posisi lewat hash table di file, jadi
+    bisa dipakai seperti dict kata → id tanpa membangun dict di heap.
+    """
+
+    def __init__(self, catalog_file, name):
+        self._mm = catalog_file._mm
+        self._blob_start = catalog_file._section_starts[f"{name}.blob"]
+        # memoryview → indexing menghasilkan int Python (lebih cepat dari scalar numpy)
+        self._offsets = memoryview(catalog_file.array(f"{name}.offsets"))
+        self._slots = memoryview(catalog_file.array(f"{name}.slots"))
+        self._mask = len(self._slots) - 1
+        self._length = len(self._offsets) - 1
+        self.positions = StringPositions(self)
+
+    def _bytes(self, position):
+        return self._mm[self._blob_start + self._offsets[position]:self._blob_start + self._offsets[position + 1]]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._bytes(index).decode("utf-8")
+
+    def position(self, text):
+        """Posisi `text` di list, atau -1."""
+        try:
+            data = text.encode("utf-8")
+        except (AttributeError, UnicodeEncodeError):
+            return -1
+        slots = self._slots
+        mask = self._mask
+        slot = _string_hash(data) & mask
+        while True:
+            position = slots[slot]
+            if position < 0:
+                return -1
+            if self._bytes(position) == data:
+                return position
+            slot = (slot + 1) & mask
+
+
+class StringPositions(Mapping):
+    """View dict string → posisi untuk StringList (pengganti dict kata → id)."""
+
+    def __init__(self, strings):
+        self._strings = strings
+
+    def __getitem__(self, text):
+        position = self._strings.position(text)
+        if position < 0:
+            raise KeyError(text)
+        return position
+
+    def get(self, text, default=None):
+        position = self._strings.position(text)
+        return default if position < 0 else position
+
+    def __contains__(self, text):
+        return self._strings.position(text) >= 0
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __iter__(self):
+        return iter(self._strings)
+
+
+class SortedStringView(Sequence):
+    """View terurut sebuah StringList menurut array posisi `order` (untuk bisect prefix)."""
+
+    def __init__(self, strings, order):
+        self._strings = strings
+        self._order = memoryview(order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._strings[position] for position in self._order[index]]
+        return self._strings[self._order[index]]
+
+
+class StringGroups(Mapping):
+    """
+    View dict string → tuple int di atas StringList + CSR (`indptr`, `values`),
+    mis. varian kata → token id kata asli.
+    """
+
+    def __init__(self, strings, indptr, values):
+        self._strings = strings
+        self._indptr = memoryview(indptr)
+        self._values = memoryview(values)
+
+    def get(self, text, default=None):
+        position = self._strings.position(text)
+        if position < 0:
+            return default
+        return tuple(self._values[self._indptr[position]:self._indptr[position + 1]])
+
+    def __getitem__(self, text):
+        found = self.get(text)
+        if found is None:
+            raise KeyError(text)
+        return found
+
+    def __contains__(self, text):
+        return self._strings.position(text) >= 0
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __iter__(self):
+        return iter(self._strings)
+
+
+class CatalogTable(Mapping):
+    """
+    Tabel key → info read-only di atas CatalogFile. Lookup memakai binary
+    search di array key terurut; iterasi mengikuti urutan insert asli.
+    """
+
+    def __init__(self, catalog_file, name):
+        self._file = catalog_file
+        # memoryview → indexing menghasilkan int Python (lebih cepat dari scalar numpy)
+        self._keys = memoryview(catalog_file.array(f"{name}.keys"))
+        self._sorted = memoryview(catalog_file.array(f"{name}.sorted"))
+        self._indptr = memoryview(catalog_file.array(f"{name}.indptr"))
+        self._record_ids = memoryview(catalog_file.array(f"{name}.records"))
+        self._sorted_view = _SortedKeys(self)
+
+    def _key(self, position):
+        return self._file.string(self._keys[position])
+
+    def value_at(self, position):
+        start, end = self._indptr[position], self._indptr[position + 1]
+        infos = [self._file.record(rid) for rid in self._record_ids[start:end]]
+        return infos[0] if len(infos) == 1 else infos
+
+    def _find(self, key):
+        index = bisect_left(self._sorted_view, key)
+        if index < len(self._sorted):
+            position = self._sorted[index]
+            if self._key(position) == key:
+                return position
+        return -1
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            raise KeyError(key)
+        position = self._find(key)
+        if position < 0:
+            raise KeyError(key)
+        return self.value_at(position)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for position in range(len(self._keys)):
+            yield self._key(position)
+
+    def items(self):
+        # Iterasi penuh (mis. saat katalog gabungan dibangun): konversi array
+        # ke list sekali saja, bukan per elemen numpy
+        string = self._file.string
+        record = self._file.record
+        indptr = self._indptr.tolist()
+        record_ids = self._record_ids.tolist()
+        for position, key_id in enumerate(self._keys.tolist()):
+            start, end = indptr[position], indptr[position + 1]
+            if end - start == 1:
+                yield string(key_id), record(record_ids[start])
+            else:
+                yield string(key_id), [record(rid) for rid in record_ids[start:end]]
+
+
+class _SortedKeys:
+    """View key terurut untuk bisect (decode string hanya saat dibandingkan)."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table._sorted)
+
+    def __getitem__(self, index):
+        return self._table._key(int(self._table._sorted[index]))
+
+
+def open_catalog_file(path):
+    """Buka file katalog dan kembalikan dict {nama tabel: CatalogTable}."""
+    catalog = CatalogFile(path)
+    logger.debug(f"🗂️ Catalog file mapped: {catalog.path.name}")
+    return dict(catalog.tables)
@@ -0,0 +1,1294 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import difflib
+import threading
+import time
+from functools import lru_cache
+from itertools import chain
+from collections.abc import Mapping
+import numpy as np
+from config import Config
+from app.services.catalog_store import (
+    CatalogFile,
+    SortedStringView,
+    StringGroups,
+    write_catalog_file
+)
+from app.services.journal_index import (
+    build_token_index,
+    batch_word_match_ordinals,
+    batch_abbreviation_ordinals,
+    build_spelling_index,
+    build_tfidf_index,
+    tfidf_candidate_scores,
+    batch_tfidf_candidates,
+    rank_by_tfidf,
+    correct_word,
+    build_title_automaton,
+    scan_title_automaton,
+    build_ngram_index,
+    build_length_buckets,
+    find_length_candidates,
+    passes_quick_ratio
+)
+from app.services.search_metrics import CatalogMetrics, NULL_TRACER
+from app.services.match_cache import MatchCache
+from app.services.negative_filter import NegativeFilterStore
+
+logger = logging.getLogger(__name__)
+
+# Sumber database yang digabung dalam satu katalog (urutan = prioritas urutan judul)
+CATALOG_SOURCES = ('scimago', 'scopus')
+
+# Naikkan jika logika matching berubah → hasil di cache persisten otomatis tidak dipakai
+MATCHER_VERSION = 4
+
+# Kata yang diabaikan saat membandingkan kata penting judul
+STOPWORDS = {'of', 'the', 'and', 'for', 'in', 'on', 'a', 'an', 'to'}
+
+# Common journal abbreviations mapping (dipakai bersama Scimago & Scopus)
+COMMON_ABBREVIATIONS = {
+    "j.": "journal",
+    "jrnl.": "journal",
+    "proc.": "proceedings",
+    "proceedings": "proceedings",
+    "trans.": "transactions",
+    "int.": "international",
+    "intl.": "international",
+    "comp.": "computing",
+    "comput.": "computing",
+    "computer": "computing",
+    "computation": "computing",
+    "computational": "computing",
+    "evol.": "evolutionary",
+    "intell.": "intelligence",
+    "sci.": "science",
+    "sciences": "science",
+    "tech.": "technology",
+    "technol.": "technology",
+    "softw.": "software",
+    "softw": "software",
+    "res.": "research",
+    "rev.": "review",
+    "lett.": "letters",
+    "bull.": "bulletin",
+    "ann.": "annals",
+    "eur.": "european",
+    "amer.": "american",
+    "acad.": "academy",
+    "soc.": "society",
+    "assoc.": "association",
+    "appl.": "applied",
+    "theor.": "theoretical",
+    "pract.": "practice",
+    "practice": "practice",
+    "exp.": "experience",
+    "experience": "experience",
+    "inf.": "information",
+    "information": "information",
+    "syst.": "systems",
+    "system": "systems",
+    "mach.": "machine",
+    "learn.": "learning",
+    "eng.": "engineering",
+    "med.": "medicine",
+    "phys.": "physics",
+    "chem.": "chemistry",
+    "biol.": "biology",
+    "math.": "mathematics",
+    "stat.": "statistics",
+    "educ.": "education",
+    "psych.": "psychology",
+    "geol.": "geology",
+    "astron.": "astronomy",
+    "econ.": "economics",
+    "mgmt.": "management",
+    "admin.": "administration"
+}
+
+# Suffix generik yang tidak membantu matching (hanya dibuang jika kata terakhir)
+GENERIC_SUFFIXES = ['journal', 'proceedings', 'magazine', 'bulletin', 'letters']
+
+# Normalisasi varian kata ke bentuk umum
+WORD_NORMALIZATIONS = {
+    'computation': 'computing',
+    'computational': 'computing',
+    'computer': 'computing',
+    'informatics': 'information',
+    'informatic': 'information',
+}
+
+
+def expand_abbreviations(text):
+    if not text:
+        return ""
+
+    words = text.lower().split()
+    expanded = []
+
+    for word in words:
+        # Try with and without trailing dot
+        word_clean = word.rstrip('.')
+        if word in COMMON_ABBREVIATIONS:
+            expanded.append(COMMON_ABBREVIATIONS[word])
+        elif word_clean in COMMON_ABBREVIATIONS:
+            expanded.append(COMMON_ABBREVIATIONS[word_clean])
+        else:
+            expanded.append(word)
+
+    return ' '.join(expanded)
+
+
+def clean_journal_title(title):
+    if not isinstance(title, str):
+        return ""
+
+    expanded = expand_abbreviations(title)
+
+    s = expanded.lower()
+
+    # Remove parenthetical content like "(Ny.)" before cleaning
+    s = re.sub(r'\([^)]*\)', '', s)
+
+    s = re.sub(r'[^a-z0-9]', ' ', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+
+    # Remove common generic suffixes that don't help matching
+    # (e.g., "Applied Soft Computing Journal" → "Applied Soft Computing")
+    words = s.split()
+
+    # Only remove if it's the last word and there are more than 2 words
+    if len(words) > 2 and words[-1] in GENERIC_SUFFIXES:
+        words = words[:-1]
+
+    # Normalize word variants to common form (for better matching)
+    return ' '.join(WORD_NORMALIZATIONS.get(word, word) for word in words)
+
+
+def _word_alternation(words):
+    # Kata terpanjang dulu agar alternation regex tidak berhenti di prefix
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# Versi regex dari expand_abbreviations: key bertitik harus sama persis,
+# key tanpa titik boleh diikuti titik berapa pun (seperti word.rstrip('.'))
+_ABBREVIATION_PATTERN = re.compile(
+    r'(?<!\S)(?:({dotted})|({plain})\.*)(?!\S)'.format(
+        dotted=_word_alternation(k for k in COMMON_ABBREVIATIONS if k.endswith('.')),
+        plain=_word_alternation(k for k in COMMON_ABBREVIATIONS if not k.endswith('.'))
+    )
+)
+_SUFFIX_PATTERN = re.compile(
+    r'^(\S+ \S+(?: \S+)*) (?:{})$'.format(_word_alternation(GENERIC_SUFFIXES))
+)
+_NORMALIZATION_PATTERN = re.compile(
+    r'\b(?:{})\b'.format(_word_alternation(WORD_NORMALIZATIONS))
+)
+
+
+def _expand_abbreviation_match(match):
+    return COMMON_ABBREVIATIONS[match.group(1) or match.group(2)]
+
+
+def clean_journal_titles(titles):
+    """
+    Versi vektor `clean_journal_title` untuk pandas Series (ingest CSV):
+    hasilnya identik per elemen, tapi dikerjakan per kolom dengan operasi
+    `.str` dan regex yang sudah di-compile, tanpa loop per baris.
+    """
+    s = titles.where(titles.map(type) == str, '').str.lower()
+    s = s.str.replace(_ABBREVIATION_PATTERN, _expand_abbreviation_match, regex=True)
+
+    s = s.str.replace(r'\([^)]*\)', '', regex=True)
+    s = s.str.replace(r'[^a-z0-9]', ' ', regex=True)
+    s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+    s = s.str.replace(_SUFFIX_PATTERN, r'\1', regex=True)
+    return s.str.replace(_NORMALIZATION_PATTERN, lambda m: WORD_NORMALIZATIONS[m.group(0)], regex=True)
+
+
+def normalize_reference_text(text):
+    """
+    Normalisasi teks referensi lengkap untuk scan judul: langkah yang sama
+    dengan clean_journal_title tapi tanpa membuang suffix generik (teks
+    bukan satu judul). Return list kata.
+    """
+    if not isinstance(text, str):
+        return []
+    s = expand_abbreviations(text)
+    s = re.sub(r'\([^)]*\)', ' ', s)
+    s = re.sub(r'[^a-z0-9]', ' ', s)
+    return [WORD_NORMALIZATIONS.get(word, word) for word in s.split()]
+
+
+# ISSN 8 karakter (digit terakhir boleh X), dengan atau tanpa tanda hubung
+_ISSN_PATTERN = re.compile(r'(?<![\dX])(\d{4})-?(\d{3}[\dX])(?![\dX])')
+
+
+def parse_issns(value):
+    """
+    Ambil ISSN dari string atau list (mis. "1542-4863, 0007-9235").
+    Return list ISSN ternormalisasi tanpa tanda hubung, mis. ['15424863', '00079235'].
+    """
+    if not value:
+        return []
+    if not isinstance(value, str):
+        value = ' '.join(str(item) for item in value if item)
+    return list(dict.fromkeys(a + b for a, b in _ISSN_PATTERN.findall(value.upper())))
+
+
+def issn_trace_key(issns):
+    return 'issn:' + ','.join(issns)
+
+
+def select_best_match_from_list(matches):
+    if isinstance(matches, list):
+        if len(matches) == 1:
+            return matches[0]
+        # Jika ada multiple, log warning dan return yang pertama
+        titles = [m.get('title', 'Unknown') for m in matches]
+        logger.debug(f"⚠️ Multiple matches found: {titles}")
+        logger.debug(f"   Returning first match: {matches[0].get('title')}")
+        return matches[0]
+    else:
+        return matches
+
+
+def _is_word_match(query_words, query_words_list, important_query_words, db_words_list, stopwords=STOPWORDS):
+    """
+    Validasi Layer 2 (exact word match) untuk satu judul database.
+    Kata boleh berupa string atau token id (`db_words_list` = token judul).
+    """
+    db_words = set(db_words_list)
+    important_db_words = db_words - stopwords
+
+    # VALIDASI CRITICAL #1: Semua kata penting dari query HARUS ada di database
+    if not important_query_words.issubset(important_db_words):
+        return False
+
+    # VALIDASI CRITICAL #2: Query tidak boleh lebih panjang dari database title
+    if len(query_words) > len(db_words):
+        return False
+
+    # VALIDASI CRITICAL #3: Minimal 80% kata penting dari DATABASE harus ada di QUERY
+    # Ini mencegah "World Health Organization" match ke "Bulletin of the World Health Organization"
+    important_overlap = len(important_query_words & important_db_words)
+    important_db_count = len(important_db_words)
+
+    if important_db_count > 0:
+        coverage_ratio = important_overlap / important_db_count
+        if len(important_query_words) < len(important_db_words) and coverage_ratio < 0.80:
+            return False
+
+    # VALIDASI: Posisi kata query di judul database harus monoton increasing
+    positions = []
+    for qword in query_words_list:
+        if qword not in db_words_list:
+            return False
+        positions.append(db_words_list.index(qword))
+
+    return positions == sorted(positions)
+
+
+def _is_abbreviation_match(query_words_list, abbreviated_words, db_words_list, vocabulary, stopwords=STOPWORDS):
+    """
+    Judul singkatan gaya ISO4 ("IEEE Trans. Pattern Anal. Mach. Intell."):
+    kata penting query & judul harus sama jumlah dan urutannya, kata singkatan
+    cukup menjadi prefix kata judul, kata lain harus sama persis.
+    `vocabulary` memetakan token judul ke string katanya.
+    """
+    query_important = [word for word in query_words_list if word not in stopwords]
+    title_important = [word for word in db_words_list if word not in stopwords]
+    if len(query_important) != len(title_important):
+        return False
+    return all(
+        query_word == title_word
+        or (query_word in abbreviated_words and vocabulary[title_word].startswith(query_word))
+        for query_word, title_word in zip(query_important, title_important)
+    )
+
+
+def _passes_fuzzy_guards(query_words, query_words_list, db_words_list, seq_ratio, stopwords=STOPWORDS):
+    """Guard Layer 3 (overlap kata, kata penting berbeda, urutan kata)."""
+    db_words = set(db_words_list)
+
+    common_words = query_words.intersection(db_words)
+    overlap_ratio = len(common_words) / len(query_words) if query_words else 0
+    if overlap_ratio < 0.85:
+        return False  # Overlap terlalu rendah
+
+    # VALIDASI CRITICAL: Cek apakah ada kata penting yang BERBEDA
+    # Mencegah "information" match ke "food" meskipun similarity tinggi
+    missing_important = (query_words - stopwords) - (db_words - stopwords)
+    if missing_important and seq_ratio < 0.95:
+        return False  # Bukan typo, ada kata yang memang berbeda
+
+    positions = [db_words_list.index(qword) for qword in query_words_list if qword in db_words_list]
+    if len(positions) >= 2 and positions != sorted(positions):
+        return False
+
+    return True
+
+
+def catalog_version(source_fingerprints):
+    """Versi katalog (key cache hasil matching & nama file index) dari fingerprint file sumbernya."""
+    payload = json.dumps([MATCHER_VERSION, sorted(source_fingerprints.items())])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _fuzzy_threshold(query):
+    query_len = len(query)
+    if query_len <= 10:
+        return 0.95  # Sangat ketat untuk query pendek
+    elif query_len <= 20:
+        return 0.92  # Ketat untuk query sedang
+    return 0.90  # Agak fleksibel untuk query panjang
+
+
+class CatalogEntry:
+    """
+    Satu judul katalog: info per sumber (entry['scimago'], entry['scopus'])
+    dan token id judul yang diisi saat index dibangun.
+    """
+
+    __slots__ = CATALOG_SOURCES + ('tokens',)
+
+    def __init__(self):
+        for source in CATALOG_SOURCES:
+            setattr(self, source, None)
+        self.tokens = ()
+
+    def __getitem__(self, source):
+        return getattr(self, source)
+
+    def __setitem__(self, source, info):
+        setattr(self, source, info)
+
+
+class _IndexedEntry:
+    """CatalogEntry read-only dari file index: info per sumber di-decode saat pertama diakses."""
+
+    __slots__ = ('_entries', '_position', '_infos', 'tokens')
+
+    def __init__(self, entries, position, tokens):
+        self._entries = entries
+        self._position = position
+        self._infos = {}
+        self.tokens = tokens
+
+    def __getitem__(self, source):
+        infos = self._infos
+        if source not in infos:
+            infos[source] = self._entries.info(source, self._position)
+        return infos[source]
+
+
+class _IndexedEntries(Mapping):
+    """
+    Pengganti dict key → CatalogEntry untuk katalog dari file index: key
+    dicari lewat hash table di file, entry dibuat saat diakses dari baris
+    tabel per sumber (dan token id judul jika ada).
+    """
+
+    def __init__(self, keys, rows, tables, token_indptr=None, token_ids=None):
+        self._keys = keys
+        self._rows = {source: memoryview(source_rows) for source, source_rows in rows.items()}
+        self._tables = tables
+        self._token_indptr = memoryview(token_indptr) if token_indptr is not None else None
+        self._token_ids = memoryview(token_ids) if token_ids is not None else None
+
+    def info(self, source, position):
+        rows = self._rows.get(source)
+        row = rows[position] if rows is not None else -1
+        return self._tables[source].value_at(row) if row >= 0 else None
+
+    def _entry(self, position):
+        tokens = ()
+        if self._token_indptr is not None:
+            tokens = tuple(self._token_ids[self._token_indptr[position]:self._token_indptr[position + 1]])
+        return _IndexedEntry(self, position, tokens)
+
+    def get(self, key, default=None):
+        position = self._keys.position(key)
+        return default if position < 0 else self._entry(position)
+
+    def __getitem__(self, key):
+        position = self._keys.position(key)
+        if position < 0:
+            raise KeyError(key)
+        return self._entry(position)
+
+    def __contains__(self, key):
+        return self._keys.position(key) >= 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+
+# Array automaton judul yang disimpan di file index (lihat build_title_automaton)
+_AUTOMATON_ARRAYS = ('indptr', 'edge_tokens', 'edge_targets', 'failures', 'outputs', 'output_links', 'depths')
+_TFIDF_ARRAYS = ('word_idf', 'gram_idf', 'word_gathered', 'gram_gathered', 'inverse_norms', 'title_lengths')
+
+
+class JournalCatalog:
+    """
+    Katalog jurnal gabungan ScimagoJR + Scopus yang di-join berdasarkan judul
+    yang sudah dibersihkan. Satu query menjalankan tiga layer matching sekali
+    saja dan mengembalikan hasil untuk kedua sumber sekaligus.
+    """
+
+    def __init__(self, match_cache=None, negative_filter=None, metrics=None):
+        # cleaned_title → CatalogEntry (scimago: info|None, scopus: info|list|None)
+        self.entries = {}
+        # ISSN/eISSN → CatalogEntry
+        self.issn_entries = {}
+        self.source_counts = {source: 0 for source in CATALOG_SOURCES}
+        self.source_fingerprints = {}
+        # Data per sumber ({"by_cleaned_title", "by_issn"}) jika katalog dibuka dari file index
+        self.source_data = {}
+        self.version = self._compute_version()
+        self.match_cache = match_cache
+        self.negative_filter = negative_filter
+        self.token_index = None
+        self.ngram_index = None
+        self.spelling_index = None
+        self.tfidf_index = None
+        self.title_automaton = None
+        self.length_buckets = None
+        self.stopword_ids = frozenset()
+        self._index_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else CatalogMetrics(CATALOG_SOURCES)
+
+    def add_source(self, source, by_cleaned_title, fingerprint=None, by_issn=None):
+        """
+        Gabungkan data satu sumber (dict cleaned_title → info, dan opsional
+        dict ISSN → info) ke katalog. `fingerprint` mengidentifikasi file
+        sumbernya (lihat source_fingerprint) dan menentukan versi katalog
+        untuk cache hasil matching.
+        """
+        if source not in CATALOG_SOURCES:
+            raise ValueError(f"Sumber katalog tidak dikenal: {source}")
+        if not isinstance(self.entries, dict):
+            raise TypeError("Katalog dari file index bersifat read-only")
+
+        with self._index_lock:
+            for entry in self.entries.values():
+                entry[source] = None
+
+            for cleaned_title, info in by_cleaned_title.items():
+                entry = self.entries.get(cleaned_title)
+                if entry is None:
+                    entry = self.entries[cleaned_title] = CatalogEntry()
+                entry[source] = info
+
+            for entry in self.issn_entries.values():
+                entry[source] = None
+            for issn, info in (by_issn or {}).items():
+                entry = self.issn_entries.get(issn)
+                if entry is None:
+                    entry = self.issn_entries[issn] = CatalogEntry()
+                entry[source] = info
+
+            self.source_counts[source] = len(by_cleaned_title)
+            self.source_fingerprints[source] = fingerprint or f"{source}:{len(by_cleaned_title)}"
+            self.version = self._compute_version()
+            # Index dibangun ulang (sekali) saat search berikutnya
+            self.token_index = None
+            self.title_automaton = None
+            self.length_buckets = None
+
+    def _compute_version(self):
+        return catalog_version(self.source_fingerprints)
+
+    def save_index_file(self, path):
+        """
+        Simpan katalog gabungan beserta semua index yang sudah dibangun
+        (posting list kata & n-gram, TF-IDF, kamus typo, automaton judul) ke
+        satu file katalog biner. Proses berikutnya cukup mmap file ini lewat
+        load_catalog_index: tanpa decode record ke heap maupun build index.
+        """
+        self.build_indexes()
+        automaton = self._get_title_automaton()
+        token_index = self.token_index
+        titles = token_index["titles"]
+
+        # Data per sumber sebagai tabel key → info; baris tabel per judul/ISSN katalog gabungan
+        tables = {}
+        arrays = {}
+        for source in self.source_fingerprints:
+            for name, entries in (('by_cleaned_title', self.entries), ('by_issn', self.issn_entries)):
+                table = {}
+                rows = np.full(len(entries), -1, dtype=np.int32)
+                for position, (key, entry) in enumerate(entries.items()):
+                    if entry[source] is not None:
+                        rows[position] = len(table)
+                        table[key] = entry[source]
+                tables[f"{source}.{name}"] = table
+                arrays[f"{name}.{source}"] = rows
+
+        title_tokens = [self.entries[title].tokens for title in titles]
+        deletes = self.spelling_index["deletes"]
+        spelling_ids = [ids if isinstance(ids, tuple) else (ids,) for ids in deletes.values()]
+        token_ids = token_index["token_ids"]
+        arrays.update({
+            "title_tokens.indptr": np.cumsum([0] + [len(tokens) for tokens in title_tokens], dtype=np.int64),
+            "title_tokens.ids": np.fromiter(chain.from_iterable(title_tokens), dtype=np.int32),
+            "token.indptr": token_index["indptr"],
+            "token.postings": token_index["postings"],
+            "vocabulary.order": np.asarray([token_ids[word] for word in token_index["vocabulary"]], dtype=np.int32),
+            "ngram.indptr": self.ngram_index["indptr"],
+            "ngram.postings": self.ngram_index["postings"],
+            "ngram.posting_lengths": self.ngram_index["posting_lengths"],
+            "spelling.indptr": np.cumsum([0] + [len(ids) for ids in spelling_ids], dtype=np.int64),
+            "spelling.ids": np.fromiter(chain.from_iterable(spelling_ids), dtype=np.int32),
+        })
+        for name in _TFIDF_ARRAYS:
+            arrays[f"tfidf.{name}"] = self.tfidf_index[name]
+        for name in _AUTOMATON_ARRAYS:
+            arrays[f"automaton.{name}"] = np.asarray(automaton[name], dtype=np.int32)
+
+        write_catalog_file(
+            path, tables,
+            string_lists={
+                "titles": titles,
+                "words": token_index["words"],
+                "grams": list(self.ngram_index["gram_ids"]),
+                "issns": list(self.issn_entries),
+                "spelling.variants": list(deletes)
+            },
+            arrays=arrays,
+            meta={
+                "version": self.version,
+                "source_counts": self.source_counts,
+                "source_fingerprints": self.source_fingerprints,
+                "spelling_max_distance": self.spelling_index["max_distance"],
+                "tfidf_unknown_idf": self.tfidf_index["unknown_idf"]
+            }
+        )
+
+    def attach_index_file(self, catalog_file):
+        """
+        Pakai data & index dari file hasil save_index_file langsung dari mmap
+        (halaman memori dibagi antar proses). ValueError jika file dibuat oleh
+        versi matcher lain.
+        """
+        meta = catalog_file.meta
+        lists = catalog_file.string_lists
+        array = catalog_file.array
+        source_fingerprints = dict(meta["source_fingerprints"])
+        if catalog_version(source_fingerprints) != meta["version"]:
+            raise ValueError(f"{catalog_file.path.name} was built by another matcher version")
+
+        titles = lists["titles"]
+        words = lists["words"]
+        token_ids = words.positions
+        sources = list(source_fingerprints)
+        tables = catalog_file.tables
+        with self._index_lock:
+            self.entries = _IndexedEntries(
+                titles,
+                {source: array(f"by_cleaned_title.{source}") for source in sources},
+                {source: tables[f"{source}.by_cleaned_title"] for source in sources},
+                array("title_tokens.indptr"), array("title_tokens.ids")
+            )
+            self.issn_entries = _IndexedEntries(
+                lists["issns"],
+                {source: array(f"by_issn.{source}") for source in sources},
+                {source: tables[f"{source}.by_issn"] for source in sources}
+            )
+            self.source_counts = {source: 0 for source in CATALOG_SOURCES}
+            self.source_counts.update(meta["source_counts"])
+            self.source_fingerprints = source_fingerprints
+            self.version = meta["version"]
+            self.source_data = {
+                source: {"by_cleaned_title": tables[f"{source}.by_cleaned_title"], "by_issn": tables[f"{source}.by_issn"]}
+                for source in sources
+            }
+
+            token_indptr = array("token.indptr")
+            self.stopword_ids = frozenset(self._query_token_ids(STOPWORDS, token_ids))
+            self.spelling_index = {
+                "deletes": StringGroups(lists["spelling.variants"], array("spelling.indptr"), array("spelling.ids")),
+                "max_distance": meta["spelling_max_distance"],
+                "frequencies": np.diff(token_indptr)
+            }
+            self.ngram_index = {
+                "titles": titles,
+                "gram_ids": lists["grams"].positions,
+                "indptr": array("ngram.indptr"),
+                "postings": array("ngram.postings"),
+                "posting_lengths": array("ngram.posting_lengths")
+            }
+            self.tfidf_index = {name: array(f"tfidf.{name}") for name in _TFIDF_ARRAYS}
+            self.tfidf_index["unknown_idf"] = meta["tfidf_unknown_idf"]
+            self.title_automaton = {name: memoryview(array(f"automaton.{name}")) for name in _AUTOMATON_ARRAYS}
+            self.token_index = {
+                "titles": titles,
+                "token_ids": token_ids,
+                "indptr": token_indptr,
+                "postings": array("token.postings"),
+                "words": words,
+                "vocabulary": SortedStringView(words, array("vocabulary.order"))
+            }
+
+    def build_indexes(self):
+        with self._index_lock:
+            if self.token_index is not None:
+                return
+
+            token_index = build_token_index(self.entries)
+            # Judul di-tokenize sekali di sini; loop matching hanya membandingkan
+            # tuple token id (int yang sama dipakai ulang antar judul)
+            token_ids = token_index["token_ids"]
+            for title, entry in self.entries.items():
+                entry.tokens = tuple([token_ids[word] for word in title.split()])
+            self.stopword_ids = frozenset(self._query_token_ids(STOPWORDS, token_ids))
+            self.spelling_index = build_spelling_index(token_index)
+            self.ngram_index = build_ngram_index(token_index["titles"])
+            self.tfidf_index = build_tfidf_index(token_index, self.ngram_index)
+            self.token_index = token_index
+
+        logger.info(
+            f"📚 Journal catalog ready: {len(self.entries)} unique titles "
+            f"(Scimago {self.source_counts['scimago']}, Scopus {self.source_counts['scopus']})"
+        )
+
+    @staticmethod
+    def _query_token_ids(words, token_ids):
+        # Kata di luar kosakata tetap berupa string → tidak pernah sama dengan token id judul
+        return [token_ids.get(word, word) for word in words]
+
+    def _correct_query(self, query):
+        """
+        Ganti setiap kata yang tidak ada di kosakata dengan koreksi terdekatnya.
+        Return query terkoreksi, atau None jika tidak ada yang diganti atau
+        masih ada kata yang tidak bisa dikoreksi.
+        """
+        token_ids = self.token_index["token_ids"]
+        corrected = []
+        for word in query.split():
+            if word not in token_ids:
+                word = correct_word(self.spelling_index, self.token_index, word)
+                if word is None:
+                    return None
+            corrected.append(word)
+        corrected = ' '.join(corrected)
+        return corrected if corrected != query else None
+
+    def search(self, journal_name):
+        """
+        Cari jurnal di semua sumber. Return dict per sumber berisi
+        tuple (found, info) seperti search_journal_in_scimago/scopus.
+        """
+        return self.search_many([journal_name])[journal_name]
+
+    def search_many(self, journal_names, tracer=None):
+        """
+        Versi batch `search`: nama di-dedupe dan dinormalisasi sekali,
+        Layer 1 diselesaikan dalam satu pass dict, lalu kandidat Layer 2/3
+        untuk semua query sisanya dihitung dalam satu pass NumPy.
+        `tracer` (MatchTracer, opsional) mencatat trace per query.
+        Return dict journal_name → {sumber: (found, info)}.
+        """
+        tracer = tracer if tracer is not None else NULL_TRACER
+        unique_names = list(dict.fromkeys(journal_names))
+        results = {
+            name: {source: (False, None) for source in CATALOG_SOURCES}
+            for name in unique_names
+        }
+        sources = [source for source in CATALOG_SOURCES if self.source_counts[source]]
+        if not sources:
+            return results
+
+        if self.token_index is None:
+            self.build_indexes()
+
+        # Nama berbeda dengan bentuk bersih yang sama cukup dicocokkan sekali
+        # Note: clean_journal_title() already calls expand_abbreviations() internally
+        queries = {}
+        for name in unique_names:
+            if name:
+                query = clean_journal_title(name)
+                queries.setdefault(query, []).append(name)
+                tracer.start(name, query, sources)
+
+        pending = {query: list(sources) for query in queries}
+        matches = {query: {} for query in queries}
+
+        # Cache persisten (hasil positif & negatif) di depan ketiga layer
+        catalog_version = self.version
+        cached = {}
+        if self.match_cache is not None:
+            started = time.perf_counter()
+            cached = self.match_cache.get_many(queries, catalog_version)
+            for query, cached_result in cached.items():
+                for source in pending[query]:
+                    if cached_result.get(source) is not None:
+                        matches[query][source] = cached_result[source]
+                    self.metrics.record_layer_hit(source, 'cache')
+                pending[query] = []
+            self.metrics.record_layer_time('cache', time.perf_counter() - started, len(queries))
+            tracer.record_shared('cache', list(queries), time.perf_counter() - started)
+            tracer.resolve_pending('cache', pending)
+
+        # Layer 1: Exact match
+        started = time.perf_counter()
+        for query in queries:
+            if not pending[query]:
+                continue
+            entry = self.entries.get(query)
+            if entry is not None:
+                self._resolve(query, entry, pending, matches, 'exact', "LAYER 1 (EXACT)")
+        self.metrics.record_layer_time('exact', time.perf_counter() - started, len(queries))
+        tracer.record_shared('exact', [query for query in queries if query not in cached], time.perf_counter() - started)
+        tracer.resolve_pending('exact', pending)
+
+        # Negative filter: query yang sebelumnya tidak match di sumber mana pun
+        # langsung dianggap no-match (beberapa hash probe, tanpa sweep Layer 2/3).
+        # Dicek setelah Layer 1 agar false positive tidak pernah menutupi judul exact.
+        known_misses = set()
+        if self.negative_filter is not None:
+            started = time.perf_counter()
+            unresolved = [query for query in queries if len(pending[query]) == len(sources)]
+            known_misses = self.negative_filter.contains_many(unresolved, catalog_version)
+            for query in known_misses:
+                for source in pending[query]:
+                    self.metrics.record_layer_hit(source, 'negative_filter')
+                pending[query] = []
+            self.metrics.record_layer_time('negative_filter', time.perf_counter() - started, len(unresolved))
+            tracer.record_shared('negative_filter', unresolved, time.perf_counter() - started)
+            tracer.resolve_pending('negative_filter', pending)
+
+        # Layer 2: Exact word match, hanya judul yang mengandung semua kata query
+        started = time.perf_counter()
+        word_queries = [query for query in queries if pending[query] and query.split()]
+        word_candidates = batch_word_match_ordinals(self.token_index, [query.split() for query in word_queries])
+        tracer.record_shared('word', word_queries, time.perf_counter() - started)
+        for query, candidate_ordinals in zip(word_queries, word_candidates):
+            query_started = time.perf_counter()
+            self._word_match(query, query.split(), candidate_ordinals, pending, matches, 'word', "LAYER 2 (EXACT WORD MATCH)")
+            tracer.record(query, 'word', time.perf_counter() - query_started, len(candidate_ordinals))
+        self.metrics.record_layer_time('word', time.perf_counter() - started, len(word_queries))
+        tracer.resolve_pending('word', pending)
+
+        # Layer 2b: Singkatan → kata yang tidak ada di kosakata katalog diekspansi
+        # lewat prefix (bisect di kosakata terurut), lalu dicocokkan per kata
+        started = time.perf_counter()
+        token_ids = self.token_index["token_ids"]
+        stopword_ids = self.stopword_ids
+        vocabulary = self.token_index["words"]
+        abbreviation_queries = [
+            query for query in word_queries
+            if pending[query] and any(word not in token_ids for word in query.split())
+        ]
+        abbreviation_candidates = batch_abbreviation_ordinals(
+            self.token_index, [query.split() for query in abbreviation_queries]
+        )
+        tracer.record_shared('abbreviation', abbreviation_queries, time.perf_counter() - started)
+        titles = self.token_index["titles"]
+        for query, candidate_ordinals in zip(abbreviation_queries, abbreviation_candidates):
+            query_started = time.perf_counter()
+            query_words_list = self._query_token_ids(query.split(), token_ids)
+            abbreviated_words = {word for word in query_words_list if isinstance(word, str)}
+
+            passing = []
+            for ordinal in candidate_ordinals.tolist():
+                entry = self.entries[titles[ordinal]]
+                if all(entry[source] is None for source in pending[query]):
+                    continue
+                if _is_abbreviation_match(query_words_list, abbreviated_words, entry.tokens, vocabulary, stopword_ids):
+                    passing.append(ordinal)
+
+            self._resolve_ranked(query, query, passing, pending, matches, 'abbreviation', "LAYER 2b (ABBREVIATION)")
+            tracer.record(query, 'abbreviation', time.perf_counter() - query_started, len(candidate_ordinals))
+        self.metrics.record_layer_time('abbreviation', time.perf_counter() - started, len(abbreviation_queries))
+        tracer.resolve_pending('abbreviation', pending)
+
+        # Layer 2c: Koreksi typo per kata (symmetric delete) lalu ulangi Layer 1 & 2
+        # dengan query terkoreksi; Layer 3 hanya untuk sisa yang tetap tidak cocok
+        started = time.perf_counter()
+        corrected_queries = {}
+        for query in word_queries:
+            if pending[query]:
+                query_started = time.perf_counter()
+                corrected = self._correct_query(query)
+                if corrected is not None:
+                    corrected_queries[query] = corrected
+                tracer.record(query, 'spelling', time.perf_counter() - query_started)
+        for query, corrected in corrected_queries.items():
+            entry = self.entries.get(corrected)
+            if entry is not None:
+                self._resolve(query, entry, pending, matches, 'spelling', f"LAYER 2c (SPELLING → EXACT) '{corrected}'")
+        retry_queries = [query for query in corrected_queries if pending[query]]
+        retry_started = time.perf_counter()
+        retry_candidates = batch_word_match_ordinals(
+            self.token_index, [corrected_queries[query].split() for query in retry_queries]
+        )
+        tracer.record_shared('spelling', retry_queries, time.perf_counter() - retry_started)
+        for query, candidate_ordinals in zip(retry_queries, retry_candidates):
+            query_started = time.perf_counter()
+            self._word_match(
+                query, corrected_queries[query].split(), candidate_ordinals, pending, matches,
+                'spelling', f"LAYER 2c (SPELLING → WORD MATCH) '{corrected_queries[query]}'"
+            )
+            tracer.record(query, 'spelling', time.perf_counter() - query_started, len(candidate_ordinals))
+        self.metrics.record_layer_time('spelling', time.perf_counter() - started, len(corrected_queries))
+        tracer.resolve_pending('spelling', pending)
+
+        # Layer 3: Fuzzy match (typo tolerance)
+        started = time.perf_counter()
+        fuzzy_queries = [query for query in word_queries if pending[query]]
+        thresholds = [_fuzzy_threshold(query) for query in fuzzy_queries]
+        # SequenceMatcher hanya untuk kandidat dengan cosine TF-IDF tertinggi
+        # di rentang panjang yang masih mungkin lolos threshold
+        fuzzy_candidates = batch_tfidf_candidates(
+            self.tfidf_index, self.token_index, self.ngram_index, fuzzy_queries, thresholds
+        )
+        # Tanpa kandidat TF-IDF (tidak ada n-gram yang sama) → judul di bucket
+        # panjang yang upper bound rasionya masih lolos threshold
+        for position, (query, min_threshold) in enumerate(zip(fuzzy_queries, thresholds)):
+            if not fuzzy_candidates[position]:
+                fuzzy_candidates[position] = find_length_candidates(self._get_length_buckets(), query, min_threshold)
+        tracer.record_shared('fuzzy', fuzzy_queries, time.perf_counter() - started)
+
+        for query, min_threshold, candidate_titles in zip(fuzzy_queries, thresholds, fuzzy_candidates):
+            query_started = time.perf_counter()
+            self._fuzzy_match(query, min_threshold, candidate_titles, pending, matches)
+            tracer.record(query, 'fuzzy', time.perf_counter() - query_started, len(candidate_titles))
+        self.metrics.record_layer_time('fuzzy', time.perf_counter() - started, len(fuzzy_queries))
+        tracer.resolve_pending('fuzzy', pending)
+
+        for query in queries:
+            for source in pending[query]:
+                self.metrics.record_layer_hit(source, 'no_match')
+        tracer.finish()
+
+        if self.negative_filter is not None:
+            self.negative_filter.add_many(
+                [query for query in queries if query not in cached and not matches[query]
+                 and query not in known_misses],
+                catalog_version
+            )
+
+        if self.match_cache is not None:
+            self.match_cache.put_many({
+                query: {
+                    source: select_best_match_from_list(matches[query].get(source))
+                    for source in sources
+                }
+                for query in queries if query not in cached
+            }, catalog_version)
+
+        for query, names in queries.items():
+            for source, info in matches[query].items():
+                resolved = (True, select_best_match_from_list(info))
+                for name in names:
+                    results[name][source] = resolved
+
+        return results
+
+    def search_issns(self, issn_lists, tracer=None):
+        """
+        Lookup ISSN/eISSN exact (satu dict lookup per ISSN, tanpa normalisasi
+        judul). `issn_lists` berisi list ISSN per referensi. Return list sejajar
+        berisi {sumber: (found, info)}, atau None jika tidak satu pun ISSN
+        referensi tersebut ada di katalog. Trace (jika ada `tracer`) memakai
+        key issn_trace_key(issns).
+        """
+        tracer = tracer if tracer is not None else NULL_TRACER
+        started = time.perf_counter()
+        results = []
+        for issns in issn_lists:
+            query_started = time.perf_counter()
+            found = {}
+            for issn in issns:
+                entry = self.issn_entries.get(issn)
+                if entry is None:
+                    continue
+                for source in CATALOG_SOURCES:
+                    if source not in found and entry[source] is not None:
+                        found[source] = select_best_match_from_list(entry[source])
+
+            if issns:
+                key = issn_trace_key(issns)
+                tracer.start(key, key, found)
+                tracer.record(key, 'issn', time.perf_counter() - query_started, len(issns))
+                for source in found:
+                    tracer.resolve(key, source, 'issn')
+            if not found:
+                results.append(None)
+                continue
+            for source in found:
+                self.metrics.record_layer_hit(source, 'issn')
+                logger.debug(f"✅ {source.upper()} ISSN MATCH: {issns}")
+            results.append({
+                source: (True, found[source]) if source in found else (False, None)
+                for source in CATALOG_SOURCES
+            })
+        self.metrics.record_layer_time('issn', time.perf_counter() - started, len(issn_lists))
+        return results
+
+    def scan_text(self, text):
+        """
+        Cari semua judul katalog yang muncul di teks referensi lengkap
+        (Aho-Corasick level kata, sekali jalan). Return list
+        (start, end, cleaned_title, {sumber: (found, info)}) urut posisi akhir.
+        """
+        if not self.entries:
+            return []
+        if self.token_index is None:
+            self.build_indexes()
+
+        token_ids = self.token_index["token_ids"]
+        titles = self.token_index["titles"]
+        tokens = [token_ids.get(word, -1) for word in normalize_reference_text(text)]
+        found = []
+        for start, end, ordinal in scan_title_automaton(self._get_title_automaton(), tokens):
+            entry = self.entries[titles[ordinal]]
+            found.append((start, end, titles[ordinal], {
+                source: (True, select_best_match_from_list(entry[source])) if entry[source] is not None else (False, None)
+                for source in CATALOG_SOURCES
+            }))
+        return found
+
+    def _get_length_buckets(self):
+        # Hanya untuk query tanpa kandidat TF-IDF → dibangun saat pertama dipakai
+        with self._index_lock:
+            if self.length_buckets is None:
+                self.length_buckets = build_length_buckets(
+                    self.token_index["titles"], self.tfidf_index["title_lengths"]
+                )
+            return self.length_buckets
+
+    def _get_title_automaton(self):
+        # Automaton hanya dipakai scan_text → dibangun saat scan pertama, bukan di build_indexes
+        with self._index_lock:
+            if self.title_automaton is None:
+                token_index = self.token_index
+                self.title_automaton = build_title_automaton(
+                    token_index, [self.entries[title].tokens for title in token_index["titles"]]
+                )
+            return self.title_automaton
+
+    def _word_match(self, query, query_words_list, candidate_ordinals, pending, matches, layer, layer_label):
+        """
+        Validasi Layer 2 untuk kandidat satu query. Jika beberapa judul lolos,
+        judul dengan cosine TF-IDF tertinggi dipakai lebih dulu (lihat `_resolve_ranked`).
+        """
+        titles = self.token_index["titles"]
+        query_word_ids = self._query_token_ids(query_words_list, self.token_index["token_ids"])  # Preserve order
+        query_words = set(query_word_ids)
+        # Kata-kata penting (non-stopword) yang HARUS ada
+        important_query_words = query_words - self.stopword_ids
+
+        passing = []
+        for ordinal in candidate_ordinals.tolist():
+            entry = self.entries[titles[ordinal]]
+            if all(entry[source] is None for source in pending[query]):
+                continue
+            if _is_word_match(query_words, query_word_ids, important_query_words, entry.tokens, self.stopword_ids):
+                passing.append(ordinal)
+
+        self._resolve_ranked(query, ' '.join(query_words_list), passing, pending, matches, layer, layer_label)
+
+    def _resolve_ranked(self, query, ranking_query, passing, pending, matches, layer, layer_label):
+        """
+        Resolve judul yang lolos validasi, cosine TF-IDF terhadap `ranking_query`
+        tertinggi lebih dulu (seri → urutan dict asli).
+        """
+        titles = self.token_index["titles"]
+        if len(passing) > 1:
+            scores = tfidf_candidate_scores(
+                self.tfidf_index, self.token_index, self.ngram_index, ranking_query, passing
+            )
+            passing = rank_by_tfidf(passing, scores).tolist()
+
+        for ordinal in passing:
+            title_db = titles[ordinal]
+            self._resolve(query, self.entries[title_db], pending, matches, layer, f"{layer_label} → '{title_db}'")
+            if not pending[query]:
+                break
+
+    def _resolve(self, query, entry, pending, matches, layer, layer_label):
+        for source in list(pending[query]):
+            if entry[source] is not None:
+                matches[query][source] = entry[source]
+                pending[query].remove(source)
+                self.metrics.record_layer_hit(source, layer)
+                logger.debug(f"✅ {source.upper()} {layer_label}: '{query}'")
+
+    def _fuzzy_match(self, query, min_threshold, candidate_titles, pending, matches):
+        query_words_list = self._query_token_ids(query.split(), self.token_index["token_ids"])
+        query_words = set(query_words_list)
+
+        # source → (score, info, title)
+        best = {source: (0.0, None, None) for source in pending[query]}
+        matcher = difflib.SequenceMatcher(None, query)
+        for title_db in candidate_titles:
+            entry = self.entries[title_db]
+            sources_here = [source for source in pending[query] if entry[source] is not None]
+            if not sources_here or not title_db:
+                continue
+
+            # Kandidat hanya berguna jika bisa mengalahkan skor terbaik sumber terlemah
+            highest_score = min(best[source][0] for source in sources_here)
+            matcher.set_seq2(title_db)
+            # Upper bound murah dulu: skip jika rasio penuh pasti tidak lolos
+            if not passes_quick_ratio(matcher, min_threshold, highest_score):
+                continue
+
+            seq_ratio = matcher.ratio()
+            if seq_ratio < min_threshold or seq_ratio <= highest_score:
+                continue
+            if not _passes_fuzzy_guards(query_words, query_words_list, entry.tokens, seq_ratio, self.stopword_ids):
+                continue
+
+            for source in sources_here:
+                if seq_ratio > best[source][0]:
+                    best[source] = (seq_ratio, entry[source], title_db)
+
+        for source in list(pending[query]):
+            score, info, title_db = best[source]
+            if info is not None:
+                matches[query][source] = info
+                pending[query].remove(source)
+                self.metrics.record_layer_hit(source, 'fuzzy')
+                logger.debug(f"✅ {source.upper()} LAYER 3 (FUZZY - TYPO): '{query}' → '{title_db}' (score={score:.3f})")
+            else:
+                logger.debug(f"❌ {source.upper()} NO MATCH: '{query}' → best_score={score:.3f}, threshold={min_threshold:.2f}")
+
+
+def _create_match_cache():
+    if not Config.MATCH_CACHE_ENABLED:
+        return None
+    try:
+        cache_path = os.path.join(Config.UPLOAD_FOLDER, '.cache', 'journal_matches.sqlite3')
+        return MatchCache(cache_path, max_entries=Config.MATCH_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.warning(f"⚠️ Journal match cache disabled: {e}")
+        return None
+
+
+def _create_negative_filter():
+    if not Config.NEGATIVE_FILTER_ENABLED:
+        return None
+    try:
+        return NegativeFilterStore(
+            os.path.join(Config.UPLOAD_FOLDER, '.cache'),
+            capacity=Config.NEGATIVE_FILTER_CAPACITY,
+            error_rate=Config.NEGATIVE_FILTER_ERROR_RATE,
+            flush_interval=Config.NEGATIVE_FILTER_FLUSH_INTERVAL
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Journal negative filter disabled: {e}")
+        return None
+
+
+# Metrik pencarian (thread-safe, memori terbatas), dibagi semua versi katalog
+CATALOG_METRICS = CatalogMetrics(CATALOG_SOURCES)
+
+# Cache hasil & negative filter di-key dengan versi katalog, jadi aman dibagi
+_MATCH_CACHE = _create_match_cache()
+_NEGATIVE_FILTER = _create_negative_filter()
+
+# Katalog aktif per tahun (diisi catalog_registry). Dict diganti utuh saat
+# install (copy-on-write) sehingga lookup yang sedang berjalan tidak terblokir
+_ACTIVE_CATALOGS = {}
+_DEFAULT_CATALOG_YEAR = None
+_install_lock = threading.Lock()
+
+
+def create_catalog():
+    """Katalog kosong baru yang berbagi cache, negative filter & metrik global."""
+    return JournalCatalog(match_cache=_MATCH_CACHE, negative_filter=_NEGATIVE_FILTER, metrics=CATALOG_METRICS)
+
+
+def load_catalog_index(path):
+    """
+    Katalog siap pakai (data + semua index) dari file hasil
+    JournalCatalog.save_index_file, dibuka dengan mmap. None jika file
+    tidak ada atau tidak bisa dipakai (katalog harus dibangun ulang).
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        catalog = create_catalog()
+        catalog.attach_index_file(CatalogFile(path))
+        return catalog
+    except Exception as e:
+        logger.warning(f"⚠️ Catalog index file {os.path.basename(path)} unusable, rebuilding: {e}")
+        return None
+
+
+# Dipakai selama belum ada katalog terpasang (semua pencarian → tidak ditemukan)
+_EMPTY_CATALOG = create_catalog()
+
+
+def install_catalog(year, catalog, make_default=False):
+    """
+    Pasang (atau ganti) katalog untuk satu tahun secara atomik.
+    Return katalog lama untuk tahun tersebut (atau None).
+    """
+    global _ACTIVE_CATALOGS, _DEFAULT_CATALOG_YEAR
+    with _install_lock:
+        catalogs = dict(_ACTIVE_CATALOGS)
+        previous = catalogs.get(year)
+        catalogs[year] = catalog
+        _ACTIVE_CATALOGS = catalogs
+        if make_default or _DEFAULT_CATALOG_YEAR is None:
+            _DEFAULT_CATALOG_YEAR = year
+    _search_journal_cached.cache_clear()
+
+    if previous is not None and _NEGATIVE_FILTER is not None and previous.version != catalog.version:
+        if all(other.version != previous.version for other in catalogs.values()):
+            _NEGATIVE_FILTER.retire(previous.version, catalog.version)
+    return previous
+
+
+def uninstall_catalog(year):
+    """
+    Lepas katalog satu tahun (tahun default tidak bisa dilepas).
+    Return katalog yang dilepas (atau None).
+    """
+    global _ACTIVE_CATALOGS
+    with _install_lock:
+        if year == _DEFAULT_CATALOG_YEAR or year not in _ACTIVE_CATALOGS:
+            return None
+        catalogs = dict(_ACTIVE_CATALOGS)
+        previous = catalogs.pop(year)
+        _ACTIVE_CATALOGS = catalogs
+    _search_journal_cached.cache_clear()
+
+    # File filter tetap disimpan: versi yang sama dipakai lagi jika tahun ini di-pin ulang
+    if _NEGATIVE_FILTER is not None and all(other.version != previous.version for other in catalogs.values()):
+        _NEGATIVE_FILTER.release(previous.version)
+    return previous
+
+
+def get_catalog(catalog_year=None):
+    """Katalog untuk `catalog_year` (default: tahun default). KeyError jika tahun tidak terpasang."""
+    catalogs = _ACTIVE_CATALOGS
+    if catalog_year is None:
+        return catalogs.get(_DEFAULT_CATALOG_YEAR, _EMPTY_CATALOG)
+    if catalog_year not in catalogs:
+        raise KeyError(f"Catalog year {catalog_year} is not loaded")
+    return catalogs[catalog_year]
+
+
+def installed_catalog_years():
+    return sorted(_ACTIVE_CATALOGS)
+
+
+def default_catalog_year():
+    return _DEFAULT_CATALOG_YEAR
+
+
+@lru_cache(maxsize=1000)
+def _search_journal_cached(journal_name, catalog_year):
+    return get_catalog(catalog_year).search(journal_name)
+
+
+def search_cache_info():
+    return _search_journal_cached.cache_info()
+
+
+def clear_search_cache():
+    _search_journal_cached.cache_clear()
+
+
+def _record_searches(journal_names, results, sources):
+    for name in journal_names:
+        if not name:
+            continue
+        for source in sources:
+            CATALOG_METRICS.record_search(source, name, results[name][source][0])
+
+
+def search_journal(journal_name, sources=CATALOG_SOURCES, catalog_year=None):
+    """
+    Satu lookup untuk ScimagoJR dan Scopus sekaligus. `sources` hanya
+    menentukan sumber mana yang dicatat di statistik pencarian;
+    `catalog_year` mem-pin versi katalog (default: tahun default).
+    """
+    results = _search_journal_cached(journal_name, catalog_year)
+    _record_searches([journal_name], {journal_name: results}, sources)
+    return results
+
+
+def search_journals_batch(journal_names, catalog_year=None, tracer=None):
+    """
+    Cocokkan seluruh daftar nama jurnal sekaligus (mis. semua referensi satu
+    dokumen). `tracer` (MatchTracer) opsional untuk trace per query.
+    Return dict journal_name → {'scimago': (found, info), 'scopus': ...}.
+    """
+    journal_names = list(journal_names)
+    results = get_catalog(catalog_year).search_many(journal_names, tracer=tracer)
+    _record_searches(journal_names, results, CATALOG_SOURCES)
+    return results
+
+
+def search_journals_by_issn(issn_values, catalog_year=None, tracer=None):
+    """
+    Cocokkan referensi berdasarkan ISSN/eISSN (string atau list per referensi).
+    Return list sejajar: {'scimago': (found, info), 'scopus': ...}, atau None
+    jika referensi tidak punya ISSN yang dikenal (lanjut ke title matching).
+    """
+    issn_lists = [parse_issns(value) for value in issn_values]
+    results = get_catalog(catalog_year).search_issns(issn_lists, tracer=tracer)
+    for issns, result in zip(issn_lists, results):
+        if result is None:
+            continue
+        for source in CATALOG_SOURCES:
+            CATALOG_METRICS.record_search(source, issns[0], result[source][0])
+    return results
+
+
+def scan_reference_titles(reference_texts, catalog_year=None):
+    """
+    Scan setiap teks referensi untuk judul katalog yang muncul di dalamnya.
+    Return list sejajar berisi hasil JournalCatalog.scan_text.
+    """
+    catalog = get_catalog(catalog_year)
+    return [catalog.scan_text(text) for text in reference_texts]
+
+
+# Judul hasil scan minimal sekian kata penting agar bisa menggantikan parsed_journal
+MIN_SCAN_TITLE_WORDS = 2
+
+
+def choose_scanned_title(scan_matches, parsed_journal, parsed_title=None, parsed_matched=False):
+    """
+    Pilih judul hasil scan teks referensi yang mengoreksi parsed_journal:
+    - judul memuat semua kata penting parsed_journal dan lebih panjang
+      (AI memotong nama, mis. "Journal of Physics" → "... Conference Series");
+    - jika parsed_journal tidak ditemukan di katalog, juga judul yang kata
+      pentingnya termuat di parsed_journal (AI menambah kata lain).
+    Judul yang muncul di dalam parsed_title (judul artikel) diabaikan.
+    Return match terpanjang (start, end, cleaned_title, hasil) atau None.
+    """
+    parsed_words = set(clean_journal_title(parsed_journal).split()) - STOPWORDS
+    if not parsed_words or not scan_matches:
+        return None
+    article_title = f" {clean_journal_title(parsed_title)} " if parsed_title else ""
+
+    best = None
+    for match in scan_matches:
+        title = match[2]
+        if f" {title} " in article_title:
+            continue
+        title_words = set(title.split()) - STOPWORDS
+        extends = parsed_words < title_words
+        contained = (
+            not parsed_matched
+            and len(title_words) >= MIN_SCAN_TITLE_WORDS
+            and title_words <= parsed_words
+        )
+        if (extends or contained) and (best is None or match[1] - match[0] > best[1] - best[0]):
+            best = match
+    return best
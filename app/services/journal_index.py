@@ -0,0 +1,690 @@
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from collections import deque
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ukuran n-gram karakter untuk index kandidat Layer 3 (fuzzy)
+NGRAM_SIZE = 3
+
+# Jumlah kandidat teratas yang diperiksa SequenceMatcher di Layer 3
+FUZZY_CANDIDATE_LIMIT = 50
+
+# Singkatan minimal 2 huruf; prefix dengan ekspansi lebih banyak dari batas
+# ini terlalu umum untuk menyaring kandidat (tetap diverifikasi per judul)
+MIN_ABBREVIATION_LENGTH = 2
+ABBREVIATION_MAX_EXPANSIONS = 256
+
+# Koreksi typo (symmetric delete): jarak edit maksimal & panjang kata minimal
+SPELLING_MAX_DISTANCE = 1
+MIN_SPELLING_LENGTH = 4
+
+# Jumlah query per gather TF-IDF (membatasi ukuran array sementara)
+TFIDF_BATCH_SIZE = 64
+
+# Fitur yang muncul di lebih dari rasio judul ini (mis. trigram " jo", "of ")
+# hampir tidak membedakan judul: tetap dihitung di norma query, tapi posting
+# listnya tidak di-gather saat retrieval
+TFIDF_MAX_DF_RATIO = 0.05
+
+
+def _build_postings(titles, keys_of, order):
+    """
+    Bangun posting list dalam format CSR (indptr + array ordinal int32).
+    `order` menentukan urutan ordinal di setiap posting list.
+    """
+    by_key = {}
+    for ordinal in order:
+        for key in keys_of(titles[ordinal]):
+            by_key.setdefault(key, []).append(ordinal)
+
+    key_ids = {}
+    indptr = np.zeros(len(by_key) + 1, dtype=np.int64)
+    flat = []
+    for key_id, (key, posting) in enumerate(by_key.items()):
+        key_ids[key] = key_id
+        flat.extend(posting)
+        indptr[key_id + 1] = len(flat)
+
+    return key_ids, indptr, np.asarray(flat, dtype=np.int32)
+
+
+def _gather_postings(postings, segments, segment_weights=None):
+    """
+    Ambil banyak potongan posting list sekaligus.
+    `segments` berisi tuple (query_idx, start, end); return array query_idx
+    dan array ordinal yang panjangnya sama. Jika `segment_weights` diberikan,
+    bobot per segment ikut diulang dan dikembalikan sebagai array ketiga.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    empty_result = (empty, empty) if segment_weights is None else (empty, empty, np.zeros(0))
+    if not segments:
+        return empty_result
+
+    seg = np.asarray(segments, dtype=np.int64)
+    seg_len = seg[:, 2] - seg[:, 1]
+    total = int(seg_len.sum())
+    if total == 0:
+        return empty_result
+
+    seg_offsets = np.concatenate(([0], np.cumsum(seg_len)[:-1]))
+    idx = np.repeat(seg[:, 1] - seg_offsets, seg_len) + np.arange(total)
+    gathered = (np.repeat(seg[:, 0], seg_len), postings[idx].astype(np.int64))
+    if segment_weights is None:
+        return gathered
+    return gathered + (np.repeat(np.asarray(segment_weights, dtype=np.float64), seg_len),)
+
+
+def _count_pairs(query_ids, ordinals, title_count):
+    """Hitung kemunculan setiap pasangan (query, ordinal), urut per query lalu ordinal."""
+    uniq, counts = np.unique(query_ids * title_count + ordinals, return_counts=True)
+    return uniq // title_count, uniq % title_count, counts
+
+
+def _split_by_query(query_ids, ordinals, query_count):
+    bounds = np.searchsorted(query_ids, np.arange(query_count + 1))
+    return [ordinals[bounds[i]:bounds[i + 1]] for i in range(query_count)]
+
+
+def build_token_index(by_cleaned_title):
+    """
+    Bangun inverted index kata → daftar ordinal judul (posting list CSR).
+    Ordinal mengikuti urutan iterasi dict sehingga hasil Layer 2 tetap sama
+    dengan scan linear sebelumnya (match pertama dalam urutan dict).
+    """
+    titles = list(by_cleaned_title.keys())
+    token_ids, indptr, postings = _build_postings(
+        titles, lambda title: set(title.split()), range(len(titles))
+    )
+
+    return {
+        "titles": titles,
+        "token_ids": token_ids,
+        "indptr": indptr,
+        "postings": postings,
+        # Token id → kata, dan kosakata terurut untuk ekspansi prefix (singkatan)
+        "words": list(token_ids),
+        "vocabulary": sorted(token_ids)
+    }
+
+
+def expand_prefix(token_index, prefix):
+    """Semua kata katalog yang diawali `prefix` (mis. 'anal' → 'analysis', 'analytical', ...)."""
+    vocabulary = token_index["vocabulary"]
+    start = bisect_left(vocabulary, prefix)
+    end = bisect_left(vocabulary, prefix + '\uffff', start)
+    return vocabulary[start:end]
+
+
+def batch_word_match_ordinals(token_index, queries_words):
+    """
+    Judul yang mengandung SEMUA kata query: semua query diproses dalam satu
+    pass NumPy (gather posting list + np.unique). Return array ordinal judul
+    (urut naik = urutan dict asli) per query.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    results = [empty for _ in queries_words]
+    if not token_index or not queries_words:
+        return results
+
+    token_ids = token_index["token_ids"]
+    indptr = token_index["indptr"]
+    segments = []
+    required = np.zeros(len(queries_words), dtype=np.int64)
+
+    for query_idx, query_words in enumerate(queries_words):
+        ids = [token_ids.get(word) for word in set(query_words)]
+        # Ada kata yang tidak pernah muncul di katalog → tidak ada kandidat
+        if not ids or None in ids:
+            continue
+        required[query_idx] = len(ids)
+        segments.extend((query_idx, indptr[i], indptr[i + 1]) for i in ids)
+
+    query_ids, ordinals = _gather_postings(token_index["postings"], segments)
+    if not len(ordinals):
+        return results
+
+    title_count = len(token_index["titles"])
+    query_ids, ordinals, counts = _count_pairs(query_ids, ordinals, title_count)
+    # Judul harus muncul di posting list SEMUA kata query
+    keep = counts == required[query_ids]
+    return _split_by_query(query_ids[keep], ordinals[keep], len(queries_words))
+
+
+def batch_abbreviation_ordinals(token_index, queries_words):
+    """
+    Kandidat judul untuk query yang mengandung singkatan (kata yang tidak ada
+    di kosakata katalog, mis. 'anal' dari "Pattern Anal."). Setiap kata menjadi
+    satu grup: kata biasa → dirinya sendiri, singkatan → semua ekspansi
+    prefixnya. Judul harus ada di posting list minimal satu kata dari SETIAP
+    grup. Return array ordinal judul per query (urut naik = urutan dict asli);
+    query yang singkatannya tidak bisa diekspansi mendapat array kosong.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    results = [empty for _ in queries_words]
+    if not token_index or not queries_words:
+        return results
+
+    token_ids = token_index["token_ids"]
+    indptr = token_index["indptr"]
+    segments = []
+    group_query = []
+    required = np.zeros(len(queries_words), dtype=np.int64)
+
+    for query_idx, query_words in enumerate(queries_words):
+        groups = []
+        for word in set(query_words):
+            word_id = token_ids.get(word)
+            if word_id is not None:
+                groups.append([word_id])
+                continue
+            expansions = expand_prefix(token_index, word) if len(word) >= MIN_ABBREVIATION_LENGTH else []
+            if not expansions:
+                groups = None
+                break
+            if len(expansions) <= ABBREVIATION_MAX_EXPANSIONS:
+                groups.append([token_ids[expansion] for expansion in expansions])
+        if not groups:
+            continue
+
+        required[query_idx] = len(groups)
+        for ids in groups:
+            group_idx = len(group_query)
+            group_query.append(query_idx)
+            segments.extend((group_idx, indptr[i], indptr[i + 1]) for i in ids)
+
+    group_ids, ordinals = _gather_postings(token_index["postings"], segments)
+    if not len(ordinals):
+        return results
+
+    title_count = len(token_index["titles"])
+    # Satu judul dihitung sekali per grup walau cocok dengan beberapa ekspansi
+    group_ids, ordinals, _ = _count_pairs(group_ids, ordinals, title_count)
+    query_ids = np.asarray(group_query, dtype=np.int64)[group_ids]
+    query_ids, ordinals, counts = _count_pairs(query_ids, ordinals, title_count)
+    keep = counts == required[query_ids]
+    return _split_by_query(query_ids[keep], ordinals[keep], len(queries_words))
+
+
+def _deletes(word, max_distance):
+    """Semua varian `word` dengan maksimal `max_distance` huruf dihapus (termasuk `word`)."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            variant[:i] + variant[i + 1:]
+            for variant in frontier if len(variant) > 1
+            for i in range(len(variant))
+        }
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(a, b, max_distance):
+    """Jarak Damerau-Levenshtein (OSA) dengan berhenti dini di atas `max_distance`."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def build_spelling_index(token_index, max_distance=SPELLING_MAX_DISTANCE):
+    """
+    Kamus koreksi typo gaya SymSpell dari kosakata katalog: setiap kata (dan
+    varian hasil hapus huruf) → token id kata asli. Lookup satu kata hanya
+    butuh beberapa dict lookup, tidak bergantung ukuran kosakata.
+    """
+    deletes = {}
+    for word, word_id in token_index["token_ids"].items():
+        if len(word) < MIN_SPELLING_LENGTH:
+            continue
+        for variant in _deletes(word, max_distance):
+            existing = deletes.get(variant)
+            if existing is None:
+                deletes[variant] = word_id
+            elif isinstance(existing, tuple):
+                deletes[variant] = existing + (word_id,)
+            else:
+                deletes[variant] = (existing, word_id)
+
+    return {
+        "deletes": deletes,
+        "max_distance": max_distance,
+        # Jumlah judul per kata, untuk memilih koreksi yang paling umum
+        "frequencies": np.diff(token_index["indptr"])
+    }
+
+
+def correct_word(spelling_index, token_index, word):
+    """
+    Kata katalog terdekat untuk `word` (jarak edit terkecil, lalu kata yang
+    paling sering muncul di judul). Return None jika tidak ada dalam jarak maksimal.
+    """
+    if len(word) < MIN_SPELLING_LENGTH:
+        return None
+
+    deletes = spelling_index["deletes"]
+    max_distance = spelling_index["max_distance"]
+    candidate_ids = set()
+    for variant in _deletes(word, max_distance):
+        found = deletes.get(variant)
+        if found is None:
+            continue
+        if isinstance(found, tuple):
+            candidate_ids.update(found)
+        else:
+            candidate_ids.add(found)
+
+    words = token_index["words"]
+    frequencies = spelling_index["frequencies"]
+    best = None
+    for word_id in candidate_ids:
+        distance = _edit_distance(word, words[word_id], max_distance)
+        if distance > max_distance:
+            continue
+        rank = (distance, -int(frequencies[word_id]), words[word_id])
+        if best is None or rank < best:
+            best = rank
+    return best[2] if best is not None else None
+
+
+def _title_ngrams(text, size=NGRAM_SIZE):
+    padded = f" {text} "
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def build_ngram_index(titles):
+    """
+    Bangun index n-gram karakter (trigram) → daftar ordinal judul untuk
+    menyaring kandidat Layer 3 sebelum SequenceMatcher dijalankan.
+    Posting list diurutkan menurut panjang judul supaya rentang panjang
+    yang lolos `length_bounds` bisa dipotong dengan searchsorted.
+    """
+    title_lengths = np.fromiter((len(title) for title in titles), dtype=np.int32, count=len(titles))
+    order = np.argsort(title_lengths, kind='stable').tolist()
+    gram_ids, indptr, postings = _build_postings(titles, _title_ngrams, order)
+
+    return {
+        "titles": titles,
+        "gram_ids": gram_ids,
+        "indptr": indptr,
+        "postings": postings,
+        # Panjang judul per entri posting (untuk searchsorted rentang panjang)
+        "posting_lengths": title_lengths[postings]
+    }
+
+
+def _idf(document_frequencies, document_count):
+    # IDF smooth (seperti scikit-learn): fitur yang tidak dikenal (df=0) bobotnya maksimal
+    return np.log((1 + document_count) / (1 + np.asarray(document_frequencies, dtype=np.float64))) + 1
+
+
+def build_tfidf_index(token_index, ngram_index):
+    """
+    Bobot TF-IDF di atas posting list yang sudah ada: fitur = kata judul +
+    trigram karakter (biner), jadi matriks judul × fitur adalah posting list
+    CSR kedua index. Cukup simpan IDF per fitur dan 1/norma per judul; cosine
+    query terhadap katalog = perkalian matriks-vektor sparse (gather posting
+    list + bincount).
+    """
+    titles = token_index["titles"]
+    title_count = len(titles)
+    word_df = np.diff(token_index["indptr"])
+    gram_df = np.diff(ngram_index["indptr"])
+    word_idf = _idf(word_df, title_count)
+    gram_idf = _idf(gram_df, title_count)
+
+    # Norma judul: sqrt(jumlah idf² semua fitur judul)
+    squared_norms = np.bincount(
+        token_index["postings"], weights=np.repeat(word_idf ** 2, word_df), minlength=title_count
+    ) + np.bincount(
+        ngram_index["postings"], weights=np.repeat(gram_idf ** 2, gram_df), minlength=title_count
+    )
+    with np.errstate(divide='ignore'):
+        inverse_norms = np.where(squared_norms > 0, 1 / np.sqrt(squared_norms), 0.0)
+
+    max_df = max(1, int(title_count * TFIDF_MAX_DF_RATIO))
+    return {
+        "word_idf": word_idf,
+        "gram_idf": gram_idf,
+        "word_gathered": word_df <= max_df,
+        "gram_gathered": gram_df <= max_df,
+        "unknown_idf": float(_idf(0, title_count)),
+        "inverse_norms": inverse_norms,
+        "title_lengths": np.fromiter((len(title) for title in titles), dtype=np.int32, count=title_count)
+    }
+
+
+def _query_features(tfidf_index, token_index, ngram_index, query):
+    """Return (token id kata, gram id trigram, norma query) untuk satu query."""
+    token_ids = token_index["token_ids"]
+    gram_ids = ngram_index["gram_ids"]
+    word_features = [token_ids.get(word) for word in set(query.split())]
+    gram_features = [gram_ids.get(gram) for gram in _title_ngrams(query)] if query else []
+
+    unknown = word_features.count(None) + gram_features.count(None)
+    word_features = np.asarray([i for i in word_features if i is not None], dtype=np.int64)
+    gram_features = np.asarray([i for i in gram_features if i is not None], dtype=np.int64)
+    squared_norm = (
+        float(np.sum(tfidf_index["word_idf"][word_features] ** 2))
+        + float(np.sum(tfidf_index["gram_idf"][gram_features] ** 2))
+        + unknown * tfidf_index["unknown_idf"] ** 2
+    )
+    return word_features, gram_features, math.sqrt(squared_norm)
+
+
+def batch_tfidf_scores(tfidf_index, token_index, ngram_index, queries, length_ranges=None):
+    """
+    Cosine TF-IDF setiap query terhadap semua judul yang berbagi minimal satu
+    fitur, untuk semua query sekaligus (satu gather + bincount). Jika
+    `length_ranges` diberikan (min, max) per query, hanya judul dengan panjang
+    di rentang itu yang dihitung; posting trigram terurut panjang sehingga
+    rentangnya dipotong dengan searchsorted. Return list (ordinal, skor) per
+    query; ordinal urut naik.
+    """
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0))
+    if not tfidf_index or not queries:
+        return [empty for _ in queries]
+
+    word_idf = tfidf_index["word_idf"]
+    gram_idf = tfidf_index["gram_idf"]
+    word_indptr = token_index["indptr"]
+    gram_indptr = ngram_index["indptr"]
+    posting_lengths = ngram_index["posting_lengths"]
+    query_norms = np.zeros(len(queries))
+    word_segments, word_weights = [], []
+    gram_segments, gram_weights = [], []
+
+    for query_idx, query in enumerate(queries):
+        word_features, gram_features, query_norms[query_idx] = _query_features(
+            tfidf_index, token_index, ngram_index, query
+        )
+        word_features = word_features[tfidf_index["word_gathered"][word_features]]
+        gram_features = gram_features[tfidf_index["gram_gathered"][gram_features]]
+        # Bobot query × bobot judul (sebelum normalisasi) = idf²
+        for feature_id in word_features.tolist():
+            word_segments.append((query_idx, word_indptr[feature_id], word_indptr[feature_id + 1]))
+            word_weights.append(word_idf[feature_id] ** 2)
+        for feature_id in gram_features.tolist():
+            start, end = gram_indptr[feature_id], gram_indptr[feature_id + 1]
+            if length_ranges is not None:
+                min_len, max_len = length_ranges[query_idx]
+                lengths = posting_lengths[start:end]
+                start, end = (
+                    start + np.searchsorted(lengths, min_len, side='left'),
+                    start + np.searchsorted(lengths, max_len, side='right')
+                )
+            if start < end:
+                gram_segments.append((query_idx, start, end))
+                gram_weights.append(gram_idf[feature_id] ** 2)
+
+    word_query_ids, word_ordinals, word_products = _gather_postings(
+        token_index["postings"], word_segments, word_weights
+    )
+    if length_ranges is not None and len(word_ordinals):
+        # Posting kata terurut ordinal → filter panjang setelah gather
+        bounds = np.asarray(length_ranges, dtype=np.float64)[word_query_ids]
+        lengths = tfidf_index["title_lengths"][word_ordinals]
+        keep = (lengths >= bounds[:, 0]) & (lengths <= bounds[:, 1])
+        word_query_ids, word_ordinals, word_products = word_query_ids[keep], word_ordinals[keep], word_products[keep]
+    gram_query_ids, gram_ordinals, gram_products = _gather_postings(
+        ngram_index["postings"], gram_segments, gram_weights
+    )
+
+    query_ids = np.concatenate((word_query_ids, gram_query_ids))
+    ordinals = np.concatenate((word_ordinals, gram_ordinals))
+    if not len(ordinals):
+        return [empty for _ in queries]
+
+    title_count = len(token_index["titles"])
+    pairs, inverse = np.unique(query_ids * title_count + ordinals, return_inverse=True)
+    dots = np.bincount(inverse.ravel(), weights=np.concatenate((word_products, gram_products)))
+    query_ids, ordinals = pairs // title_count, pairs % title_count
+    scores = dots * tfidf_index["inverse_norms"][ordinals] / query_norms[query_ids]
+
+    bounds = np.searchsorted(query_ids, np.arange(len(queries) + 1))
+    return [
+        (ordinals[bounds[i]:bounds[i + 1]], scores[bounds[i]:bounds[i + 1]])
+        for i in range(len(queries))
+    ]
+
+
+def tfidf_candidate_scores(tfidf_index, token_index, ngram_index, query, candidate_ordinals):
+    """
+    Cosine TF-IDF satu query terhadap kandidat tertentu saja (mis. kandidat
+    Layer 2), dihitung langsung dari fitur judul kandidat tanpa gather
+    posting list seluruh katalog.
+    """
+    word_features, gram_features, query_norm = _query_features(tfidf_index, token_index, ngram_index, query)
+    if not query_norm:
+        return np.zeros(len(candidate_ordinals))
+
+    token_ids = token_index["token_ids"]
+    gram_ids = ngram_index["gram_ids"]
+    word_weights = dict(zip(word_features.tolist(), (tfidf_index["word_idf"][word_features] ** 2).tolist()))
+    gram_weights = dict(zip(gram_features.tolist(), (tfidf_index["gram_idf"][gram_features] ** 2).tolist()))
+    titles = token_index["titles"]
+
+    dots = np.zeros(len(candidate_ordinals))
+    for position, ordinal in enumerate(candidate_ordinals):
+        title = titles[ordinal]
+        dots[position] = (
+            sum(word_weights.get(token_ids[word], 0.0) for word in set(title.split()))
+            + sum(gram_weights.get(gram_ids[gram], 0.0) for gram in _title_ngrams(title))
+        )
+    return dots * tfidf_index["inverse_norms"][np.asarray(candidate_ordinals, dtype=np.int64)] / query_norm
+
+
+def rank_by_tfidf(candidate_ordinals, scores):
+    """Urutkan ordinal kandidat menurut skor (tertinggi dulu, seri → urutan dict)."""
+    candidate_ordinals = np.asarray(candidate_ordinals, dtype=np.int64)
+    return candidate_ordinals[np.lexsort((candidate_ordinals, -np.asarray(scores)))]
+
+
+def batch_tfidf_candidates(tfidf_index, token_index, ngram_index, queries, min_thresholds,
+                           limit=FUZZY_CANDIDATE_LIMIT, batch_size=TFIDF_BATCH_SIZE):
+    """
+    Kandidat Layer 3: `limit` judul dengan cosine TF-IDF tertinggi per query,
+    hanya dari judul yang panjangnya masih mungkin mencapai threshold
+    SequenceMatcher (lihat `length_bounds`). Query diproses per potongan
+    `batch_size` agar memori gather tetap terbatas. Return list judul per
+    query, urut skor tertinggi dulu.
+    """
+    titles = token_index["titles"]
+    results = []
+    for chunk_start in range(0, len(queries), batch_size):
+        chunk = queries[chunk_start:chunk_start + batch_size]
+        length_ranges = [
+            length_bounds(len(query), min_threshold) if min_threshold is not None else (0, np.inf)
+            for query, min_threshold in zip(chunk, min_thresholds[chunk_start:chunk_start + batch_size])
+        ]
+        for ordinals, scores in batch_tfidf_scores(tfidf_index, token_index, ngram_index, chunk, length_ranges):
+            top = np.lexsort((ordinals, -scores))[:limit]
+            results.append([titles[ordinal] for ordinal in ordinals[top]])
+    return results
+
+
+def build_title_automaton(token_index, title_tokens):
+    """
+    Automaton Aho-Corasick level kata: pola = judul katalog sebagai tuple
+    token id (`title_tokens`, urut ordinal judul). Transisi disimpan format
+    CSR (token anak terurut per state, dicari dengan bisect) supaya tetap
+    ringkas; sisanya array int per state: failure link, ordinal judul yang
+    berakhir di state, link ke state output terdekat berikutnya, dan
+    kedalaman (jumlah kata).
+    """
+    vocabulary_size = len(token_index["token_ids"])
+    # Trie sementara (dict per key int), dibuang setelah dikonversi ke CSR
+    trie = {}
+    children = [[]]
+    outputs = array('i', [-1])
+    depths = array('i', [0])
+
+    for ordinal, tokens in enumerate(title_tokens):
+        if not tokens:
+            continue
+        state = 0
+        for token in tokens:
+            key = state * vocabulary_size + token
+            child = trie.get(key)
+            if child is None:
+                child = trie[key] = len(outputs)
+                children[state].append((token, child))
+                children.append([])
+                outputs.append(-1)
+                depths.append(depths[state] + 1)
+            state = child
+        # Judul sama (mustahil di katalog gabungan) → ordinal pertama
+        if outputs[state] < 0:
+            outputs[state] = ordinal
+    del trie
+
+    state_count = len(outputs)
+    indptr = array('i', [0])
+    edge_tokens = array('i')
+    edge_targets = array('i')
+    for edges in children:
+        edges.sort()
+        edge_tokens.extend(token for token, _ in edges)
+        edge_targets.extend(child for _, child in edges)
+        indptr.append(len(edge_tokens))
+
+    automaton = {
+        "indptr": indptr,
+        "edge_tokens": edge_tokens,
+        "edge_targets": edge_targets,
+        "failures": array('i', [0]) * state_count,
+        "outputs": outputs,
+        "output_links": array('i', [0]) * state_count,
+        "depths": depths
+    }
+
+    failures = automaton["failures"]
+    output_links = automaton["output_links"]
+    queue = deque(child for _, child in children[0])
+    while queue:
+        state = queue.popleft()
+        for token, child in children[state]:
+            failure = _automaton_step(automaton, failures[state], token)
+            failures[child] = failure
+            output_links[child] = failure if outputs[failure] >= 0 else output_links[failure]
+            queue.append(child)
+    return automaton
+
+
+def _automaton_step(automaton, state, token):
+    """Transisi goto + failure: state berikutnya setelah membaca `token`."""
+    indptr = automaton["indptr"]
+    edge_tokens = automaton["edge_tokens"]
+    failures = automaton["failures"]
+    while True:
+        lo, hi = indptr[state], indptr[state + 1]
+        position = bisect_left(edge_tokens, token, lo, hi)
+        if position < hi and edge_tokens[position] == token:
+            return automaton["edge_targets"][position]
+        if not state:
+            return 0
+        state = failures[state]
+
+
+def scan_title_automaton(automaton, tokens):
+    """
+    Scan urutan token id (kata di luar kosakata = -1) sekali jalan, linear
+    terhadap panjang teks. Return list (start, end, ordinal) setiap judul
+    katalog yang muncul; start/end = posisi kata.
+    """
+    outputs = automaton["outputs"]
+    output_links = automaton["output_links"]
+    depths = automaton["depths"]
+
+    matches = []
+    state = 0
+    for position, token in enumerate(tokens):
+        if token < 0:
+            # Kata yang tidak ada di judul mana pun memutus semua pola
+            state = 0
+            continue
+        state = _automaton_step(automaton, state, token)
+
+        match_state = state if outputs[state] >= 0 else output_links[state]
+        while match_state:
+            matches.append((position + 1 - depths[match_state], position + 1, outputs[match_state]))
+            match_state = output_links[match_state]
+    return matches
+
+
+def build_length_buckets(titles, title_lengths=None):
+    """
+    Kelompokkan ordinal judul berdasarkan panjang string (untuk pruning Layer 3).
+    `title_lengths` (mis. dari index TF-IDF) dipakai jika ada, tanpa membaca judul.
+    """
+    if title_lengths is None:
+        title_lengths = [len(title) for title in titles]
+    buckets = {}
+    for ordinal, length in enumerate(title_lengths):
+        buckets.setdefault(int(length), []).append(ordinal)
+
+    return {
+        "titles": titles,
+        "by_length": buckets
+    }
+
+
+def length_bounds(query_len, min_threshold):
+    """
+    Rentang panjang judul yang masih mungkin mencapai `min_threshold`.
+    Rasio SequenceMatcher dibatasi 2*min(la, lb) / (la + lb), jadi di luar
+    rentang ini skor penuh tidak perlu dihitung sama sekali.
+    """
+    if min_threshold <= 0:
+        return 0, float('inf')
+
+    # Epsilon kecil agar batas yang tepat sama dengan threshold tidak terbuang
+    min_len = math.ceil(query_len * min_threshold / (2 - min_threshold) - 1e-9)
+    max_len = math.floor(query_len * (2 - min_threshold) / min_threshold + 1e-9)
+    return min_len, max_len
+
+
+def find_length_candidates(length_buckets, query, min_threshold):
+    """
+    Kembalikan judul dari bucket panjang yang upper bound rasionya lolos
+    `min_threshold`, urut sesuai dict asli. Bisa dipakai tanpa index lain.
+    """
+    if not length_buckets or not query:
+        return []
+
+    min_len, max_len = length_bounds(len(query), min_threshold)
+    ordinals = []
+    for length, bucket in length_buckets["by_length"].items():
+        if min_len <= length <= max_len:
+            ordinals.extend(bucket)
+
+    titles = length_buckets["titles"]
+    return [titles[ordinal] for ordinal in sorted(ordinals)]
+
+
+def passes_quick_ratio(matcher, min_score, best_score=0.0):
+    """
+    Cek upper bound murah SequenceMatcher (real_quick_ratio lalu quick_ratio)
+    sebelum ratio() penuh. False berarti ratio() pasti < min_score atau
+    tidak mungkin melebihi best_score, sehingga kandidat aman dilewati.
+    """
+    for upper_bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+        bound = upper_bound()
+        if bound < min_score or bound <= best_score:
+            return False
+    return True
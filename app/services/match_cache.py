@@ -0,0 +1,18 @@
+from app.services.sqlite_cache import SQLiteLRUCache
+
+
+class MatchCache(SQLiteLRUCache):
+    """
+    Cache hasil matching jurnal di SQLite (persisten antar restart dan
+    dibagi antar proses). Key = query yang sudah dinormalisasi + versi
+    katalog, value = hasil per sumber (info atau None untuk no-match).
+    Entri yang paling lama tidak dipakai dibuang jika melebihi `max_entries`.
+    """
+
+    table = 'journal_matches'
+    key_column = 'query'
+    scope_column = 'catalog_version'
+    label = 'Journal match'
+
+    def __init__(self, path, max_entries=50000):
+        super().__init__(path, max_entries)
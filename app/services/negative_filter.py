@@ -0,0 +1,274 @@
+import atexit
+import hashlib
+import logging
+import math
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+BLOOM_MAGIC = b"RVBLOOM1"
+_HEADER = struct.Struct("<QII")  # jumlah bit, jumlah hash, jumlah item
+
+
+class BloomFilter:
+    """
+    Bloom filter sederhana (bytearray + double hashing blake2b).
+    `in` bisa false positive (dengan peluang ~error_rate) tapi tidak pernah
+    false negative.
+    """
+
+    def __init__(self, capacity, error_rate=1e-6, bit_count=None, hash_count=None, bits=None, count=0):
+        self.capacity = capacity
+        if bit_count is None:
+            bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        if hash_count is None:
+            hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+        self.count = count
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.bit_count
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def merge(self, other):
+        """OR-kan bit filter lain (parameter sama) ke filter ini."""
+        if (other.bit_count, other.hash_count) != (self.bit_count, self.hash_count):
+            return False
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        self.bits = bytearray(merged.to_bytes(len(self.bits), 'little'))
+        # Item yang sama bisa ada di kedua filter → perkiraan konservatif
+        self.count = max(self.count, other.count)
+        return True
+
+    def copy(self):
+        return BloomFilter(
+            self.capacity, bit_count=self.bit_count, hash_count=self.hash_count,
+            bits=bytearray(self.bits), count=self.count
+        )
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def save(self, path):
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(BLOOM_MAGIC)
+            f.write(_HEADER.pack(self.bit_count, self.hash_count, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, capacity):
+        with open(path, "rb") as f:
+            if f.read(len(BLOOM_MAGIC)) != BLOOM_MAGIC:
+                raise ValueError(f"{Path(path).name} is not a bloom filter file")
+            bit_count, hash_count, count = _HEADER.unpack(f.read(_HEADER.size))
+            bits = bytearray(f.read())
+        if len(bits) != (bit_count + 7) // 8:
+            raise ValueError(f"{Path(path).name} is truncated")
+        return cls(capacity, bit_count=bit_count, hash_count=hash_count, bits=bits, count=count)
+
+
+class NegativeFilterStore:
+    """
+    Bloom filter query yang tidak match di sumber mana pun, satu filter
+    (dan file `negative_<versi>.bloom`) per versi katalog. Beberapa versi
+    bisa aktif bersamaan; file versi yang sudah diganti dihapus lewat
+    `retire`. Filter yang berubah hanya ditandai dirty; file ditulis oleh
+    thread background tiap `flush_interval` detik (dan saat proses keluar),
+    bukan di jalur request. Beberapa proses (worker) bisa berbagi folder
+    yang sama: penulisan file di-merge dengan isi file di bawah file lock.
+    """
+
+    def __init__(self, directory, capacity=100000, error_rate=1e-6, flush_interval=30):
+        self.directory = Path(directory)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Menyerialkan penulisan file (flush vs retire) tanpa menahan _lock
+        self._save_lock = threading.Lock()
+        self._filters = {}
+        self._dirty = set()
+        self._retired = {}  # versi yang diganti → versi penggantinya (file dihapus jika sudah usang)
+        self._flush_thread = None
+        self._stop_event = threading.Event()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, version):
+        return self.directory / f"negative_{version}.bloom"
+
+    @contextmanager
+    def _file_lock(self):
+        # Lock antar proses untuk baca-merge-tulis file filter
+        with open(self.directory / "negative.lock", "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _save_merged(self, version, bloom):
+        # Dipanggil dengan file lock: entri yang ditulis proses lain tidak hilang
+        path = self._path(version)
+        if path.exists():
+            try:
+                on_disk = BloomFilter.load(path, self.capacity)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Negative filter on disk unreadable, overwriting: {e}")
+            else:
+                # Filter di disk sudah penuh → filter ini penggantinya, jangan di-merge
+                if not on_disk.is_full:
+                    bloom.merge(on_disk)
+        bloom.save(path)
+
+    def _remove_outdated(self):
+        # Dipanggil dengan file lock: hapus file versi yang diganti hanya jika file
+        # versi penggantinya lebih baru (proses lain sudah tidak menulis versi lama)
+        for version, installed_version in list(self._retired.items()):
+            path = self._path(version)
+            try:
+                if not path.exists():
+                    del self._retired[version]
+                    continue
+                installed_path = self._path(installed_version)
+                if installed_path.exists() and path.stat().st_mtime < installed_path.stat().st_mtime:
+                    path.unlink()
+                    del self._retired[version]
+            except OSError:
+                pass
+
+    def _filter_for(self, version):
+        # Dipanggil dengan lock; muat dari file saat versi pertama kali dipakai
+        bloom = self._filters.get(version)
+        if bloom is None:
+            # Versi yang dipasang lagi (mis. CSV dikembalikan) → filenya jangan dihapus
+            self._retired.pop(version, None)
+            path = self._path(version)
+            if path.exists():
+                try:
+                    bloom = BloomFilter.load(path, self.capacity)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Negative filter load failed, starting empty: {e}")
+            if bloom is None:
+                bloom = BloomFilter(self.capacity, self.error_rate)
+            self._filters[version] = bloom
+        return bloom
+
+    def contains_many(self, queries, version):
+        """Return set query yang (kemungkinan besar) pernah tidak match sama sekali."""
+        with self._lock:
+            bloom = self._filter_for(version)
+            return {query for query in queries if query in bloom}
+
+    def add_many(self, queries, version):
+        queries = list(queries)
+        if not queries:
+            return
+        with self._lock:
+            bloom = self._filter_for(version)
+            # Filter penuh → mulai ulang agar false positive rate tetap rendah
+            if bloom.is_full:
+                bloom = self._filters[version] = BloomFilter(self.capacity, self.error_rate)
+            for query in queries:
+                bloom.add(query)
+            self._dirty.add(version)
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._start_flushing()
+
+    def flush(self):
+        """Tulis filter yang dirty ke file (snapshot diambil di bawah lock, tulis di luar lock)."""
+        with self._save_lock:
+            with self._lock:
+                snapshots = {version: self._filters[version].copy() for version in self._dirty}
+                self._dirty.clear()
+            if not snapshots and not self._retired:
+                return
+            try:
+                with self._file_lock():
+                    for version, bloom in snapshots.items():
+                        try:
+                            self._save_merged(version, bloom)
+                        except OSError as e:
+                            logger.warning(f"⚠️ Negative filter save failed (non-critical): {e}")
+                    self._remove_outdated()
+            except OSError as e:
+                logger.warning(f"⚠️ Negative filter lock failed, not saved (non-critical): {e}")
+
+    def _start_flushing(self):
+        with self._lock:
+            if self._flush_thread is not None:
+                return
+
+            def flush_periodically():
+                while not self._stop_event.wait(self.flush_interval):
+                    self.flush()
+
+            self._flush_thread = threading.Thread(target=flush_periodically, name='negative-filter-flush', daemon=True)
+            self._flush_thread.start()
+        # Thread daemon mati begitu saja saat exit → simpan sisa perubahan
+        atexit.register(self.flush)
+
+    def release(self, version):
+        """Simpan lalu lepas filter versi katalog dari memori (file tetap ada untuk dimuat ulang)."""
+        self.flush()
+        with self._lock:
+            if version not in self._dirty:
+                self._filters.pop(version, None)
+
+    def retire(self, version, installed_version=None):
+        """
+        Lepas filter versi katalog yang sudah diganti `installed_version`.
+        Filenya dihapus (sekarang atau saat flush berikutnya) setelah file
+        versi pengganti lebih baru, jadi proses lain yang masih memakai versi
+        lama tidak kehilangan filternya.
+        """
+        with self._save_lock:
+            with self._lock:
+                self._filters.pop(version, None)
+                self._dirty.discard(version)
+            if installed_version is None or installed_version == version:
+                return
+            self._retired[version] = installed_version
+            try:
+                with self._file_lock():
+                    self._remove_outdated()
+            except OSError:
+                pass
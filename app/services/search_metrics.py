@@ -0,0 +1,254 @@
+import threading
+
+# Jumlah shard counter; thread berbeda umumnya jatuh ke shard (dan lock) berbeda
+COUNTER_SHARDS = 16
+
+# Kapasitas sketch top queries (memori tetap, berapa pun query unik yang masuk)
+TOP_QUERIES_CAPACITY = 200
+
+# Layer matching yang dicatat (urutan = urutan di statistik)
+SEARCH_LAYERS = ('issn', 'cache', 'exact', 'negative_filter', 'word', 'abbreviation', 'spelling', 'fuzzy', 'no_match')
+
+
+class ShardedCounter:
+    """
+    Counter thread-safe dengan lock per shard. Setiap thread menulis ke
+    shard-nya sendiri sehingga increment jarang berebut lock yang sama;
+    pembacaan menjumlahkan semua shard.
+    """
+
+    def __init__(self, shards=COUNTER_SHARDS):
+        self._shards = [(threading.Lock(), {}) for _ in range(shards)]
+
+    def _shard(self):
+        # Thread id berupa alamat memori (kelipatan besar) → campur dulu bit-nya
+        ident = threading.get_ident()
+        return self._shards[((ident >> 4) ^ (ident >> 12)) % len(self._shards)]
+
+    def add(self, key, amount=1):
+        lock, counts = self._shard()
+        with lock:
+            counts[key] = counts.get(key, 0) + amount
+
+    def snapshot(self):
+        totals = {}
+        for lock, counts in self._shards:
+            with lock:
+                for key, value in counts.items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def clear(self):
+        for lock, counts in self._shards:
+            with lock:
+                counts.clear()
+
+
+class SpaceSavingTopK:
+    """
+    Heavy hitters (algoritma Space-Saving) dengan maksimal `capacity` entri.
+    Item baru saat penuh menggantikan item dengan hitungan terkecil, jadi
+    hitungan bisa sedikit berlebih (dibatasi `error`), tapi item yang benar-benar
+    sering muncul tidak pernah hilang.
+    """
+
+    def __init__(self, capacity=TOP_QUERIES_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._counts = {}  # item → [count, error]
+
+    def add(self, item, amount=1):
+        with self._lock:
+            entry = self._counts.get(item)
+            if entry is not None:
+                entry[0] += amount
+            elif len(self._counts) < self.capacity:
+                self._counts[item] = [amount, 0]
+            else:
+                victim = min(self._counts, key=lambda key: self._counts[key][0])
+                floor = self._counts.pop(victim)[0]
+                self._counts[item] = [floor + amount, floor]
+
+    def top(self, n=10):
+        with self._lock:
+            items = [(item, entry[0]) for item, entry in self._counts.items()]
+        return sorted(items, key=lambda x: x[1], reverse=True)[:n]
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class CatalogMetrics:
+    """
+    Metrik pencarian katalog: jumlah pencarian & match per sumber, top queries
+    (Space-Saving), hit per layer matching, dan latensi per layer.
+    """
+
+    def __init__(self, sources, top_k=TOP_QUERIES_CAPACITY):
+        self.sources = tuple(sources)
+        self._counters = ShardedCounter()
+        self._top_queries = {source: SpaceSavingTopK(top_k) for source in self.sources}
+
+    def record_search(self, source, query, found):
+        self._counters.add((source, 'total_searches'))
+        if found:
+            self._counters.add((source, 'matches_found'))
+        self._top_queries[source].add(query)
+
+    def record_layer_hit(self, source, layer):
+        self._counters.add((source, 'layer_hits', layer))
+
+    def record_layer_time(self, layer, seconds, query_count):
+        # Latensi dicatat per batch; rata-rata per query dihitung saat snapshot
+        self._counters.add(('layer_queries', layer), query_count)
+        self._counters.add(('layer_seconds', layer), seconds)
+
+    def snapshot(self, source, top_n=10):
+        counts = self._counters.snapshot()
+        layer_latency_ms = {}
+        for layer in SEARCH_LAYERS[:-1]:
+            queries = counts.get(('layer_queries', layer), 0)
+            seconds = counts.get(('layer_seconds', layer), 0.0)
+            layer_latency_ms[layer] = {
+                'queries': queries,
+                'total_ms': seconds * 1000,
+                'avg_ms': seconds * 1000 / queries if queries else 0.0
+            }
+
+        return {
+            'total_searches': counts.get((source, 'total_searches'), 0),
+            'matches_found': counts.get((source, 'matches_found'), 0),
+            'top_queries': self._top_queries[source].top(top_n),
+            'layer_hits': {
+                layer: counts.get((source, 'layer_hits', layer), 0)
+                for layer in SEARCH_LAYERS
+            },
+            'layer_latency_ms': layer_latency_ms
+        }
+
+    def clear(self):
+        self._counters.clear()
+        for sketch in self._top_queries.values():
+            sketch.clear()
+
+
+class MatchTracer:
+    """
+    Trace matching per query (opt-in, satu instance per request): bentuk
+    ternormalisasi, layer penentu per sumber, jumlah kandidat yang diperiksa,
+    dan waktu per layer. Waktu kerja batch bersama (mis. pass NumPy kandidat)
+    dibagi rata ke query dalam batch tersebut.
+    """
+
+    def __init__(self):
+        self.traces = {}  # query ternormalisasi → trace
+        self.names = {}  # nama asli → query ternormalisasi
+        self._pending = {}  # query → sumber yang belum terselesaikan
+
+    def start(self, name, query, sources):
+        self.names[name] = query
+        if query not in self.traces:
+            self.traces[query] = {'normalized': query, 'resolved_by': {}, 'layers': {}, 'total_ms': 0.0}
+            self._pending[query] = set(sources)
+
+    def record(self, query, layer, seconds, candidates=0):
+        trace = self.traces.get(query)
+        if trace is None:
+            return
+        layer_trace = trace['layers'].setdefault(layer, {'ms': 0.0, 'candidates': 0})
+        layer_trace['ms'] += seconds * 1000
+        layer_trace['candidates'] += candidates
+        trace['total_ms'] += seconds * 1000
+
+    def record_shared(self, layer, queries, seconds):
+        if queries:
+            share = seconds / len(queries)
+            for query in queries:
+                self.record(query, layer, share)
+
+    def resolve(self, query, source, layer):
+        if source in self._pending.get(query, ()):
+            self._pending[query].discard(source)
+            self.traces[query]['resolved_by'][source] = layer
+
+    def resolve_pending(self, layer, pending):
+        """Sumber yang hilang dari `pending` sejak layer sebelumnya diselesaikan oleh `layer`."""
+        for query, remaining in self._pending.items():
+            if query in pending:
+                for source in remaining - set(pending[query]):
+                    self.resolve(query, source, layer)
+
+    def finish(self):
+        for query, remaining in self._pending.items():
+            for source in list(remaining):
+                self.resolve(query, source, 'no_match')
+
+    def for_name(self, name):
+        """Trace untuk satu nama asli (dibulatkan untuk response JSON), atau None."""
+        trace = self.traces.get(self.names.get(name))
+        if trace is None:
+            return None
+        return {
+            'normalized': trace['normalized'],
+            'resolved_by': dict(trace['resolved_by']),
+            'layers': {
+                layer: {'ms': round(layer_trace['ms'], 3), 'candidates': layer_trace['candidates']}
+                for layer, layer_trace in trace['layers'].items()
+            },
+            'total_ms': round(trace['total_ms'], 3)
+        }
+
+    def summary(self, slowest=5):
+        """Total level request: waktu & kandidat per layer, hitungan layer penentu, query paling lambat."""
+        layers = {}
+        resolved = {}
+        for trace in self.traces.values():
+            for layer, layer_trace in trace['layers'].items():
+                totals = layers.setdefault(layer, {'queries': 0, 'candidates': 0, 'ms': 0.0})
+                totals['queries'] += 1
+                totals['candidates'] += layer_trace['candidates']
+                totals['ms'] += layer_trace['ms']
+            for source, layer in trace['resolved_by'].items():
+                resolved.setdefault(source, {}).setdefault(layer, 0)
+                resolved[source][layer] += 1
+
+        slowest_traces = sorted(self.traces.values(), key=lambda trace: trace['total_ms'], reverse=True)[:slowest]
+        return {
+            'queries': len(self.traces),
+            'total_ms': round(sum(trace['total_ms'] for trace in self.traces.values()), 3),
+            'layers': {
+                layer: {**layers[layer], 'ms': round(layers[layer]['ms'], 3)}
+                for layer in SEARCH_LAYERS if layer in layers
+            },
+            'resolved_by': resolved,
+            'slowest': [
+                {'normalized': trace['normalized'], 'total_ms': round(trace['total_ms'], 3)}
+                for trace in slowest_traces
+            ]
+        }
+
+
+class _NullTracer:
+    """Tracer no-op saat tracing tidak diminta (hot path tanpa cabang tambahan)."""
+
+    def start(self, name, query, sources):
+        pass
+
+    def record(self, query, layer, seconds, candidates=0):
+        pass
+
+    def record_shared(self, layer, queries, seconds):
+        pass
+
+    def resolve(self, query, source, layer):
+        pass
+
+    def resolve_pending(self, layer, pending):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TRACER = _NullTracer()
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteLRUCache:
+    """
+    Cache JSON di SQLite (persisten antar restart dan dibagi antar proses).
+    Subclass menentukan nama tabel, kolom key dan (opsional) kolom scope,
+    mis. versi katalog: key yang sama di scope berbeda adalah entri berbeda.
+    Entri yang paling lama tidak dipakai dibuang jika melebihi `max_entries`.
+    """
+
+    table = None
+    key_column = None
+    scope_column = None
+    label = 'SQLite'
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        key_columns = [self.key_column] + ([self.scope_column] if self.scope_column else [])
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                + ''.join(f" {column} TEXT NOT NULL," for column in key_columns)
+                + " result TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                f" PRIMARY KEY ({', '.join(key_columns)}))"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_used ON {self.table} (last_used)")
+
+    def _connect(self):
+        # Satu koneksi per thread (SocketIO async_mode='threading')
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _scope_filter(self, scope):
+        if self.scope_column:
+            return f" AND {self.scope_column} = ?", [scope]
+        return "", []
+
+    def get_many(self, keys, scope=None):
+        """Return dict key → value untuk key yang ada di cache."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+
+        scope_sql, scope_params = self._scope_filter(scope)
+        try:
+            conn = self._connect()
+            # Batas jumlah parameter SQLite → key dibagi per potongan
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT {self.key_column}, result FROM {self.table} "
+                    f"WHERE {self.key_column} IN ({placeholders}){scope_sql}",
+                    [*chunk, *scope_params]
+                ).fetchall()
+                for key, result in rows:
+                    found[key] = json.loads(result)
+
+            if found:
+                now = time.time()
+                with self._write_lock, conn:
+                    conn.executemany(
+                        f"UPDATE {self.table} SET last_used = ? WHERE {self.key_column} = ?{scope_sql}",
+                        [(now, key, *scope_params) for key in found]
+                    )
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"⚠️ {self.label} cache read failed (non-critical): {e}")
+            return {}
+
+        return found
+
+    def put_many(self, results, scope=None):
+        """Simpan dict key → value lalu evict LRU jika melebihi batas."""
+        if not results:
+            return
+
+        columns = [self.key_column] + ([self.scope_column] if self.scope_column else []) + ['result', 'last_used']
+        scope_params = [scope] if self.scope_column else []
+        now = time.time()
+        try:
+            conn = self._connect()
+            with self._write_lock, conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    [
+                        (key, *scope_params, json.dumps(result, ensure_ascii=False, default=dict), now)
+                        for key, result in results.items()
+                    ]
+                )
+                (count,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE rowid IN ("
+                        f" SELECT rowid FROM {self.table} ORDER BY last_used LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ {self.label} cache write failed (non-critical): {e}")
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            with self._write_lock, conn:
+                conn.execute(f"DELETE FROM {self.table}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ {self.label} cache clear failed: {e}")
@@ -3,21 +3,84 @@ import re
 import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from flask_socketio import emit
 from flask import session
 from config import Config
-from app.services.ai_service import split_references_with_ai, analyze_references_with_ai
-from app.services.scimago_service import search_journal_in_scimago
-from app.services.scopus_service import search_journal_in_scopus
+from app.services.ai_service import split_references_with_ai, analyze_references_with_ai, analyze_references_block_with_ai
+from app.services.journal_catalog import (
+    search_journals_batch,
+    search_journals_by_issn,
+    scan_reference_titles,
+    choose_scanned_title,
+    parse_issns,
+    issn_trace_key,
+    default_catalog_year
+)
+from app.services.search_metrics import MatchTracer
+from app.services.catalog_loader import is_catalog_ready, wait_for_catalog, available_catalog_years
 from app.services.pdf_service import extract_references_from_pdf
 from app.services.docx_service import extract_references_from_docx
 from app.services.bibtex_service import generate_bibtex, generate_correct_format_example
-from app.utils.text_utils import find_references_section
+from app.utils.text_utils import find_references_section, split_references_locally
 
 logger = logging.getLogger(__name__)
 
+CATALOG_NOT_READY_MESSAGE = "Maaf, database ScimagoJR & Scopus belum selesai dimuat. Mohon coba lagi beberapa saat lagi."
+
+# Scan judul katalog di teks referensi berjalan selagi menunggu respons AI
+_REFERENCE_SCAN_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='reference-scan')
+
+
+def _wait_for_catalog_stage(catalog_year, emit_progress, step, progress):
+    """Gate tahap matching database. Return pesan error, atau None jika katalog siap."""
+    if catalog_year is not None and catalog_year not in available_catalog_years():
+        return f"Maaf, database ScimagoJR & Scopus tahun {catalog_year} tidak tersedia."
+    # Tunggu hanya jika load background (atau katalog tahun yang di-pin) belum selesai
+    if not is_catalog_ready(catalog_year):
+        emit_progress(step, 'Menunggu database ScimagoJR & Scopus selesai dimuat...', progress)
+    if not wait_for_catalog(catalog_year=catalog_year):
+        return CATALOG_NOT_READY_MESSAGE
+    return None
+
+
+def _start_reference_scan(references_list, catalog_year):
+    """Mulai scan teks referensi di background (hanya jika katalog sudah siap). Return Future atau None."""
+    if not is_catalog_ready(catalog_year):
+        return None
+    return _REFERENCE_SCAN_EXECUTOR.submit(scan_reference_titles, list(references_list), catalog_year)
+
+
+def _reference_scan_result(reference_scan):
+    """Hasil scan background, atau [] (tanpa koreksi judul dari scan) jika scan gagal."""
+    try:
+        return reference_scan.result()
+    except Exception as e:
+        logger.warning(f"⚠️ Reference title scan failed, matching without scan: {e}")
+        return []
+
+
+def _create_tracer(params):
+    """MatchTracer untuk request ini jika tracing diminta (form 'match_trace' atau Config)."""
+    if params.get('match_trace') or Config.MATCH_TRACE_ENABLED:
+        return MatchTracer()
+    return None
+
+
+def _reference_match_trace(tracer, result_json, matched_by):
+    """Trace matching satu referensi: lookup ISSN dan/atau judul jurnal."""
+    issns = parse_issns(result_json.get('parsed_issn'))
+    journal_name = result_json.get('parsed_journal')
+    trace = {
+        'matched_by': matched_by,
+        'issn': tracer.for_name(issn_trace_key(issns)) if issns else None,
+        'title': tracer.for_name(journal_name) if journal_name else None
+    }
+    trace['total_ms'] = round(sum(part['total_ms'] for part in (trace['issn'], trace['title']) if part), 3)
+    return trace
+
 
 def get_cache_dir():
     """Get cache directory path dynamically"""
@@ -106,6 +169,7 @@ def revalidate_from_cache(file_hash, params, socketio=None, session_id=None):
     year_range = params.get('year_range', Config.REFERENCE_YEAR_THRESHOLD)
     journal_percent_threshold = params.get('journal_percent', Config.JOURNAL_PROPORTION_THRESHOLD)
     style = params.get('style', 'APA')
+    catalog_year = params.get('catalog_year')
     
     # Validate count with new parameters
     count = len(references_list)
@@ -123,13 +187,21 @@ def revalidate_from_cache(file_hash, params, socketio=None, session_id=None):
     
     emit_progress('revalidate', 'Menerapkan parameter validasi baru...', 60)
     
+    # Matching butuh katalog; tunggu hanya jika load background belum selesai
+    catalog_error = _wait_for_catalog_stage(catalog_year, emit_progress, 'revalidate', 65)
+    if catalog_error:
+        return {"error": catalog_error}
+    
     # Reprocess with new year_range (need to revalidate year validity)
+    tracer = _create_tracer(params)
     detailed_results = _process_ai_response(
         batch_results_json, 
         references_list, 
         style, 
         detected_style, 
-        year_range
+        year_range,
+        catalog_year,
+        tracer=tracer
     )
     
     emit_progress('revalidate', 'Menyusun hasil validasi...', 85)
@@ -147,14 +219,18 @@ def revalidate_from_cache(file_hash, params, socketio=None, session_id=None):
     
     logger.info(f"🚀 Fast revalidation completed in <2s using cache")
     
-    return {
+    result = {
         "success": True,
         "summary": summary,
         "detailed_results": detailed_results,
         "recommendations": recommendations,
         "year_range": year_range,
+        "catalog_year": catalog_year or default_catalog_year(),
         "from_cache": True
     }
+    if tracer is not None:
+        result["match_trace"] = tracer.summary()
+    return result
 
 
 def process_validation_request(request, saved_file_stream=None, socketio=None, session_id=None):
@@ -193,7 +269,17 @@ def process_validation_request(request, saved_file_stream=None, socketio=None, s
         'min_ref_count': request.form.get('min_ref_count', Config.MIN_REFERENCE_COUNT, type=int),
         'style': request.form.get('style', 'APA'),
         'year_range': request.form.get('year_range', Config.REFERENCE_YEAR_THRESHOLD, type=int),
-        'journal_percent': request.form.get('journal_percent', Config.JOURNAL_PROPORTION_THRESHOLD, type=float)
+        'journal_percent': request.form.get('journal_percent', Config.JOURNAL_PROPORTION_THRESHOLD, type=float),
+        # Pin tahun katalog (opsional); default = katalog terbaru
+        'catalog_year': request.form.get('catalog_year', None, type=int),
+        # Trace matching per referensi (opsional, untuk diagnosa request lambat)
+        'match_trace': request.form.get('match_trace', 'false').lower() in ('1', 'true', 'yes'),
+        # Socket.IO sid klien → tujuan event reference_result (hasil per referensi)
+        'socket_id': request.form.get('socket_id') or None,
+        # Id request dari klien, dikirim balik di reference_result agar event request lama diabaikan
+        'request_id': request.form.get('request_id') or None,
+        # Split + deteksi gaya + analisis dalam satu panggilan AI (opsional)
+        'single_pass': request.form.get('single_pass', str(Config.AI_SINGLE_PASS_ENABLED)).lower() in ('1', 'true', 'yes')
     }
     
     # Check if we can use cached results
@@ -221,13 +307,24 @@ def process_validation_request(request, saved_file_stream=None, socketio=None, s
     emit_progress('extract', 'Berhasil mengekstrak teks referensi', 20)
     
     try:
-        # Step 2: Split references with AI
-        emit_progress('split', 'Memisahkan entri referensi dengan AI...', 30)
-        
-        # Langkah 2: AI Call #1 - Split references
-        references_list, error = split_references_with_ai(references_block)
-        if error:
-            return {"error": error}
+        # Mode single-pass: satu panggilan AI menggantikan split + deteksi gaya + analisis
+        batch_results_json = None
+        if params['single_pass'] and len(references_block) <= Config.AI_SINGLE_PASS_MAX_CHARS:
+            emit_progress('split', 'Memisahkan & menganalisis referensi dengan AI (satu panggilan)...', 30)
+            single_pass_refs, single_pass_results, single_pass_style, error = analyze_references_block_with_ai(
+                references_block, params['style'], params['year_range']
+            )
+            if not error:
+                references_list, batch_results_json, detected_style = single_pass_refs, single_pass_results, single_pass_style
+        
+        # Step 2: Split references (lokal dulu, AI jika confidence rendah)
+        if batch_results_json is None:
+            emit_progress('split', 'Memisahkan entri referensi...', 30)
+            
+            # Langkah 2: AI Call #1 - Split references
+            references_list, error = _split_references(references_block)
+            if error:
+                return {"error": error}
         
         if not references_list:
             return {"error": "Maaf, AI tidak dapat mengidentifikasi entri referensi individual dari teks yang diberikan. Mohon pastikan format daftar pustaka Anda jelas dan dapat dibaca."}
@@ -264,18 +361,68 @@ def process_validation_request(request, saved_file_stream=None, socketio=None, s
         # Step 3: Analyze references with AI
         emit_progress('analyze', f'Menganalisis {total_refs} referensi dengan AI...', 50)
         
-        # Langkah 4: AI Call #2 - Analyze references
-        batch_results_json, detected_style, error = analyze_references_with_ai(references_list, style, year_range)
-        if error:
-            return {"error": error}
+        # Pre-match: scan judul katalog di teks referensi paralel dengan AI call
+        reference_scan = _start_reference_scan(references_list, params['catalog_year'])
+        
+        # Langkah 4: AI Call #2 - Analyze references (per potongan, paralel)
+        def on_chunk_analyzed(done, total, analyzed_refs):
+            emit_progress(
+                'analyze',
+                f'Menganalisis referensi dengan AI... ({analyzed_refs}/{total_refs} referensi)',
+                50 + int(20 * done / total)
+            )
+        
+        # Setiap referensi yang selesai di-stream AI langsung dicocokkan ke database
+        # dan dikirim ke klien (hanya jika katalog sudah siap sejak awal analisis)
+        tracer = _create_tracer(params)
+        streamed_results = {}
+        
+        def on_reference_analyzed(result_json, analyzed_style):
+            if reference_scan is None or not (socketio and params['socket_id']):
+                return
+            entry = _process_ai_response(
+                [result_json], references_list, style, analyzed_style, year_range, params['catalog_year'],
+                reference_scans=_reference_scan_result(reference_scan), tracer=tracer
+            )[0]
+            streamed_results[id(result_json)] = entry
+            socketio.emit('reference_result', {
+                'session_id': session_id,
+                'request_id': params['request_id'],
+                'result': entry,
+                'done': len(streamed_results),
+                'total': total_refs
+            }, to=params['socket_id'])
+        
+        if batch_results_json is None:
+            batch_results_json, detected_style, error = analyze_references_with_ai(
+                references_list, style, year_range,
+                progress_callback=on_chunk_analyzed, result_callback=on_reference_analyzed
+            )
+            if error:
+                return {"error": error}
         
         emit_progress('analyze', f'Selesai analisis AI', 70)
         
         # Step 4: Process and match with database
+        # Katalog dimuat paralel dengan split/analisis AI; tunggu di sini jika belum siap
+        catalog_error = _wait_for_catalog_stage(params['catalog_year'], emit_progress, 'validate', 75)
+        if catalog_error:
+            return {"error": catalog_error}
+        
         emit_progress('validate', 'Memvalidasi dengan database ScimagoJR & Scopus...', 80)
         
         # Langkah 5: Process AI response & match dengan Scimago
-        detailed_results = _process_ai_response(batch_results_json, references_list, style, detected_style, year_range)
+        # (referensi yang sudah diproses saat streaming tidak dicocokkan ulang)
+        pending_results = [result_json for result_json in batch_results_json if id(result_json) not in streamed_results]
+        processed_results = iter(_process_ai_response(
+            pending_results, references_list, style, detected_style, year_range, params['catalog_year'],
+            reference_scans=_reference_scan_result(reference_scan) if reference_scan is not None else None,
+            tracer=tracer
+        ))
+        detailed_results = [
+            streamed_results[id(result_json)] if id(result_json) in streamed_results else next(processed_results)
+            for result_json in batch_results_json
+        ]
         
         emit_progress('validate', 'Validasi database selesai', 90)
         
@@ -294,7 +441,9 @@ def process_validation_request(request, saved_file_stream=None, socketio=None, s
         emit_progress('complete', 'Validasi selesai!', 100)
         
         # Save to file-based cache for future fast revalidation
-        if file_hash:
+        # (tidak jika ada referensi gagal dianalisis AI: validasi ulang harus mencoba lagi)
+        analysis_failed = any(result_json.get('analysis_error') for result_json in batch_results_json)
+        if file_hash and not analysis_failed:
             cache_file = get_cache_file_path(file_hash)
             logger.info(f"[Cache Save] Attempting to save cache...")
             logger.info(f"[Cache Save] File hash: {file_hash}")
@@ -317,15 +466,19 @@ def process_validation_request(request, saved_file_stream=None, socketio=None, s
                 logger.error(f"❌ Failed to save cache: {e}", exc_info=True)
         
         # Sertakan year_range ke hasil agar PDF annotator dapat menggunakannya
-        return {
+        result = {
             "success": True,
             "summary": summary,
             "detailed_results": detailed_results,
             "recommendations": recommendations,
             "year_range": year_range,
+            "catalog_year": params['catalog_year'] or default_catalog_year(),
             "from_cache": False,
             "file_hash": file_hash  # Return hash for session storage
         }
+        if tracer is not None:
+            result["match_trace"] = tracer.summary()
+        return result
 
     except Exception as e:
         logger.error(f"Error kritis saat pemrosesan AI: {e}", exc_info=True)
@@ -368,15 +521,130 @@ def _get_references_from_request(request, file_stream=None):
     return None, "Maaf, tidak ada file atau teks yang diberikan. Mohon pilih file PDF/DOCX atau masukkan teks referensi secara manual."
 
 
-def _process_ai_response(batch_results_json, references_list, original_style, detected_style, year_range):
+def _split_references(references_block):
+    # Daftar bernomor / APA yang rapi dipisah lokal → hemat satu round trip AI
+    if Config.LOCAL_SPLIT_ENABLED:
+        references_list, confidence = split_references_locally(references_block)
+        if references_list and confidence >= Config.LOCAL_SPLIT_MIN_CONFIDENCE:
+            logger.info(f"✅ {len(references_list)} referensi dipisahkan lokal (confidence {confidence:.2f})")
+            return references_list, None
+        logger.info(f"🔄 Confidence split lokal rendah ({confidence:.2f}), memakai AI splitter")
+    return split_references_with_ai(references_block)
+
+
+def _analysis_error_result(result_json, ref_num, ref_text):
+    """Entri hasil untuk referensi yang gagal dianalisis AI (tanpa matching database & BibTeX)."""
+    return {
+        "reference_number": ref_num,
+        "reference_text": ref_text,
+        "raw_reference": result_json.get('raw_reference_text', ref_text),
+        "full_reference": result_json.get('full_reference', ref_text),
+        "status": "error",
+        "reference_type": result_json.get('reference_type', 'other'),
+        "parsed_year": None,
+        "parsed_journal": None,
+        "parsed_issn": None,
+        "parsed_doi": None,
+        "matched_by": None,
+        "overall_score": 0,
+        "is_indexed": False,
+        "is_indexed_scimago": False,
+        "is_indexed_scopus": False,
+        "scimago_link": None,
+        "scopus_link": None,
+        "quartile": None,
+        "validation_details": {
+            "format_correct": False,
+            "complete": False,
+            "year_recent": False,
+        },
+        "missing_elements": [],
+        "feedback": result_json.get('feedback', 'AI gagal menganalisis referensi ini.'),
+        "format_example": None,
+        "bibtex_available": False,
+        "bibtex_partial": False,
+        "bibtex_warning": None,
+        "bibtex_string": None
+    }
+
+
+def _process_ai_response(batch_results_json, references_list, original_style, detected_style, year_range, catalog_year=None,
+                         reference_scans=None, tracer=None):
     detailed_results = []
     
     ACCEPTED_SCIMAGO_TYPES = {'journal', 'book series', 'trade journal', 'conference and proceeding'}
+    DATABASE_REF_TYPES = {'journal', 'conference', 'book series'}
+
+    # Cocokkan semua referensi sekaligus sebelum loop per referensi:
+    # ISSN/eISSN dulu (lookup exact), sisanya lewat title matching (satu batch)
+    database_refs = [
+        index for index, result_json in enumerate(batch_results_json)
+        if result_json.get('reference_type', 'other') in DATABASE_REF_TYPES
+        and (result_json.get('parsed_journal') or result_json.get('parsed_issn'))
+    ]
+    issn_matches = search_journals_by_issn(
+        [batch_results_json[index].get('parsed_issn') for index in database_refs], catalog_year=catalog_year,
+        tracer=tracer
+    )
+    issn_matches_by_index = {
+        index: match for index, match in zip(database_refs, issn_matches) if match is not None
+    }
+    catalog_matches_by_index = {
+        index: (match, 'issn') for index, match in issn_matches_by_index.items()
+        if all(found for found, _ in match.values())
+    }
+    # ISSN hanya ada di sebagian sumber (mis. eISSN hanya tercatat di Scopus) →
+    # sumber lainnya tetap dicari lewat title matching
+    partial_issn_refs = [index for index in issn_matches_by_index if index not in catalog_matches_by_index]
+    title_refs = [
+        index for index in database_refs
+        if index not in catalog_matches_by_index and batch_results_json[index].get('parsed_journal')
+    ]
+    title_matches = search_journals_batch(
+        [batch_results_json[index]['parsed_journal'] for index in title_refs], catalog_year=catalog_year,
+        tracer=tracer
+    )
+    for index in title_refs:
+        catalog_matches_by_index[index] = (title_matches[batch_results_json[index]['parsed_journal']], 'title')
+
+    # Koreksi parsed_journal dengan judul katalog yang benar-benar muncul di teks
+    # referensi (AI memotong/menambah kata pada nama jurnal)
+    if title_refs and reference_scans is None:
+        reference_scans = scan_reference_titles(references_list, catalog_year=catalog_year)
+    for index in title_refs:
+        result_json = batch_results_json[index]
+        ref_num = result_json.get('reference_number', 0)
+        if not 0 < ref_num <= len(reference_scans):
+            continue
+        title_match = catalog_matches_by_index[index][0]
+        scanned = choose_scanned_title(
+            reference_scans[ref_num - 1],
+            result_json['parsed_journal'],
+            parsed_title=result_json.get('parsed_title'),
+            parsed_matched=any(found for found, _ in title_match.values())
+        )
+        if scanned is not None:
+            logger.debug(f"✅ TEXT SCAN: '{result_json['parsed_journal']}' → '{scanned[2]}'")
+            catalog_matches_by_index[index] = (scanned[3], 'text_scan')
 
-    for result_json in batch_results_json:
+    for index in partial_issn_refs:
+        issn_match = issn_matches_by_index[index]
+        title_match, title_matched_by = catalog_matches_by_index.get(index, ({}, None))
+        merged = {
+            source: issn_match[source] if issn_match[source][0] else title_match.get(source, (False, None))
+            for source in issn_match
+        }
+        filled = any(merged[source][0] and not issn_match[source][0] for source in merged)
+        catalog_matches_by_index[index] = (merged, f"issn+{title_matched_by}" if filled else 'issn')
+
+    for index, result_json in enumerate(batch_results_json):
         ref_num = result_json.get("reference_number", 0)
         ref_text = references_list[ref_num - 1] if 0 < ref_num <= len(references_list) else "Teks tidak ditemukan"
         
+        if result_json.get('analysis_error'):
+            detailed_results.append(_analysis_error_result(result_json, ref_num, ref_text))
+            continue
+        
         # Ambil full_reference dari AI response (untuk highlighting), fallback ke reference_list
         full_ref_text = result_json.get('full_reference', ref_text)
         
@@ -393,25 +661,29 @@ def _process_ai_response(batch_results_json, references_list, original_style, de
         quartile = None
         scimago_info = None
         scopus_info = None
+        matched_by = None
         
         # Search di Scimago database HANYA untuk tipe journal/conference
         # SKIP untuk website, report, atau organisasi
-        should_check_databases = journal_name and ref_type in {'journal', 'conference', 'book series'}
+        should_check_databases = index in catalog_matches_by_index
         
         if should_check_databases:
+            # Hasil katalog gabungan Scimago & Scopus dari lookup batch di atas
+            catalog_matches, matched_by = catalog_matches_by_index[index]
+            
             # Check Scimago
-            is_indexed_scimago, scimago_info = search_journal_in_scimago(journal_name)
+            is_indexed_scimago, scimago_info = catalog_matches['scimago']
             if is_indexed_scimago and scimago_info:
                 scimago_link = f"https://www.scimagojr.com/journalsearch.php?q={scimago_info['id']}&tip=sid"
                 quartile = scimago_info['quartile']
                 ref_type = scimago_info['type']
             
             # Check Scopus
-            is_indexed_scopus, scopus_info = search_journal_in_scopus(journal_name)
+            is_indexed_scopus, scopus_info = catalog_matches['scopus']
             if is_indexed_scopus and scopus_info:
                 # Format link Scopus yang benar menggunakan search parameter
                 source_id = scopus_info['id']
-                source_title = scopus_info.get('title', journal_name)
+                source_title = scopus_info.get('title', journal_name or '')
                 # Encode title untuk URL
                 import urllib.parse
                 encoded_title = urllib.parse.quote(source_title)
@@ -545,6 +817,9 @@ def _process_ai_response(batch_results_json, references_list, original_style, de
             "reference_type": ref_type,
             "parsed_year": parsed_year,
             "parsed_journal": journal_name,
+            "parsed_issn": result_json.get('parsed_issn'),
+            "parsed_doi": result_json.get('parsed_doi'),
+            "matched_by": matched_by if is_indexed_scimago or is_indexed_scopus else None,
             "overall_score": overall_score,
             "is_indexed": is_indexed,
             "is_indexed_scimago": is_indexed_scimago,
@@ -565,6 +840,8 @@ def _process_ai_response(batch_results_json, references_list, original_style, de
             "bibtex_warning": bibtex_warning,  # NEW: Warning untuk partial BibTeX
             "bibtex_string": bibtex_string  # NEW: BibTeX content untuk download
         })
+        if tracer is not None:
+            detailed_results[-1]["match_trace"] = _reference_match_trace(tracer, result_json, matched_by)
     
     return detailed_results
 
@@ -577,9 +854,14 @@ def _generate_summary_and_recommendations(
     min_ref_count=None
 ):
     total = len(detailed_results)
+    # Referensi yang gagal dianalisis tidak dihitung valid/invalid maupun jurnal
+    error_count = sum(1 for r in detailed_results if r['status'] == 'error')
+    analyzed = total - error_count
     valid_count = sum(1 for r in detailed_results if r['status'] == 'valid')
-    journal_count = sum(1 for r in detailed_results if r['reference_type'] == 'journal')
-    journal_percentage = (journal_count / total) * 100 if total > 0 else 0
+    journal_count = sum(
+        1 for r in detailed_results if r['status'] != 'error' and r['reference_type'] == 'journal'
+    )
+    journal_percentage = (journal_count / analyzed) * 100 if analyzed > 0 else 0
     meets_journal_req = journal_percentage >= journal_percent_threshold
     
     distribution = {
@@ -590,9 +872,9 @@ def _generate_summary_and_recommendations(
     summary = {
         "total_references": total,
         "valid_references": valid_count,
-        "invalid_references": total - valid_count,
-        "processing_errors": 0,
-        "validation_rate": round((valid_count / total) * 100, 1) if total > 0 else 0,
+        "invalid_references": analyzed - valid_count,
+        "processing_errors": error_count,
+        "validation_rate": round((valid_count / analyzed) * 100, 1) if analyzed > 0 else 0,
         "count_validation": count_validation,
         "distribution_analysis": distribution,
         "style_used": style,
@@ -1,11 +1,13 @@
 from app.utils.text_utils import (
     is_likely_reference,
     find_references_section,
-    collect_reference_markers
+    collect_reference_markers,
+    split_references_locally
 )
 
 __all__ = [
     'is_likely_reference',
     'find_references_section',
-    'collect_reference_markers'
+    'collect_reference_markers',
+    'split_references_locally'
 ]
@@ -3,6 +3,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+REFERENCE_HEADINGS = [
+    "daftar pustaka", "daftar referensi", "referensi",
+    "reference", "references", "bibliography", "pustaka rujukan"
+]
+
+# Penanda nomor referensi: [1], (1), 1.
+REFERENCE_MARKER_PATTERNS = [r'\[(\d+)\]', r'\((\d+)\)', r'(\d+)\.']
+
 
 def is_likely_reference(text):
     text = text.strip()
@@ -29,10 +37,6 @@ def is_likely_reference(text):
 
 
 def find_references_section(paragraphs):
-    REFERENCE_HEADINGS = [
-        "daftar pustaka", "daftar referensi", "referensi", 
-        "reference", "references", "bibliography", "pustaka rujukan"
-    ]
     STOP_HEADINGS = [
         "lampiran", "appendix", "biodata", 
         "curriculum vitae", "riwayat hidup"
@@ -110,8 +114,8 @@ def collect_reference_markers(words):
         t = str(w[4]).strip()
         m = None
         
-        for pat in [r'^\[(\d+)\]$', r'^\((\d+)\)$', r'^(\d+)\.$']:
-            m = re.match(pat, t)
+        for pat in REFERENCE_MARKER_PATTERNS:
+            m = re.match(f'^{pat}$', t)
             if m:
                 try:
                     num = int(m.group(1))
@@ -133,3 +137,135 @@ def collect_reference_markers(words):
         mk['next_y'] = mk_next_y
     
     return markers
+
+
+_LINE_MARKER_RE = [re.compile(rf'^{pat}\s+\S') for pat in REFERENCE_MARKER_PATTERNS]
+_MARKER_PREFIX_RE = [re.compile(rf'^{pat}\s+') for pat in REFERENCE_MARKER_PATTERNS]
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}[a-z]?\b|\bn\.\s?d\.', re.IGNORECASE)
+# Tahun "lepas" (bukan bagian range halaman 1999-2005, DOI 10.1016/j.x.2020.1, atau URL)
+_BARE_YEAR_RE = re.compile(r'(?<![\d\-–/.:])(19|20)\d{2}[a-z]?(?![\d\-–/])')
+_DOI_RE = re.compile(r'\b10\.\d{4,9}/')
+# Blok penulis (termasuk organisasi) langsung diikuti (tahun): "World Health Organization. (2020)"
+_AUTHOR_YEAR_START_RE = re.compile(r'^[A-Z][^()]{1,150}?\(((19|20)\d{2}[a-z]?|n\.\s?d\.)\)')
+# Penanda yang melompat lebih jauh dari ini dianggap bukan penanda ("2020." di awal baris)
+_MAX_MARKER_GAP = 5
+
+
+def _line_marker(line):
+    """Return (index pola, nomor) jika baris diawali penanda nomor referensi."""
+    for kind, pattern in enumerate(_LINE_MARKER_RE):
+        m = pattern.match(line)
+        if m:
+            return kind, int(m.group(1))
+    return None
+
+
+def _is_heading_line(line):
+    lower = line.lower().rstrip(':')
+    return len(line.split()) < 5 and any(h in lower for h in REFERENCE_HEADINGS)
+
+
+def _ends_entry(line):
+    # Baris terakhir referensi biasanya diakhiri titik atau DOI/URL
+    return line.endswith('.') or bool(re.search(r'(doi\.org|https?://)\S*$', line))
+
+
+def _starts_author_entry(line):
+    return (is_likely_reference(line) or bool(_AUTHOR_YEAR_START_RE.match(line))) and _line_marker(line) is None
+
+
+def _split_numbered(lines):
+    """
+    Entri baru di setiap baris berpenanda dengan nomor berikutnya ([1], [2], ...).
+    Return (entries, orphans, merged); merged = jumlah nomor yang terlewat
+    (penanda hilang → dua referensi tergabung dalam satu entri).
+    """
+    first = next((_line_marker(line) for line in lines if _line_marker(line)), None)
+    if not first:
+        return [], len(lines), 0
+    kind, expected = first
+    entries, orphans, merged = [], 0, 0
+    for line in lines:
+        marker = _line_marker(line)
+        # "2020." di awal baris lanjutan bukan penanda: nomor harus urut & pola sama
+        if marker and marker[0] == kind and expected <= marker[1] <= expected + _MAX_MARKER_GAP:
+            merged += marker[1] - expected
+            entries.append([line])
+            expected = marker[1] + 1
+        elif entries:
+            entries[-1].append(line)
+        else:
+            orphans += 1
+    return entries, orphans, merged
+
+
+def _split_by_author(lines):
+    """
+    Entri baru di baris berpola penulis (APA/Harvard) setelah entri sebelumnya lengkap.
+    Return (entries, orphans, merged); merged = baris berpola penulis yang terpaksa
+    digabung ke entri yang sudah selesai (mis. entri sebelumnya tanpa tahun).
+    """
+    entries, orphans, merged = [], 0, 0
+    for line in lines:
+        current = ' '.join(entries[-1]) if entries else ''
+        if _starts_author_entry(line):
+            if not entries or (_YEAR_RE.search(current) and _ends_entry(entries[-1][-1])):
+                entries.append([line])
+                continue
+            # Baris penulis lanjutan wajar hanya jika baris sebelumnya belum selesai ("Doe, A., &")
+            if _ends_entry(entries[-1][-1]):
+                merged += 1
+        if entries:
+            entries[-1].append(line)
+        else:
+            orphans += 1
+    return entries, orphans, merged
+
+
+def _entry_looks_merged(text):
+    # Dua tahun / DOI dalam satu entri → kemungkinan dua referensi tergabung
+    return len(_BARE_YEAR_RE.findall(text)) > 1 or len(_DOI_RE.findall(text)) > 1
+
+
+def _entry_confidence(entry):
+    text = ' '.join(entry)
+    if len(text) < 20 or len(text) > 1000 or not _YEAR_RE.search(text):
+        return 0.0
+    return 1.0
+
+
+def split_references_locally(references_block):
+    """
+    Pisahkan blok daftar pustaka tanpa AI: daftar bernomor ([1], (1), 1.)
+    atau gaya penulis-tahun (APA/Harvard), baris lanjutan digabung ke entri
+    sebelumnya. Seperti hasil AI splitter, setiap entri satu baris (spasi
+    dirapatkan) tanpa penanda nomor di depannya. Return (references_list,
+    confidence 0-1); confidence rendah berarti hasil sebaiknya diulang
+    dengan AI. Tanda entri tergabung (nomor terlewat, dua tahun/DOI dalam
+    satu entri, baris penulis di tengah entri) membuat confidence 0.
+    """
+    lines = [line.strip() for line in (references_block or '').splitlines() if line.strip()]
+    while lines and _is_heading_line(lines[0]):
+        lines.pop(0)
+    if not lines:
+        return [], 0.0
+
+    best_entries, best_confidence, numbered = [], 0.0, False
+    for splitter in (_split_numbered, _split_by_author):
+        entries, orphans, merged = splitter(lines)
+        if len(entries) < 2 or merged or any(_entry_looks_merged(' '.join(entry)) for entry in entries):
+            continue
+        complete = sum(_entry_confidence(entry) for entry in entries)
+        confidence = complete / (len(entries) + orphans)
+        if confidence > best_confidence:
+            best_entries, best_confidence, numbered = entries, confidence, splitter is _split_numbered
+
+    return [_entry_text(entry, numbered) for entry in best_entries], round(best_confidence, 3)
+
+
+def _entry_text(entry, numbered):
+    text = ' '.join(' '.join(entry).split())
+    if numbered:
+        kind = _line_marker(entry[0])[0]
+        text = _MARKER_PREFIX_RE[kind].sub('', text, count=1)
+    return text
@@ -0,0 +1,453 @@
+"""
+Benchmark matching jurnal (ScimagoJR + Scopus).
+
+Menjalankan corpus query berlabel (judul exact, singkatan, typo, nama
+konferensi, dan nama non-jurnal) terhadap katalog tahun default lalu
+melaporkan throughput, latensi p50/p95/p99 per layer yang menyelesaikan
+query, efek cache (match cache SQLite, negative filter, lru_cache), memori
+katalog, dan akurasi terhadap label.
+
+Keputusan match bisa disimpan (--save-decisions) lalu dibandingkan di run
+berikutnya (--compare) supaya optimasi tidak diam-diam mengubah hasil.
+
+    python benchmarks/journal_matching.py
+    python benchmarks/journal_matching.py --save-decisions before.json
+    python benchmarks/journal_matching.py --compare before.json --json report.json
+"""
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.catalog_loader import wait_for_catalog
+from app.services.catalog_registry import discover_datasets
+from app.services.journal_catalog import (
+    CATALOG_SOURCES,
+    COMMON_ABBREVIATIONS,
+    create_catalog,
+    default_catalog_year,
+    get_catalog,
+    select_best_match_from_list,
+    search_cache_info,
+    clear_search_cache
+)
+from app.services.match_cache import MatchCache
+from app.services.negative_filter import NegativeFilterStore
+from app.services.scimago_service import search_journal_in_scimago, read_scimago_data
+from app.services.scopus_service import search_journal_in_scopus, read_scopus_data
+from app.services.search_metrics import CatalogMetrics, SEARCH_LAYERS
+
+CATEGORIES = ('exact', 'abbreviation', 'typo', 'conference', 'non_journal')
+
+# Sumber referensi yang bukan jurnal/konferensi (seharusnya tidak match)
+NON_JOURNAL_NAMES = [
+    "World Health Organization", "Badan Pusat Statistik", "Kementerian Kesehatan Republik Indonesia",
+    "Kementerian Pendidikan dan Kebudayaan", "Wikipedia", "GitHub Repository", "Stack Overflow",
+    "Medium Blog Post", "Kompas.com", "Detik.com", "CNN Indonesia", "The New York Times",
+    "BBC News", "Google Scholar", "YouTube Video", "Universitas Indonesia", "Institut Teknologi Bandung",
+    "Skripsi Universitas Gadjah Mada", "Tesis Program Magister", "Laporan Tahunan Bank Indonesia",
+    "Undang-Undang Republik Indonesia Nomor 11 Tahun 2008", "Peraturan Pemerintah Nomor 71",
+    "Python Software Foundation Documentation", "Microsoft Docs", "Amazon Web Services Whitepaper",
+    "United Nations Development Programme Report", "Oxford University Press", "Penerbit Andi Yogyakarta",
+    "Erlangga", "Gramedia Pustaka Utama", "Personal Communication", "Unpublished Manuscript",
+    "Towards Data Science", "Towards Data Science Blog", "Kaggle Dataset", "Statista",
+    "McKinsey Global Institute", "Harvard Business Review Blog", "IEEE Spectrum Online", "Tribun News",
+]
+
+# Kebalikan COMMON_ABBREVIATIONS: kata lengkap → singkatan bertitik pertama
+ABBREVIATIONS = {}
+for _abbreviation, _word in COMMON_ABBREVIATIONS.items():
+    if _abbreviation.endswith('.'):
+        ABBREVIATIONS.setdefault(_word, _abbreviation)
+
+
+def _expected_titles(entry):
+    return {
+        source: select_best_match_from_list(entry[source])['title'] if entry[source] is not None else None
+        for source in CATALOG_SOURCES
+    }
+
+
+def _original_title(entry):
+    for source in CATALOG_SOURCES:
+        if entry[source] is not None:
+            return select_best_match_from_list(entry[source])['title']
+    return None
+
+
+def _abbreviate(title, rng):
+    words = title.split()
+    abbreviated = []
+    for word in words:
+        lower = word.lower()
+        if lower in ABBREVIATIONS:
+            abbreviated.append(ABBREVIATIONS[lower].capitalize())
+        elif len(lower) >= 8 and lower.isalpha() and rng.random() < 0.5:
+            # Gaya ISO 4: potong kata panjang + titik (mis. "Comput.")
+            abbreviated.append(word[:rng.randint(4, 6)] + '.')
+        else:
+            abbreviated.append(word)
+    return ' '.join(abbreviated) if abbreviated != words else None
+
+
+def _add_typo(title, rng):
+    words = title.split()
+    positions = [i for i, word in enumerate(words) if len(word) >= 6 and word.isalpha()]
+    if not positions:
+        return None
+    i = rng.choice(positions)
+    word = words[i]
+    j = rng.randrange(1, len(word) - 1)
+    operation = rng.choice(('swap', 'delete', 'substitute', 'duplicate'))
+    if operation == 'swap':
+        word = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    elif operation == 'delete':
+        word = word[:j] + word[j + 1:]
+    elif operation == 'substitute':
+        word = word[:j] + rng.choice('abcdefghijklmnopqrstuvwxyz'.replace(word[j].lower(), '')) + word[j + 1:]
+    else:
+        word = word[:j] + word[j] + word[j:]
+    words[i] = word
+    return ' '.join(words)
+
+
+def generate_corpus(catalog, per_category=200, seed=0):
+    """
+    Corpus berlabel dari katalog itu sendiri. Return list
+    {'query', 'category', 'expected': {sumber: judul|None}}.
+    """
+    rng = random.Random(seed)
+    entries = [catalog.entries[title] for title in sorted(catalog.entries)]
+    conferences = [
+        entry for entry in entries
+        if entry['scimago'] is not None and entry['scimago']['type'] == 'conference and proceeding'
+    ]
+    no_match = {source: None for source in CATALOG_SOURCES}
+
+    def sample(pool, make_query):
+        items, seen = [], set()
+        for entry in rng.sample(pool, min(len(pool), per_category * 3)):
+            query = make_query(_original_title(entry))
+            if query and query not in seen:
+                seen.add(query)
+                items.append((query, _expected_titles(entry)))
+            if len(items) == per_category:
+                break
+        return items
+
+    corpus = []
+    for category, pool, make_query in (
+        ('exact', entries, lambda title: title),
+        ('abbreviation', entries, lambda title: _abbreviate(title, rng)),
+        ('typo', entries, lambda title: _add_typo(title, rng)),
+        ('conference', conferences, lambda title: title),
+    ):
+        corpus.extend(
+            {'query': query, 'category': category, 'expected': expected}
+            for query, expected in sample(pool, make_query)
+        )
+    corpus.extend(
+        {'query': name, 'category': 'non_journal', 'expected': no_match}
+        for name in NON_JOURNAL_NAMES[:per_category]
+    )
+    return corpus
+
+
+class LayerRecorder(CatalogMetrics):
+    """Metrik katalog yang juga mengingat layer hit sejak reset terakhir."""
+
+    def __init__(self):
+        super().__init__(CATALOG_SOURCES)
+        self.hits = []
+
+    def record_layer_hit(self, source, layer):
+        super().record_layer_hit(source, layer)
+        self.hits.append(layer)
+
+
+def _percentiles(seconds):
+    if not seconds:
+        return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {'count': len(seconds), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def _decision(results):
+    return {
+        source: results[source][1]['title'] if results[source][0] else None
+        for source in CATALOG_SOURCES
+    }
+
+
+def run_per_query(catalog, recorder, queries):
+    """Satu search_many per query. Return (keputusan, layer penentu, latensi)."""
+    decisions, layers, latencies = [], [], []
+    for query in queries:
+        recorder.hits.clear()
+        started = time.perf_counter()
+        results = catalog.search_many([query])[query]
+        latencies.append(time.perf_counter() - started)
+        decisions.append(_decision(results))
+        # Layer terdalam yang dicapai (sumber yang tidak match → 'no_match')
+        layers.append(max(recorder.hits, key=SEARCH_LAYERS.index) if recorder.hits else 'no_match')
+    return decisions, layers, latencies
+
+
+def benchmark_layers(catalog, recorder, corpus):
+    queries = [item['query'] for item in corpus]
+    decisions, layers, latencies = run_per_query(catalog, recorder, queries)
+
+    by_layer = {}
+    for layer, seconds in zip(layers, latencies):
+        by_layer.setdefault(layer, []).append(seconds)
+
+    started = time.perf_counter()
+    batch_results = catalog.search_many(queries)
+    batch_seconds = time.perf_counter() - started
+    batch_decisions = [_decision(batch_results[query]) for query in queries]
+
+    return decisions, layers, {
+        'per_query': {
+            'queries': len(queries),
+            'throughput_qps': len(queries) / sum(latencies),
+            'overall': _percentiles(latencies),
+            'by_layer': {layer: _percentiles(by_layer[layer]) for layer in SEARCH_LAYERS if layer in by_layer}
+        },
+        'batch': {
+            'seconds': batch_seconds,
+            'throughput_qps': len(queries) / batch_seconds,
+            'matches_per_query_path': batch_decisions == decisions
+        }
+    }
+
+
+def benchmark_caches(catalog, recorder, corpus, cache_dir):
+    """Latensi sebelum & sesudah match cache / negative filter terisi, plus lru_cache API publik."""
+    queries = [item['query'] for item in corpus]
+    non_journal = [item['query'] for item in corpus if item['category'] == 'non_journal']
+
+    catalog.match_cache = MatchCache(str(Path(cache_dir) / 'journal_matches.sqlite3'))
+    _, _, cold = run_per_query(catalog, recorder, queries)
+    _, warm_layers, warm = run_per_query(catalog, recorder, queries)
+    catalog.match_cache = None
+
+    catalog.negative_filter = NegativeFilterStore(Path(cache_dir) / 'negative')
+    _, _, negative_cold = run_per_query(catalog, recorder, non_journal)
+    _, _, negative_warm = run_per_query(catalog, recorder, non_journal)
+    catalog.negative_filter = None
+
+    # API publik: lru_cache di depan katalog (Scimago & Scopus berbagi satu lookup)
+    clear_search_cache()
+    api_passes = []
+    for _ in range(2):
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            search_journal_in_scimago(query)
+            search_journal_in_scopus(query)
+            latencies.append(time.perf_counter() - started)
+        api_passes.append(_percentiles(latencies))
+    cache_info = search_cache_info()
+    clear_search_cache()
+
+    return {
+        'match_cache': {
+            'cold': _percentiles(cold),
+            'warm': _percentiles(warm),
+            'warm_hit_rate': warm_layers.count('cache') / max(1, len(warm_layers))
+        },
+        'negative_filter': {
+            'cold': _percentiles(negative_cold),
+            'warm': _percentiles(negative_warm)
+        },
+        'lru_cache': {
+            'first_pass': api_passes[0],
+            'second_pass': api_passes[1],
+            'hits': cache_info.hits,
+            'misses': cache_info.misses
+        }
+    }
+
+
+def measure_catalog_memory(catalog_year):
+    """Bangun ulang katalog tahun default di bawah tracemalloc (data + semua index)."""
+    dataset = discover_datasets().get(catalog_year)
+    if dataset is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    catalog = create_catalog()
+    scimago = read_scimago_data(dataset['scimago'])
+    if scimago is not None:
+        catalog.add_source('scimago', scimago['by_cleaned_title'], by_issn=scimago.get('by_issn'))
+    scopus = read_scopus_data(dataset['scopus']) if dataset['scopus'] else None
+    if scopus is not None:
+        catalog.add_source('scopus', scopus['by_cleaned_title'], by_issn=scopus.get('by_issn'))
+    del scimago, scopus
+    catalog.build_indexes()
+    build_seconds = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'build_seconds': build_seconds,
+        'resident_mb': (current - baseline) / 1e6,
+        'peak_mb': (peak - baseline) / 1e6,
+        'titles': len(catalog.entries)
+    }
+
+
+def accuracy_report(corpus, decisions):
+    report = {}
+    for category in CATEGORIES + ('all',):
+        items = [
+            (item, decision) for item, decision in zip(corpus, decisions)
+            if category == 'all' or item['category'] == category
+        ]
+        if not items:
+            continue
+        checks = [
+            decision[source] == item['expected'][source]
+            for item, decision in items for source in CATALOG_SOURCES
+        ]
+        report[category] = {
+            'queries': len(items),
+            'accuracy': sum(checks) / len(checks),
+            'fully_correct': sum(decision == item['expected'] for item, decision in items) / len(items)
+        }
+    return report
+
+
+def compare_decisions(path, corpus, decisions):
+    previous = {row['query']: row['decision'] for row in json.loads(Path(path).read_text(encoding='utf-8'))}
+    changed = [
+        {'query': item['query'], 'before': previous[item['query']], 'after': decision}
+        for item, decision in zip(corpus, decisions)
+        if item['query'] in previous and previous[item['query']] != decision
+    ]
+    return {'compared': sum(item['query'] in previous for item in corpus), 'changed': changed}
+
+
+def print_report(report):
+    print(f"\n📚 Catalog {report['catalog_year']} — {report['corpus_size']} queries")
+
+    memory = report.get('memory')
+    if memory:
+        print(
+            f"💾 Memory: {memory['resident_mb']:.1f} MB resident, {memory['peak_mb']:.1f} MB peak, "
+            f"build {memory['build_seconds']:.1f}s ({memory['titles']} titles)"
+        )
+
+    per_query = report['layers']['per_query']
+    batch = report['layers']['batch']
+    print(f"\nThroughput: {per_query['throughput_qps']:.0f} q/s per query, {batch['throughput_qps']:.0f} q/s batch")
+    print(f"{'layer':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(per_query['by_layer'].items()) + [('overall', per_query['overall'])]
+    for layer, stats in rows:
+        print(f"{layer:<16}{stats['count']:>7}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    if not batch['matches_per_query_path']:
+        print("⚠️ Batch decisions differ from per-query decisions")
+
+    caches = report.get('caches')
+    if caches:
+        print("\nCache effects (p50 / p95 ms):")
+        for name, cold_key, warm_key in (
+            ('match_cache', 'cold', 'warm'),
+            ('negative_filter', 'cold', 'warm'),
+            ('lru_cache', 'first_pass', 'second_pass')
+        ):
+            cold, warm = caches[name][cold_key], caches[name][warm_key]
+            print(
+                f"  {name:<16} {cold['p50_ms']:.3f} / {cold['p95_ms']:.3f} → "
+                f"{warm['p50_ms']:.3f} / {warm['p95_ms']:.3f}"
+            )
+
+    print(f"\n{'category':<14}{'queries':>9}{'accuracy':>10}{'correct':>10}")
+    for category, stats in report['accuracy'].items():
+        print(f"{category:<14}{stats['queries']:>9}{stats['accuracy']:>10.1%}{stats['fully_correct']:>10.1%}")
+
+    comparison = report.get('comparison')
+    if comparison:
+        status = "✅" if not comparison['changed'] else "❌"
+        print(f"\n{status} {len(comparison['changed'])} changed decisions of {comparison['compared']} compared")
+        for change in comparison['changed'][:20]:
+            print(f"  {change['query']!r}: {change['before']} → {change['after']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark journal matching (ScimagoJR + Scopus)")
+    parser.add_argument('--per-category', type=int, default=200, help="queries per generated category")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--labels', help="labelled corpus JSON (list of {query, category, expected})")
+    parser.add_argument('--write-labels', help="write the generated labelled corpus to this JSON file")
+    parser.add_argument('--save-decisions', help="write match decisions to this JSON file")
+    parser.add_argument('--compare', help="compare match decisions with a file from --save-decisions")
+    parser.add_argument('--json', help="write the full report to this JSON file")
+    parser.add_argument('--skip-memory', action='store_true', help="skip the catalog rebuild under tracemalloc")
+    parser.add_argument('--skip-caches', action='store_true', help="skip the cache effect passes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if not wait_for_catalog():
+        print("❌ Journal catalog could not be loaded")
+        return 1
+    catalog_year = default_catalog_year()
+    catalog = get_catalog()
+
+    if args.labels:
+        corpus = json.loads(Path(args.labels).read_text(encoding='utf-8'))
+    else:
+        corpus = generate_corpus(catalog, args.per_category, args.seed)
+    if args.write_labels:
+        Path(args.write_labels).write_text(json.dumps(corpus, indent=1, ensure_ascii=False), encoding='utf-8')
+
+    # Cache & negative filter global dilepas selama benchmark → semua query melewati layer matching
+    original = (catalog.match_cache, catalog.negative_filter, catalog.metrics)
+    recorder = LayerRecorder()
+    catalog.match_cache, catalog.negative_filter, catalog.metrics = None, None, recorder
+    try:
+        decisions, layers, layer_report = benchmark_layers(catalog, recorder, corpus)
+        report = {
+            'catalog_year': catalog_year,
+            'catalog_version': catalog.version,
+            'corpus_size': len(corpus),
+            'layers': layer_report,
+            'accuracy': accuracy_report(corpus, decisions)
+        }
+        if not args.skip_caches:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                report['caches'] = benchmark_caches(catalog, recorder, corpus, cache_dir)
+    finally:
+        catalog.match_cache, catalog.negative_filter, catalog.metrics = original
+
+    if not args.skip_memory:
+        report['memory'] = measure_catalog_memory(catalog_year)
+    if args.compare:
+        report['comparison'] = compare_decisions(args.compare, corpus, decisions)
+    if args.save_decisions:
+        rows = [
+            {'query': item['query'], 'category': item['category'], 'layer': layer, 'decision': decision}
+            for item, layer, decision in zip(corpus, layers, decisions)
+        ]
+        Path(args.save_decisions).write_text(json.dumps(rows, indent=1, ensure_ascii=False), encoding='utf-8')
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    print_report(report)
+    return 1 if report.get('comparison', {}).get('changed') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
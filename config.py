@@ -39,6 +39,13 @@ class Config:
     # Konfigurasi Aplikasi
     ALLOWED_EXTENSIONS = {'docx', 'pdf'}
     SCIMAGO_FILE_PATH = str(BASE_DIR / 'data' / 'scimagojr 2024.csv')
+    SCOPUS_FILE_PATH = str(BASE_DIR / 'data' / 'scopus 2025.csv')
+    
+    # Registry katalog: semua 'scimagojr <tahun>.csv' / 'scopus <tahun>.csv' di folder ini
+    CATALOG_DATA_DIR = str(BASE_DIR / 'data')
+    CATALOG_DEFAULT_YEAR = None  # None = tahun Scimago terbaru yang tersedia
+    CATALOG_WATCH_INTERVAL = 60  # Detik antar cek perubahan CSV (0 = nonaktif)
+    CATALOG_MAX_PINNED_YEARS = 2  # Katalog tahun non-default yang tetap dimuat (LRU, min 1)
     
     # Upload folder: production uses AppData, development uses project folder
     if getattr(sys, 'frozen', False):
@@ -72,6 +79,44 @@ class Config:
     JOURNAL_PROPORTION_THRESHOLD = 80.0
     REFERENCE_YEAR_THRESHOLD = 5
     
+    # Pemisahan daftar pustaka lokal (tanpa AI); AI splitter hanya dipakai
+    # jika confidence hasil lokal di bawah ambang ini
+    LOCAL_SPLIT_ENABLED = True
+    LOCAL_SPLIT_MIN_CONFIDENCE = 0.9
+    
+    # Mode single-pass: split + deteksi gaya + analisis dalam SATU panggilan AI
+    # (fallback ke alur multi-call jika respons gagal di-parse). Bisa juga
+    # diaktifkan per request lewat field form 'single_pass'. Blok referensi yang
+    # lebih panjang dari batas ini tetap memakai multi-call (output AI terlalu besar)
+    AI_SINGLE_PASS_ENABLED = os.environ.get('AI_SINGLE_PASS', 'false').lower() == 'true'
+    AI_SINGLE_PASS_MAX_CHARS = 20000
+    
+    # Analisis AI dipecah per potongan referensi yang diproses paralel
+    AI_ANALYSIS_CHUNK_SIZE = 20
+    AI_ANALYSIS_MAX_WORKERS = 4
+    AI_ANALYSIS_CHUNK_RETRIES = 1  # Ulangi potongan yang respons JSON-nya rusak
+    
+    # Cache hasil analisis AI per referensi (key = hash teks + gaya + ambang tahun)
+    AI_CACHE_ENABLED = True
+    AI_CACHE_MAX_ENTRIES = 20000
+    
+    # Batas waktu (detik) menunggu katalog jurnal selesai dimuat di background
+    CATALOG_LOAD_TIMEOUT = 120
+    
+    # Cache hasil matching jurnal (SQLite di UPLOAD_FOLDER/.cache, persisten antar restart)
+    MATCH_CACHE_ENABLED = True
+    MATCH_CACHE_MAX_ENTRIES = 50000
+    
+    # Bloom filter untuk nama jurnal yang tidak pernah match (per versi katalog)
+    NEGATIVE_FILTER_ENABLED = True
+    NEGATIVE_FILTER_CAPACITY = 100000
+    NEGATIVE_FILTER_ERROR_RATE = 1e-6
+    NEGATIVE_FILTER_FLUSH_INTERVAL = 30  # Detik antar simpan file bloom (0 = simpan langsung)
+    
+    # Trace matching per referensi (layer penentu, kandidat, waktu per layer) di detailed_results.
+    # Bisa juga diaktifkan per request lewat field form 'match_trace'
+    MATCH_TRACE_ENABLED = os.environ.get('MATCH_TRACE', 'false').lower() == 'true'
+    
     # Pengaturan Auto-Cleanup
     AUTO_CLEANUP_ENABLED = True  # Set False untuk disable auto-cleanup
     AUTO_CLEANUP_MAX_AGE_HOURS = 0.0833  # 5 minutes (file lebih lama dari ini akan dihapus)
@@ -7,9 +7,11 @@ if __name__ == '__main__':
     # Ringkas status AI tanpa menyebut nama variabel kunci
     logger.info(f"[OK] Layanan AI: {'Siap' if app.config['GEMINI_API_KEY'] else 'Tidak Siap'}")
     
-    # Import dari modul baru
-    from app.services.scimago_service import SCIMAGO_DATA
-    logger.info(f"[OK] ScimagoJR Database: {len(SCIMAGO_DATA['by_title'])} jurnal loaded")
+    # Katalog ScimagoJR & Scopus dimuat di background agar server langsung bisa
+    # melayani request (script/CLI lain memuat saat wait_for_catalog dipanggil)
+    from app.services.catalog_loader import CATALOG_LOAD_STATE, start_catalog_loading
+    start_catalog_loading()
+    logger.info(f"[OK] ScimagoJR & Scopus Database: {CATALOG_LOAD_STATE['status']}")
     logger.info("=" * 60)
     
     # Get port from environment variable or default to 5000
@@ -3,6 +3,8 @@ let currentFilter = 'invalid';
 let currentSessionId = null; // Store session_id untuk download
 let socket = null; // Socket.IO connection
 let uploadedFile = null; // Store uploaded file untuk reuse saat revalidasi
+let streamedResults = []; // Hasil per referensi yang masuk selama analisis AI (event reference_result)
+let activeRequestId = null; // Id request validasi yang sedang berjalan; event reference_result lain diabaikan
 
 const form = document.getElementById('referenceForm');
 const fileInput = document.getElementById('fileInput');
@@ -23,6 +25,11 @@ function initializeSocket() {
         updateProgressBar(data.progress, data.message, data.cached);
     });
     
+    // Hasil per referensi yang sudah selesai dianalisis & dicocokkan (streaming)
+    socket.on('reference_result', (data) => {
+        renderStreamedResult(data);
+    });
+    
     // Listen for PDF generation progress
     socket.on('pdf_generation_progress', (data) => {
         console.log('PDF generation update:', data);
@@ -137,6 +144,14 @@ async function validateReferences() {
         return;
     }
 
+    // Kirim socket id supaya hasil per referensi bisa di-stream ke halaman ini
+    if (socket && socket.id) {
+        formData.set('socket_id', socket.id);
+    }
+    activeRequestId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    formData.set('request_id', activeRequestId);
+    streamedResults = [];
+
     showLoading();
     hideError();
     hideResults();
@@ -173,6 +188,8 @@ async function validateReferences() {
         showError('Terjadi kesalahan dalam menghubungi server. Silakan coba lagi.');
         resetProgress();
     } finally {
+        // Event yang datang setelah respons akhir tidak boleh menimpa hasil
+        activeRequestId = null;
         hideLoading();
         resetProgress();
     }
@@ -238,6 +255,32 @@ function hideResults() {
     resultsSection.style.display = 'none';
 }
 
+// Tampilkan hasil per referensi selagi analisis AI masih berjalan.
+// Ringkasan & tombol download baru muncul saat respons akhir diterima (displayResults).
+function renderStreamedResult(data) {
+    if (!data || !data.result) return;
+    // Abaikan event dari request sebelumnya / yang sudah selesai
+    if (!activeRequestId || data.request_id !== activeRequestId) return;
+
+    streamedResults.push(data.result);
+    streamedResults.sort((a, b) => a.reference_number - b.reference_number);
+    currentResults = streamedResults;
+
+    document.getElementById('summaryGrid').innerHTML = `
+        <div class="summary-item">
+            <div class="summary-number">${data.done}/${data.total}</div>
+            <div class="summary-label">Referensi Dianalisis</div>
+        </div>
+    `;
+    document.getElementById('recommendationsList').innerHTML = '<li>Rekomendasi tersedia setelah semua referensi selesai dianalisis.</li>';
+    document.getElementById('downloadBtn').style.display = 'none';
+    document.getElementById('downloadBibtexAllBtn').style.display = 'none';
+
+    displayDetailedResults(currentResults);
+    updateTabCounts(currentResults);
+    resultsSection.style.display = 'block';
+}
+
 function displayResults(data) {
     const { summary, detailed_results, recommendations, from_cache } = data;
     
@@ -0,0 +1,78 @@
+from app.services.journal_catalog import JournalCatalog, choose_scanned_title, load_catalog_index
+from app.services.journal_index import build_length_buckets, find_length_candidates
+
+
+def build_catalog(titles):
+    catalog = JournalCatalog()
+    catalog.add_source('scimago', {title: {'title': title, 'quartile': 'Q1'} for title in titles})
+    return catalog
+
+
+def test_abbreviation_match_prefers_closest_title():
+    # Kedua judul lolos Layer 2b; judul pertama di urutan dict bukan yang paling mirip
+    catalog = build_catalog(['journal of the pattern analyses', 'journal of pattern analysis'])
+    query = 'journal of pattern analys'
+    found, info = catalog.search_many([query])[query]['scimago']
+    assert found
+    assert info['title'] == 'journal of pattern analysis'
+
+
+SCAN_TITLES = ['journal of physics', 'journal of physics conference series', 'nature', 'machine learning']
+SCAN_REFERENCE = (
+    'A. Smith, "Machine learning for detectors," Journal of Physics: Conference Series, vol. 1, 2020.'
+)
+
+
+def test_scan_text_finds_every_catalog_title():
+    catalog = build_catalog(SCAN_TITLES)
+    assert catalog.title_automaton is None
+    matches = catalog.scan_text(SCAN_REFERENCE)
+    assert [match[2] for match in matches] == [
+        'machine learning', 'journal of physics', 'journal of physics conference series'
+    ]
+    start, end, title, results = matches[-1]
+    assert (start, end) == (6, 11)
+    assert results['scimago'] == (True, {'title': title, 'quartile': 'Q1'})
+    assert results['scopus'] == (False, None)
+
+
+def test_scanned_title_extends_truncated_journal():
+    matches = build_catalog(SCAN_TITLES).scan_text(SCAN_REFERENCE)
+    chosen = choose_scanned_title(matches, 'Journal of Physics', parsed_matched=True)
+    assert chosen[2] == 'journal of physics conference series'
+
+
+def test_scanned_title_inside_parsed_journal_only_when_unmatched():
+    matches = build_catalog(SCAN_TITLES).scan_text(SCAN_REFERENCE)
+    parsed = 'Journal of Physics Conference Series Online Edition'
+    assert choose_scanned_title(matches, parsed, parsed_matched=True) is None
+    assert choose_scanned_title(matches, parsed)[2] == 'journal of physics conference series'
+
+
+def test_scanned_title_ignores_article_title_and_short_titles():
+    catalog = build_catalog(SCAN_TITLES)
+    matches = catalog.scan_text('B. Lee, "Machine learning," Nature, vol. 5, 2019.')
+    # "machine learning" ada di judul artikel, "nature" hanya satu kata penting
+    assert choose_scanned_title(matches, 'Machine Learning Nature Letters', parsed_title='Machine learning') is None
+    assert choose_scanned_title(matches, 'Machine Learning Nature Letters')[2] == 'machine learning'
+    assert choose_scanned_title([], 'Nature') is None
+
+
+def test_index_file_matches_heap_catalog(tmp_path):
+    catalog = build_catalog(SCAN_TITLES + ['journal of pattern analysis'])
+    catalog.add_source('scopus', {'nature': {'title': 'Nature', 'publisher': 'Springer'}}, 'fp', {'0028-0836': {'title': 'Nature'}})
+    catalog.build_indexes()
+    catalog.save_index_file(tmp_path / 'journals.catalog')
+
+    indexed = load_catalog_index(tmp_path / 'journals.catalog')
+    assert indexed.version == catalog.version
+    queries = ['Nature', 'journal of pattern analys', 'J. Phys. Conf. Ser.', 'unknown journal of nothing']
+    assert indexed.search_many(queries) == catalog.search_many(queries)
+    assert indexed.search_issns(['0028-0836']) == catalog.search_issns(['0028-0836'])
+    assert indexed.scan_text(SCAN_REFERENCE) == catalog.scan_text(SCAN_REFERENCE)
+
+
+def test_length_buckets_skip_titles_that_cannot_reach_threshold():
+    titles = ['nature', 'journal of physics', 'journal of physic', 'journal of physics conference series']
+    candidates = find_length_candidates(build_length_buckets(titles), 'journal of phisics', 0.9)
+    assert candidates == ['journal of physics', 'journal of physic']
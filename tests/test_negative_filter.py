@@ -0,0 +1,46 @@
+from app.services.negative_filter import NegativeFilterStore
+
+
+def test_add_many_defers_save_until_flush(tmp_path):
+    store = NegativeFilterStore(tmp_path, capacity=1000, flush_interval=3600)
+    store.add_many(['unknown journal of nothing'], 'v1')
+    assert not (tmp_path / 'negative_v1.bloom').exists()
+
+    store.flush()
+    reloaded = NegativeFilterStore(tmp_path, capacity=1000)
+    assert reloaded.contains_many(['unknown journal of nothing', 'nature'], 'v1') == {'unknown journal of nothing'}
+
+
+def test_retire_drops_pending_changes(tmp_path):
+    store = NegativeFilterStore(tmp_path, capacity=1000, flush_interval=3600)
+    store.add_many(['unknown journal of nothing'], 'v1')
+    store.retire('v1')
+    store.flush()
+    assert not (tmp_path / 'negative_v1.bloom').exists()
+
+
+def test_flush_merges_entries_saved_by_another_process(tmp_path):
+    first = NegativeFilterStore(tmp_path, capacity=1000, flush_interval=3600)
+    second = NegativeFilterStore(tmp_path, capacity=1000, flush_interval=3600)
+    first.add_many(['unknown journal of nothing'], 'v1')
+    second.add_many(['journal of missing things'], 'v1')
+    first.flush()
+    second.flush()
+
+    reloaded = NegativeFilterStore(tmp_path, capacity=1000)
+    queries = ['unknown journal of nothing', 'journal of missing things']
+    assert reloaded.contains_many(queries, 'v1') == set(queries)
+
+
+def test_retire_keeps_file_until_installed_version_is_newer(tmp_path):
+    store = NegativeFilterStore(tmp_path, capacity=1000, flush_interval=3600)
+    store.add_many(['unknown journal of nothing'], 'v1')
+    store.flush()
+    store.retire('v1', 'v2')
+    # Proses lain bisa masih memakai v1 selama belum ada file v2
+    assert (tmp_path / 'negative_v1.bloom').exists()
+
+    store.add_many(['journal of missing things'], 'v2')
+    store.flush()
+    assert not (tmp_path / 'negative_v1.bloom').exists()
+    assert (tmp_path / 'negative_v2.bloom').exists()
@@ -0,0 +1,103 @@
+from app.utils.text_utils import split_references_locally
+
+JOURNALS = ["Nature", "Science", "Journal of Informetrics", "PLOS ONE", "Scientometrics"]
+
+
+def ieee_block(count, skip=None):
+    lines = ["References"]
+    for i in range(1, count + 1):
+        marker = "" if i == skip else f"[{i}] "
+        lines.append(f'{marker}A. Author{chr(96 + i)} and B. Writer, "Study number {i} of citation')
+        lines.append(f'analysis," {JOURNALS[i % 5]}, vol. {i}, no. 2, pp. 1-10, {2000 + i}.')
+    return "\n".join(lines)
+
+
+def apa_block(count, without_year=None):
+    lines = ["Daftar Pustaka"]
+    for i in range(1, count + 1):
+        year = "" if i == without_year else f" ({2000 + i})"
+        lines.append(f"Author{chr(96 + i)}, A., & Writer, B.{year}. Study number {i} of citation")
+        lines.append(f"analysis. {JOURNALS[i % 5]}, {i}(2), 1-10.")
+    return "\n".join(lines)
+
+
+def test_numbered_list_splits_locally():
+    references, confidence = split_references_locally(ieee_block(20))
+    assert confidence == 1.0
+    assert len(references) == 20
+    # Sama seperti hasil AI splitter: tanpa penanda nomor, satu baris
+    assert references[0] == (
+        'A. Authora and B. Writer, "Study number 1 of citation analysis," Science, vol. 1, no. 2, pp. 1-10, 2001.'
+    )
+
+
+def test_author_year_list_splits_locally():
+    references, confidence = split_references_locally(apa_block(12))
+    assert confidence == 1.0
+    assert len(references) == 12
+
+
+def test_wrapped_author_list_is_not_a_merge():
+    block = (
+        "Smith, J., Doe, A., &\n"
+        "Brown, K. (2020). Deep learning for citation analysis. Journal of\n"
+        "Informetrics, 14(2), 1-10.\n"
+        "Lee, A. (2019). Another paper title about things. Nature, 5, 11-20."
+    )
+    references, confidence = split_references_locally(block)
+    assert confidence == 1.0
+    assert len(references) == 2
+
+
+def test_missing_marker_falls_back():
+    references, confidence = split_references_locally(ieee_block(20, skip=19))
+    assert confidence < 0.9
+
+
+def test_reference_without_year_falls_back():
+    references, confidence = split_references_locally(apa_block(12, without_year=5))
+    assert confidence < 0.9
+
+
+def test_two_bare_years_in_one_entry_fall_back():
+    block = (
+        '[1] A. Smith, "First paper," Nature, vol. 1, pp. 1-2, 2019. B. Lee, "Second paper,"\n'
+        "Science, vol. 2, pp. 3-4, 2020.\n"
+        '[2] C. Kim, "Third paper," PLOS ONE, vol. 3, pp. 1999-2005, 2021.'
+    )
+    references, confidence = split_references_locally(block)
+    assert confidence < 0.9
+
+
+def test_two_dois_in_one_entry_fall_back():
+    block = (
+        "Smith, J. (2019). First paper. Nature, 1, 1-2. https://doi.org/10.1038/abc\n"
+        "Lee, B. Second paper. Science, 2, 3-4. https://doi.org/10.1126/def\n"
+        "Kim, C. (2021). Third paper. PLOS ONE, 3, 5-6."
+    )
+    references, confidence = split_references_locally(block)
+    assert confidence < 0.9
+
+
+def test_page_range_and_doi_years_are_not_counted():
+    block = (
+        '[1] A. Smith, "First paper," Nature, vol. 1, pp. 1999-2005, 2019, doi: 10.1016/j.joi.2019.01.\n'
+        '[2] C. Kim, "Third paper," PLOS ONE, vol. 3, pp. 1-9, 2021.'
+    )
+    references, confidence = split_references_locally(block)
+    assert confidence == 1.0
+    assert len(references) == 2
+
+
+def test_dotted_markers_and_extra_whitespace_are_stripped():
+    block = (
+        "1.  Smith, J. (2019).   First paper on\n"
+        "citation analysis. Nature, 1, 1-2.\n"
+        "2. Lee, B. (2020). Second paper. Science, 2, 3-4."
+    )
+    references, confidence = split_references_locally(block)
+    assert confidence == 1.0
+    assert references == [
+        "Smith, J. (2019). First paper on citation analysis. Nature, 1, 1-2.",
+        "Lee, B. (2020). Second paper. Science, 2, 3-4."
+    ]